@@ -0,0 +1,105 @@
+"""Offline accuracy/latency report: local embedding classifier vs the Ollama LLM classifier.
+
+Run from the repository root:
+    python -m benchmarks.classifier_report [--skip-llm]
+
+The labelled queries are held out: none may contain a CATEGORY_EXAMPLES sentence, since the
+centroids are built from those and would score their own training text.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+from tools.classifier import classify_query_intent, classify_query_intent_llm
+from tools.embedding_classifier import CATEGORY_EXAMPLES, get_embedding_classifier
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(__file__), "data", "labelled_queries.json")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "classifier_report.json")
+
+
+def _as_label_set(result):
+    if isinstance(result, str):
+        return set() if result == "unknown" else {result}
+    return set(result)
+
+
+def leaked_examples(labelled_queries, examples=CATEGORY_EXAMPLES):
+    """(query, example) pairs where a centroid training sentence appears in an evaluation query"""
+    sentences = [text.lower() for texts in examples.values() for text in texts]
+    return [(example["query"], sentence) for example in labelled_queries
+            for sentence in sentences if sentence in example["query"].lower()]
+
+
+def evaluate(name, classify, labelled_queries):
+    true_positives = false_positives = false_negatives = exact = 0
+    latencies = []
+    predictions = []
+
+    for example in labelled_queries:
+        start = time.perf_counter()
+        predicted = _as_label_set(classify(example["query"]))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        expected = set(example["labels"])
+        true_positives += len(predicted & expected)
+        false_positives += len(predicted - expected)
+        false_negatives += len(expected - predicted)
+        exact += predicted == expected
+        predictions.append({"query": example["query"], "expected": sorted(expected), "predicted": sorted(predicted)})
+
+    precision = true_positives / (true_positives + false_positives) if true_positives + false_positives else 0.0
+    recall = true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        "classifier": name,
+        "exact_match": exact / len(labelled_queries),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "latency_ms": {
+            "mean": float(np.mean(latencies)),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+        },
+        "predictions": predictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--skip-llm", action="store_true", help="Only evaluate the local classifier")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        labelled_queries = json.load(f)
+    leaks = leaked_examples(labelled_queries)
+    if leaks:
+        raise ValueError(f"{len(leaks)} evaluation queries contain classifier training examples, "
+                         f"e.g. {leaks[0][1]!r} in {leaks[0][0]!r}")
+
+    # Build centroids up front so the first query's latency isn't the warm-up
+    get_embedding_classifier()
+
+    reports = [evaluate("local", lambda q: classify_query_intent(q, use_llm_fallback=False), labelled_queries)]
+    if not args.skip_llm:
+        reports.append(evaluate("local+llm_fallback", classify_query_intent, labelled_queries))
+        reports.append(evaluate("llm", classify_query_intent_llm, labelled_queries))
+
+    print(f"{'classifier':<20}{'exact':>8}{'P':>8}{'R':>8}{'F1':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for report in reports:
+        latency = report["latency_ms"]
+        print(f"{report['classifier']:<20}{report['exact_match']:>8.2f}{report['precision']:>8.2f}"
+              f"{report['recall']:>8.2f}{report['f1']:>8.2f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"queries": len(labelled_queries), "reports": reports}, f, indent=2)
+    print(f"[Report saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Query embedding under concurrent load: one forward pass per call vs cross-request micro-batching.
+
+Run from the repository root:
+    python -m benchmarks.embedding_batching_benchmark
+    python -m benchmarks.embedding_batching_benchmark --concurrency 1,16,64 --max-wait-ms 1,2,5 --server
+
+Concurrent clients each encode one query at a time, as the crew, WeaviateTool and the classifier do.
+Configurations: "direct" calls the model from every client thread, "batched" goes through the
+in-process MicroBatcher, and "server" (with --server) through the Unix-socket embedding server
+started as a sibling process. Queries are numbered so nothing repeats; no embedding cache is involved.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import numpy as np
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "embedding_batching_benchmark.json")
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "data", "labelled_queries.json")
+
+
+def benchmark_queries(count: int) -> List[str]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        queries = [row["query"] for row in json.load(f)]
+    return [f"{queries[i % len(queries)]} ({i})" for i in range(count)]
+
+
+def drive(encoder, queries: List[str], concurrency: int) -> Dict:
+    def one(text: str) -> float:
+        start = time.perf_counter()
+        encoder.encode(text)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one, queries))
+    seconds = time.perf_counter() - start
+    return {"concurrency": concurrency, "sentences": len(queries), "seconds": seconds,
+            "sentences_per_second": len(queries) / seconds,
+            "latency_ms": {"p50": float(np.percentile(latencies, 50)), "p99": float(np.percentile(latencies, 99))}}
+
+
+def run_configuration(name: str, encoder, levels: List[int], args) -> List[Dict]:
+    rows = []
+    drive(encoder, benchmark_queries(args.warmup), max(levels))
+    for concurrency in levels:
+        queries = benchmark_queries(max(args.per_client * concurrency, args.min_sentences))
+        row = {"configuration": name, **drive(encoder, queries, concurrency)}
+        print(f"[Batching] {name} x{concurrency}: {row['sentences_per_second']:.0f} sentences/s, "
+              f"p50 {row['latency_ms']['p50']:.1f}ms, p99 {row['latency_ms']['p99']:.1f}ms")
+        rows.append(row)
+    return rows
+
+
+def main():
+    from tools.weaviate_tools.embedding_batcher import MicroBatcher
+    from tools.weaviate_tools.embedding_server import EmbeddingClient
+    from tools.weaviate_tools.vectorizer import BACKEND, load_encoder
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="Concurrent clients to compare")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", default="2", help="Batching windows to compare, comma-separated")
+    parser.add_argument("--per-client", type=int, default=25, help="Queries per client at each concurrency level")
+    parser.add_argument("--min-sentences", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=64, help="Queries sent before measuring")
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--server", action="store_true", help="Also measure the Unix-socket embedding server")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    waits = [float(wait) for wait in args.max_wait_ms.split(",")]
+    encoder = load_encoder(args.backend, os.getenv("EMBEDDING_ONNX_FILE") or None)
+    encoder.load()
+
+    results = run_configuration("direct", encoder, levels, args)
+    for wait in waits:
+        results += run_configuration(f"batched {args.max_batch_size}/{wait:g}ms",
+                                     MicroBatcher(encoder, args.max_batch_size, wait), levels, args)
+
+    if args.server:
+        socket_dir = tempfile.mkdtemp(prefix="embedding-benchmark-")
+        socket_path = os.path.join(socket_dir, "embeddings.sock")
+        server = subprocess.Popen([sys.executable, "-m", "tools.weaviate_tools.embedding_server",
+                                   "--socket", socket_path, "--backend", args.backend,
+                                   "--max-batch-size", str(args.max_batch_size), "--max-wait-ms", str(waits[0])],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            client = EmbeddingClient(socket_path)
+            client.load()
+            results += run_configuration(f"server {args.max_batch_size}/{waits[0]:g}ms", client, levels, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+    print(f"{'configuration':<24}{'clients':>8}{'sent/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in results:
+        print(f"{row['configuration']:<24}{row['concurrency']:>8}{row['sentences_per_second']:>10.0f}"
+              f"{row['latency_ms']['p50']:>10.1f}{row['latency_ms']['p99']:>10.1f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"backend": args.backend, "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+    print(f"[Benchmark saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
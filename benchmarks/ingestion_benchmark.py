@@ -0,0 +1,88 @@
+"""Throughput benchmark: one-at-a-time inserts vs the batched ingestion engine.
+
+Run from the repository root:
+    python -m benchmarks.ingestion_benchmark --spec Restaurants --docs 500
+    python -m benchmarks.ingestion_benchmark --spec Restaurants --target RestaurantsScratch
+
+Without --target only the embedding stage is measured. With --target, objects are written to
+that (scratch) collection, which must already exist with the spec's properties.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from tools.weaviate_tools.ingestion import COLLECTION_SPECS, ingest_documents
+from tools.weaviate_tools.vectorizer import model
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "ingestion_benchmark.json")
+
+
+def synthetic_docs(spec, count):
+    # A per-run nonce keeps the embedding cache from serving any of these texts
+    nonce = uuid.uuid4().hex[:8]
+    return [{key: f"{key.strip()} sample {nonce} {i}" for key in spec.field_mapping.values()} for i in range(count)]
+
+
+def bench_one_at_a_time(spec, docs, collection=None):
+    start = time.perf_counter()
+    for doc in docs:
+        vector = model.encode(spec.text(doc)).tolist()
+        if collection is not None:
+            collection.data.insert(properties=spec.properties(doc), vector=vector)
+    return time.perf_counter() - start
+
+
+def bench_encode_batched(spec, docs, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        model.encode([spec.text(doc) for doc in docs[i:i + batch_size]], batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spec", default="Restaurants", choices=sorted(COLLECTION_SPECS))
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="16,64,128")
+    parser.add_argument("--target", help="Scratch collection to write into; omit to benchmark embedding only")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    spec = COLLECTION_SPECS[args.spec]
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    target = None
+    if args.target:
+        from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
+        target = get_weaviate_collection(args.target)
+
+    results = []
+    seconds = bench_one_at_a_time(spec, synthetic_docs(spec, args.docs), target)
+    results.append({"mode": "one_at_a_time", "batch_size": 1, "seconds": seconds, "docs_per_second": args.docs / seconds})
+
+    for batch_size in batch_sizes:
+        docs = synthetic_docs(spec, args.docs)
+        if target is None:
+            seconds = bench_encode_batched(spec, docs, batch_size)
+            failed = 0
+        else:
+            report = ingest_documents(args.spec, docs, encode_batch_size=batch_size,
+                                      write_batch_size=max(batch_size, 100), collection=target)
+            seconds, failed = report.seconds, len(report.failed)
+        results.append({"mode": "batched", "batch_size": batch_size, "seconds": seconds,
+                        "docs_per_second": args.docs / seconds, "failed": failed})
+
+    stage = "embed+write" if target is not None else "embed only"
+    print(f"{args.docs} {args.spec} docs, {stage}")
+    print(f"{'mode':<16}{'batch':>8}{'seconds':>10}{'docs/s':>10}")
+    for row in results:
+        print(f"{row['mode']:<16}{row['batch_size']:>8}{row['seconds']:>10.2f}{row['docs_per_second']:>10.1f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"spec": args.spec, "docs": args.docs, "stage": stage, "results": results}, f, indent=2)
+    print(f"[Benchmark saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
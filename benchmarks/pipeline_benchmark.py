@@ -0,0 +1,292 @@
+"""Offline, repeatable per-stage benchmark of the query pipeline.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --queries 100 --concurrency 1,4,8 --compare old.json
+
+External services are replaced with local stand-ins so numbers only move when our code does:
+- Ollama: a stub HTTP server answering /api/generate (tools.classifier is pointed at it)
+- Gemini: a stub model answering filter-extraction prompts with empty fields
+- Weaviate: the in-process store (VECTOR_BACKEND=local) filled with seeded synthetic objects
+  written through the normal ingestion path
+The embedding model is the real one. Queries run in direct mode (no crewai agent loop) and the
+corpus is seeded from COMPLEX_QUERIES in test.py. The query-result and embedding caches are off
+or cleared, so every query pays for every stage.
+"""
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List
+import numpy as np
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "pipeline_benchmark.json")
+TEST_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test.py")
+
+# Reported stage -> span names recorded by tools/tracing.py (summed when a query has several)
+STAGES = {
+    "classify": ["classification"],
+    "filter_extraction": ["filter_extraction"],
+    "embedding": ["embedding"],
+    "retrieval": ["weaviate_search"],
+    "ranking": ["ranking"],
+    "serialization": ["serialization"],
+}
+
+INTENT_KEYWORDS = {
+    "activity": ["activit", "things to do", "tour"], "accommodation": ["hotel", "stay", "hostel"],
+    "visa": ["visa", "passport"], "restaurant": ["restaurant", "eat"], "dish": ["dish", "food", "pasta"],
+    "transportation": ["get around", "get from", "transport", "train"], "seasonal": ["season", "weather", "june"],
+    "scam": ["scam"],
+}
+
+
+def load_complex_queries(path: str = TEST_SCRIPT) -> List[str]:
+    """COMPLEX_QUERIES from test.py, read without importing it (it connects to Gemini at import)"""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "COMPLEX_QUERIES" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"COMPLEX_QUERIES not found in {path}")
+
+
+def build_corpus(seed_queries: List[str], count: int, cities: List[str], seed: int) -> List[str]:
+    """The seed queries first, then variants with other cities and budgets"""
+    rng = random.Random(seed)
+    city_pattern = re.compile(r"\b(" + "|".join(re.escape(city) for city in cities) + r")\b", re.IGNORECASE)
+    corpus = []
+    for i in range(count):
+        query = seed_queries[i % len(seed_queries)]
+        if i >= len(seed_queries):
+            query = city_pattern.sub(lambda _: rng.choice(cities).title(), query)
+            query = re.sub(r"\$\d+", lambda _: f"${rng.randrange(20, 300, 10)}", query)
+        corpus.append(query)
+    return corpus
+
+
+def fixture_docs(spec, count: int, gazetteer: Dict[str, str], vocabulary: List[str], rng: random.Random):
+    """Synthetic raw documents for an ingestion spec, with parseable prices/durations and real place names"""
+    cities = sorted(gazetteer)
+    for i in range(count):
+        city = rng.choice(cities)
+        doc = {}
+        for key in spec.field_mapping.values():
+            name = key.strip().lower()
+            if name == "country":
+                doc[key] = gazetteer[city]
+            elif name in ("city", "from"):
+                doc[key] = city.title()
+            elif name == "to":
+                doc[key] = rng.choice(cities).title()
+            elif "price" in name or "budget (usd)" in name:
+                low = rng.randrange(5, 400, 5)
+                doc[key] = f"${low}-{low + rng.randrange(5, 100, 5)}"
+            elif "duration" in name:
+                doc[key] = f"{rng.randint(1, 8)} hours"
+            else:
+                doc[key] = f"{key.strip()} {i} " + " ".join(rng.sample(vocabulary, 6))
+        yield doc
+
+
+class _OllamaStub(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        time.sleep(self.latency)
+        prompt = payload.get("prompt") or ""
+        query = prompt.rsplit("Query:", 1)[-1].lower()
+        labels = [label for label, words in INTENT_KEYWORDS.items() if any(word in query for word in words)]
+        body = json.dumps({"model": payload.get("model"), "response": ", ".join(labels) or "activity", "done": True,
+                           "prompt_eval_count": len(prompt) // 4, "eval_count": 2 * max(len(labels), 1)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_ollama_stub(latency: float) -> ThreadingHTTPServer:
+    handler = type("OllamaStub", (_OllamaStub,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="ollama-stub", daemon=True).start()
+    return server
+
+
+class GeminiStub:
+    """Answers filter-extraction prompts with every requested field empty, like a query without those filters"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.latency)
+        fields = re.findall(r"'(\w+)'", prompt.split("Return your answer", 1)[0])
+        return SimpleNamespace(text=json.dumps({field: "" for field in fields}),
+                               usage_metadata=SimpleNamespace(prompt_token_count=len(prompt) // 4,
+                                                              candidates_token_count=8 * len(fields)))
+
+
+def percentiles(values_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(values_ms, dtype=np.float64)
+    return {"count": int(values.size), "mean_ms": float(values.mean()), "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)), "p99_ms": float(np.percentile(values, 99))}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def print_comparison(current: Dict, baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline.get('revision') or 'unknown revision'}), p50 ms:")
+    for stage, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before:
+            change = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+            print(f"  {stage:<18}{before['p50_ms']:>10.2f}{stats['p50_ms']:>10.2f}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50, help="Corpus size; the first are COMPLEX_QUERIES as-is")
+    parser.add_argument("--objects", type=int, default=300, help="Synthetic objects per collection")
+    parser.add_argument("--concurrency", default="1,4", help="Concurrent queries for the throughput runs")
+    parser.add_argument("--ollama-latency-ms", type=float, default=0.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--compare", help="Earlier result file to print p50 deltas against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own log output")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    # Read at import time by the modules below, so set before importing them
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_VECTOR_STORE_PATH": os.path.join(workdir, "vector_store"),
+        "PRICE_STATS_PATH": os.path.join(workdir, "price_stats.json"),
+        "QUERY_CACHE_STATE_DIR": os.path.join(workdir, "query_cache"),
+        "QUERY_CACHE_MAX_ENTRIES": "0",
+        "EMBEDDING_CACHE_PATH": "",
+        "GEMINI_API_KEY": "",
+    })
+    import tools.classifier
+    from config.weaviate_setup.weaviate_client_manager import client_manager
+    from crew import AgenticRagCrew
+    from tools.filter_extractor import CITY_GAZETTEER
+    from tools.tracing import Trace
+    from tools.weaviate_tools.ingestion import COLLECTION_SPECS, ingest_documents
+    from tools.weaviate_tools.vectorizer import model as embedding_model
+
+    ollama = start_ollama_stub(args.ollama_latency_ms / 1000)
+    tools.classifier.OLLAMA_BASE_URL = f"http://127.0.0.1:{ollama.server_address[1]}"
+
+    seed_queries = load_complex_queries()
+    corpus = build_corpus(seed_queries, args.queries, sorted(CITY_GAZETTEER), args.seed)
+    vocabulary = sorted({word for query in seed_queries for word in re.findall(r"[a-z]{4,}", query.lower())})
+    log = io.StringIO()
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    with quiet:
+        for name, spec in COLLECTION_SPECS.items():
+            ingest_documents(name, fixture_docs(spec, args.objects, CITY_GAZETTEER, vocabulary, rng))
+    print(f"[Fixtures] {args.objects} objects x {len(COLLECTION_SPECS)} collections in {time.perf_counter() - start:.1f}s")
+
+    crew = AgenticRagCrew()
+    crew._gemini_key = "stub"
+    crew.gemini_model = GeminiStub(args.gemini_latency_ms / 1000)
+
+    def run_query(query: str) -> Dict[str, float]:
+        trace = Trace("benchmark")
+        start = time.perf_counter()
+        with trace.activate():
+            crew.run_task_by_classified_intent(query, mode="direct")
+        timings = defaultdict(float, end_to_end=(time.perf_counter() - start) * 1000)
+        for span in trace.as_dict()["spans"]:
+            for stage, names in STAGES.items():
+                if span["stage"] in names:
+                    timings[stage] += span["seconds"] * 1000
+        return timings
+
+    cwd = os.getcwd()
+    os.chdir(workdir)  # crew_result.json is written to the working directory
+    try:
+        with quiet:
+            for query in corpus[:2]:
+                run_query(query)  # Model and code paths warm
+
+            per_stage = defaultdict(list)
+            for query in corpus:
+                embedding_model.clear()
+                for stage, ms in run_query(query).items():
+                    per_stage[stage].append(ms)
+
+            throughput = []
+            for concurrency in [int(level) for level in args.concurrency.split(",")]:
+                embedding_model.clear()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(run_query, corpus))
+                seconds = time.perf_counter() - start
+                throughput.append({"concurrency": concurrency, "seconds": seconds,
+                                   "queries_per_second": len(corpus) / seconds})
+    finally:
+        os.chdir(cwd)
+        ollama.shutdown()
+        ollama.server_close()
+        client_manager.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stage_order = ["end_to_end", *STAGES]
+    result = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "settings": {key: value for key, value in vars(args).items() if key not in ("compare", "verbose", "output")},
+        "stages": {stage: percentiles(per_stage[stage]) for stage in stage_order if per_stage.get(stage)},
+        "throughput": throughput,
+    }
+
+    print(f"{len(corpus)} queries, direct mode")
+    print(f"{'stage':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<20}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    for row in throughput:
+        print(f"concurrency {row['concurrency']:>3}: {row['queries_per_second']:.1f} queries/s")
+    if args.compare:
+        print_comparison(result, args.compare)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"[Benchmark saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Embedding backends compared: parity with the stored fp32 vectors, sentences/sec and resident memory.
+
+Run from the repository root:
+    python -m benchmarks.vectorizer_benchmark
+    python -m benchmarks.vectorizer_benchmark --backends torch,onnx-int8 --batch-sizes 1,32 --no-parity
+
+Each backend runs in its own subprocess so its resident memory isn't mixed with the others. For the
+parity check, objects are sampled from Weaviate with their stored vectors, their text is rebuilt
+with the ingestion template and re-encoded, and the cosine between stored and fresh vectors is reported.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+import numpy as np
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "vectorizer_benchmark.json")
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "data", "labelled_queries.json")
+
+# A backend passes when 99% of the sampled objects keep at least this cosine with their stored vector
+PARITY_MIN_COSINE = 0.98
+PARITY_PERCENTILE = 1
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_sentences(count: int) -> List[str]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        queries = [row["query"] for row in json.load(f)]
+    # Numbered copies so nothing is served from a cache and the batches are full
+    return [f"{queries[i % len(queries)]} ({i})" for i in range(count)]
+
+
+def sample_stored_vectors(collections: List[str], per_collection: int) -> Dict[str, List]:
+    """Texts rebuilt from sampled objects' properties, paired with the vectors Weaviate stores for them"""
+    from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
+    from tools.weaviate_tools.ingestion import COLLECTION_SPECS
+
+    texts, vectors = [], []
+    for name in collections:
+        spec = COLLECTION_SPECS[name]
+        taken = 0
+        for obj in get_weaviate_collection(name).iterator(include_vector=True):
+            if taken >= per_collection:
+                break
+            doc = {key: obj.properties.get(prop) for prop, key in spec.field_mapping.items()}
+            try:
+                text = spec.text(doc)
+            except KeyError:
+                continue
+            vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+            texts.append(text)
+            vectors.append(list(vector))
+            taken += 1
+    return {"texts": texts, "vectors": vectors}
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def run_backend(backend: str, sentences: List[str], batch_sizes: List[int], sample_path: str = None) -> Dict:
+    """Measure one backend in the current process; called in a fresh subprocess by main()"""
+    from tools.weaviate_tools.vectorizer import load_encoder
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    encoder = load_encoder(backend).load()
+    encoder.encode(sentences[:8])
+    result = {"backend": backend, "load_seconds": time.perf_counter() - start,
+              "rss_after_load_mb": peak_rss_mb(), "rss_interpreter_mb": rss_before, "throughput": []}
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        encoder.encode(sentences, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        result["throughput"].append({"batch_size": batch_size, "seconds": seconds,
+                                     "sentences_per_second": len(sentences) / seconds,
+                                     "peak_rss_mb": peak_rss_mb()})
+
+    if sample_path:
+        with open(sample_path, "r", encoding="utf-8") as f:
+            sample = json.load(f)
+        if sample["texts"]:
+            fresh = np.asarray(encoder.encode(sample["texts"], batch_size=64), dtype=np.float64)
+            cosines = cosine_rows(fresh, np.asarray(sample["vectors"], dtype=np.float64))
+            low = float(np.percentile(cosines, PARITY_PERCENTILE))
+            result["parity"] = {"objects": len(cosines), "mean_cosine": float(cosines.mean()),
+                                "min_cosine": float(cosines.min()), f"p{PARITY_PERCENTILE}_cosine": low,
+                                "passed": low >= PARITY_MIN_COSINE}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--sentences", type=int, default=512)
+    parser.add_argument("--collection", action="append",
+                        help="Collection to sample for the parity check; repeatable, defaults to all with an ingestion spec")
+    parser.add_argument("--parity-objects", type=int, default=200, help="Objects sampled per collection")
+    parser.add_argument("--no-parity", action="store_true", help="Skip the Weaviate parity check")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--sample", help=argparse.SUPPRESS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    sentences = benchmark_sentences(args.sentences)
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, sentences, batch_sizes, args.sample)))
+        return
+
+    sample_path = None
+    if not args.no_parity:
+        from tools.weaviate_tools.ingestion import COLLECTION_SPECS
+        sample = sample_stored_vectors(args.collection or sorted(COLLECTION_SPECS), args.parity_objects)
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+            json.dump(sample, f)
+            sample_path = f.name
+        print(f"[Parity] {len(sample['texts'])} stored vectors sampled")
+
+    results = []
+    try:
+        for backend in args.backends.split(","):
+            command = [sys.executable, "-m", "benchmarks.vectorizer_benchmark", "--worker", backend,
+                       "--batch-sizes", args.batch_sizes, "--sentences", str(args.sentences)]
+            if sample_path:
+                command += ["--sample", sample_path]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"[Warning] Backend {backend} failed:\n{completed.stderr.strip()[-2000:]}")
+                results.append({"backend": backend, "error": completed.stderr.strip().splitlines()[-1:]})
+                continue
+            # Model loading may print; the result is the last line
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    finally:
+        if sample_path:
+            os.remove(sample_path)
+
+    print(f"{'backend':<12}{'batch':>7}{'sent/s':>10}{'peak RSS MB':>13}{'load s':>8}{'parity p1':>11}")
+    for row in results:
+        if "error" in row:
+            print(f"{row['backend']:<12} failed")
+            continue
+        parity = row.get("parity")
+        parity_text = f"{parity[f'p{PARITY_PERCENTILE}_cosine']:.4f}{'' if parity['passed'] else ' !'}" if parity else "-"
+        for i, point in enumerate(row["throughput"]):
+            # Per-backend columns only on the backend's first row
+            first = [row["backend"], f"{row['load_seconds']:.2f}", parity_text] if i == 0 else ["", "", ""]
+            print(f"{first[0]:<12}{point['batch_size']:>7}{point['sentences_per_second']:>10.1f}"
+                  f"{point['peak_rss_mb']:>13.0f}{first[1]:>8}{first[2]:>11}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"sentences": args.sentences, "parity_min_cosine": PARITY_MIN_COSINE, "results": results}, f, indent=2)
+    print(f"[Benchmark saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Serving throughput with 1 vs N worker processes, and how much memory the workers share.
+
+Run from the repository root:
+    python -m benchmarks.workers_benchmark
+    VECTOR_BACKEND=local python -m benchmarks.workers_benchmark --workers 1,4,8 --clients 32 --requests 400
+
+Each configuration starts `python main.py --no-ngrok --workers N` on a free port with the current
+environment, waits for /healthz to report that warm-up finished, then drives /api/any?mode=direct
+from concurrent clients (direct mode keeps the LLM out of the numbers). The query-result cache is
+disabled in the server so every request does the full work. On Linux the total proportional set
+size (PSS) of the server processes shows how much of the model is shared copy-on-write.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+import requests
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "workers_benchmark.json")
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "data", "labelled_queries.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        children = f.read().split()
+    pids = [pid]
+    for child in children:
+        pids.extend(process_tree(int(child)))
+    return pids
+
+
+def total_pss_mb(pid: int) -> Optional[float]:
+    """PSS summed over the server and its workers; shared pages are split between the processes using them"""
+    try:
+        total_kb = 0
+        for member in process_tree(pid):
+            with open(f"/proc/{member}/smaps_rollup") as f:
+                total_kb += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        return total_kb / 1024
+    except (OSError, StopIteration):
+        return None
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float) -> Dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            body = requests.get(f"{base_url}/healthz", timeout=2).json()
+            # Warm-up finished; a degraded step (e.g. no Ollama) doesn't matter for direct mode
+            if body["startup"]["ready"]:
+                return body
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def drive(base_url: str, queries: List[str], clients: int, total_requests: int) -> Dict:
+    session_per_client = [requests.Session() for _ in range(clients)]
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        response = session_per_client[i % clients].get(f"{base_url}/api/any",
+                                                       params={"query": queries[i % len(queries)], "mode": "direct"},
+                                                       timeout=300)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = list(executor.map(one, range(total_requests)))
+    seconds = time.perf_counter() - start
+    return {"requests": total_requests, "seconds": seconds, "requests_per_second": total_requests / seconds,
+            "latency_ms": {"p50": float(np.percentile(latencies, 50)), "p99": float(np.percentile(latencies, 99))}}
+
+
+def run_configuration(workers: int, queries: List[str], args) -> Dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, QUERY_CACHE_MAX_ENTRIES="0")
+    server = subprocess.Popen([sys.executable, "main.py", "--no-ngrok", "--workers", str(workers), "--port", str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        started = time.perf_counter()
+        wait_until_ready(base_url, server, args.startup_timeout)
+        # With several workers /healthz may have answered from one of them; give the rest time to warm up
+        time.sleep(2 if workers > 1 else 0)
+        result = {"workers": workers, "ready_seconds": time.perf_counter() - started,
+                  "pss_idle_mb": total_pss_mb(server.pid)}
+        drive(base_url, queries, args.clients, min(args.clients * 2, args.requests))  # warm every worker
+        result.update(drive(base_url, queries, args.clients, args.requests))
+        result["pss_loaded_mb"] = total_pss_mb(server.pid)
+        return result
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 2}", help="Worker counts to compare")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        queries = [row["query"] for row in json.load(f)]
+
+    results = []
+    for workers in [int(count) for count in args.workers.split(",")]:
+        print(f"[Workers] starting {workers} worker(s)")
+        results.append(run_configuration(workers, queries, args))
+
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'PSS MB':>10}{'speedup':>9}")
+    baseline = results[0]["requests_per_second"]
+    for row in results:
+        pss = f"{row['pss_loaded_mb']:.0f}" if row["pss_loaded_mb"] is not None else "-"
+        print(f"{row['workers']:>8}{row['requests_per_second']:>10.1f}{row['latency_ms']['p50']:>10.1f}"
+              f"{row['latency_ms']['p99']:>10.1f}{pss:>10}{row['requests_per_second'] / baseline:>8.2f}x")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"cpu_count": os.cpu_count(), "clients": args.clients, "results": results}, f, indent=2)
+    print(f"[Benchmark saved to]: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
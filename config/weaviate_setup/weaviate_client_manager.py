@@ -0,0 +1,120 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from weaviate.exceptions import WeaviateClosedClientError, WeaviateConnectionError, WeaviateGRPCUnavailableError
+from config.weaviate_setup.weaviate_cloud_conn import create_connection_with_weaviate_cloud
+
+VECTOR_BACKENDS = ("weaviate", "local")
+
+# Failures that mean the connection itself is gone; anything else (a bad filter, a slow query) leaves it be
+CONNECTION_ERRORS = (ConnectionError, WeaviateConnectionError, WeaviateClosedClientError,
+                     WeaviateGRPCUnavailableError)
+
+
+class WeaviateClientManager:
+    """Process-wide, thread-safe owner of a single long-lived Weaviate client"""
+
+    def __init__(self, connect=create_connection_with_weaviate_cloud, health_check_interval: float = 30.0,
+                 max_collections: int = 16):
+        self._connect = connect
+        self.health_check_interval = health_check_interval
+        self.max_collections = max_collections
+
+        self._client = None
+        self._last_health_check = 0.0
+        self._collections = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _open(self):
+        client = self._connect()
+        if isinstance(client, str):
+            # create_connection_with_weaviate_cloud reports failures as a message string
+            raise ConnectionError(client)
+        self._client = client
+        self._last_health_check = time.monotonic()
+        self._collections.clear()
+
+    def _is_healthy(self) -> bool:
+        try:
+            return self._client.is_ready()
+        except Exception:
+            return False
+
+    def get_client(self):
+        """Return the shared client, connecting lazily and reconnecting if it went unhealthy"""
+        with self._lock:
+            if self._client is None:
+                self._open()
+            elif time.monotonic() - self._last_health_check >= self.health_check_interval:
+                if self._is_healthy():
+                    self._last_health_check = time.monotonic()
+                else:
+                    print("[Weaviate] Connection unhealthy, reconnecting")
+                    self._close_client()
+                    self._open()
+            return self._client
+
+    def get_collection(self, name: str):
+        """Return a cached collection handle bound to the shared client"""
+        with self._lock:
+            client = self.get_client()
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = client.collections.get(name)
+                self._collections[name] = collection
+                if len(self._collections) > self.max_collections:
+                    self._collections.popitem(last=False)
+            else:
+                self._collections.move_to_end(name)
+            return collection
+
+    def invalidate(self, client=None):
+        """Drop the current connection; the next borrow reconnects.
+        
+        Given the client a failed call used, does nothing if another thread has already replaced it.
+        """
+        with self._lock:
+            if client is None or client is self._client:
+                self._close_client()
+
+    def _close_client(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception as e:
+                print(f"[Weaviate] Error while closing client: {e}")
+        self._client = None
+        self._collections.clear()
+
+    def close(self):
+        with self._lock:
+            self._close_client()
+
+
+def create_client_manager():
+    """Pick the vector backend from VECTOR_BACKEND: "weaviate" (default) or "local" (in-process)"""
+    load_dotenv()
+    backend = (os.getenv("VECTOR_BACKEND") or "weaviate").lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+    if backend == "local":
+        # Imported lazily so the Weaviate path never loads it
+        from tools.weaviate_tools.local_vector_store import LocalVectorStore
+        return LocalVectorStore(os.getenv("LOCAL_VECTOR_STORE_PATH") or "vector_store",
+                                dtype=os.getenv("LOCAL_VECTOR_STORE_DTYPE") or "float32")
+    return WeaviateClientManager()
+
+
+client_manager = create_client_manager()
+atexit.register(client_manager.close)
+
+
+def get_weaviate_client():
+    return client_manager.get_client()
+
+
+def get_weaviate_collection(name: str):
+    return client_manager.get_collection(name)
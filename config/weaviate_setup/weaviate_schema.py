@@ -17,8 +17,15 @@ activity_collection = client.collections.create(
         wvc.Property(name="TipsAndRecommendations", data_type=wvc.DataType.TEXT),
         wvc.Property(name="For", data_type=wvc.DataType.TEXT),
         wvc.Property(name="FamilyFriendly", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="Category", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="Category", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MinPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MaxPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="DurationHours", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
+    # Null state indexed so searches can keep objects whose numeric fields are unset
+    inverted_index_config=wvc.Configure.inverted_index(index_null_state=True),
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
 
@@ -34,8 +41,13 @@ restaurants_collection = client.collections.create(
         wvc.Property(name="MealDescription", data_type=wvc.DataType.TEXT),
         wvc.Property(name="AvgPricePerPersonInUSD", data_type=wvc.DataType.TEXT),
         wvc.Property(name="BudgetRange", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="Suitability", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="Suitability", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MinPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MaxPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
+    inverted_index_config=wvc.Configure.inverted_index(index_null_state=True),
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
 
@@ -48,8 +60,13 @@ dishes_collection = client.collections.create(
         wvc.Property(name="DishDetails", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Type", data_type=wvc.DataType.TEXT),
         wvc.Property(name="AvgPriceInUSD", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="BestFor", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="BestFor", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MinPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MaxPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
+    inverted_index_config=wvc.Configure.inverted_index(index_null_state=True),
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
 
@@ -61,8 +78,13 @@ accommodations_collection = client.collections.create(
         wvc.Property(name="AccommodationName", data_type=wvc.DataType.TEXT),
         wvc.Property(name="AccommodationDetails", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Type", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="AvgNightPriceInUSD", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="AvgNightPriceInUSD", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MinPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MaxPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
+    inverted_index_config=wvc.Configure.inverted_index(index_null_state=True),
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
 
@@ -79,8 +101,14 @@ transportation_collection = client.collections.create(
         wvc.Property(name="DurationInHours", data_type=wvc.DataType.TEXT),
         wvc.Property(name="PriceRangeInUSD", data_type=wvc.DataType.TEXT),
         wvc.Property(name="CostDetailsAndOptions", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="AdditionalInfo", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="AdditionalInfo", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MinPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MaxPriceInUSD", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="DurationHours", data_type=wvc.DataType.NUMBER),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
+    inverted_index_config=wvc.Configure.inverted_index(index_null_state=True),
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
 
@@ -89,7 +117,9 @@ visa_collection = client.collections.create(
     properties=[
         wvc.Property(name="Country", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Question", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="Answer", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="Answer", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
@@ -99,7 +129,9 @@ seasonal_collection = client.collections.create(
     properties=[
         wvc.Property(name="Country", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Question", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="Answer", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="Answer", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
@@ -112,7 +144,9 @@ scams_collection = client.collections.create(
         wvc.Property(name="ScamType", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Description", data_type=wvc.DataType.TEXT),
         wvc.Property(name="Location", data_type=wvc.DataType.TEXT),
-        wvc.Property(name="PreventionTips", data_type=wvc.DataType.TEXT)
+        wvc.Property(name="PreventionTips", data_type=wvc.DataType.TEXT),
+        wvc.Property(name="MongoId", data_type=wvc.DataType.TEXT, tokenization=wvc.Tokenization.FIELD),
+        wvc.Property(name="ContentHash", data_type=wvc.DataType.TEXT)
     ],
     vectorizer_config=wvc.Configure.Vectorizer.text2vec_huggingface(model="sentence-transformers/all-MiniLM-L6-v2"),
 )
@@ -1,13 +1,26 @@
 import os
 import json
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Iterator, List, Dict, Optional, Any, Tuple, get_args
 import numpy as np
 from pydantic import BaseModel, Field
-from crewai import Agent, Crew, Process, Task, LLM
-from tools.activity_seach_tool import WeaviateTool
+from config.weaviate_setup.weaviate_client_manager import client_manager
+from tools.activity_seach_tool import COLLECTION_MAP, search_collection
+from tools.weaviate_tools import vectorizer
 from tools.weaviate_tools.vectorizer import model as embedding_model
-from tools.classifier import classify_query_intent
-import google.generativeai as genai
+from tools.classifier import OLLAMA_BASE_URL, OLLAMA_MODEL_ID, classify_query_intent, prime_ollama
+from tools.embedding_classifier import get_embedding_classifier
+from tools.ranker import score_items, top_k_indices
+from tools.filter_extractor import extract_filters, extract_filters_with_confidence, filter_clause
+from tools.numeric_fields import budget_limit_usd, duration_limit_hours, parse_price_range
+from tools.query_context import QueryContext, current_query_context
+from tools.price_stats import budget_tier, price_stats
+from tools.result_cache import CachedAnswer, SemanticResultCache, snapshot_generations
+from tools.startup import StartupReport
+from tools.metrics import registry
+from tools.tracing import Trace, bind_current, current_trace, record_tokens, span, start_trace, traced
 from dotenv import load_dotenv
 
 # Output schemas
@@ -109,355 +122,708 @@ class SingleSeasonalSchema(BaseModel):
 class SeasonalOutputSchema(BaseModel):
     seasonals: List[SingleSeasonalSchema]
 
+# Per-intent field roles used for ranking and filtering
+FIELD_MAPPINGS = {
+    "restaurant": {
+        "items_key": "restaurants",
+        "key_field": "RestaurantName",
+        "desc_field": "MealDescription",
+        "price_field": "AvgPricePerPersonInUSD",
+        "type_field": "TypeOfCuisine",
+        "suitability_field": "Suitability",
+        "duration_field": None
+    },
+    "dish": {
+        "items_key": "dishes",
+        "key_field": "DishName",
+        "desc_field": "DishDetails",
+        "price_field": "AvgPriceInUSD",
+        "type_field": "Type",
+        "suitability_field": "BestFor",
+        "duration_field": None
+    },
+    "transportation": {
+        "items_key": "transportations",
+        "key_field": "TransportMode",
+        "desc_field": "RouteInfo",
+        "price_field": "PriceRangeInUSD",
+        "type_field": "TransportMode",
+        "suitability_field": None,
+        "duration_field": "DurationInHours"
+    },
+    "activity": {
+        "items_key": "activities",
+        "key_field": "Activity",
+        "desc_field": "Description",
+        "price_field": "BudgetInUSD",
+        "type_field": "Category",
+        "suitability_field": "For",
+        "duration_field": "Duration"
+    },
+    "accommodation": {
+        "items_key": "accommodations",
+        "key_field": "AccommodationName",
+        "desc_field": "AccommodationDetails",
+        "price_field": "AvgNightPriceInUSD",
+        "type_field": "Type",
+        "suitability_field": None,
+        "duration_field": None
+    },
+    "visa": {
+        "items_key": "visas",
+        "key_field": "Question",
+        "desc_field": "Answer",
+        "price_field": None,
+        "type_field": None,
+        "suitability_field": None,
+        "duration_field": None
+    },
+    "seasonal": {
+        "items_key": "seasonals",
+        "key_field": "Question",
+        "desc_field": "Answer",
+        "price_field": None,
+        "type_field": None,
+        "suitability_field": None,
+        "duration_field": None
+    }
+}
+
+# Per-intent agent settings; the crewai Agent/Task pair is built from these on first use
+AGENT_CONFIGS = {
+    "accommodation": {
+        "role": "Accommodation Retrieval Agent",
+        "goal": "Retrieve accommodations from the database",
+        "backstory": "Find information about accommodation names, details, types, and average night prices (USD)",
+        "output_schema": AccommodationOutputSchema,
+        "output_file": "accommodation_result.json"
+    },
+    "restaurant": {
+        "role": "Restaurant Retrieval Agent",
+        "goal": "Retrieve restaurants from the database",
+        "backstory": "Find restaurants based on query from the Weaviate DB",
+        "output_schema": RestaurantOutputSchema,
+        "output_file": "restaurant_result.json"
+    },
+    "visa": {
+        "role": "Visa Information Retrieval Agent",
+        "goal": "Retrieve visa and travel timing information from the database",
+        "backstory": "Find information about visa requirements and regulations for destinations",
+        "output_schema": VisaOutputSchema,
+        "output_file": "visa_result.json"
+    },
+    "seasonal": {
+        "role": "Seasonal Information Retrieval Agent",
+        "goal": "Retrieve seasonal travel information from the database",
+        "backstory": "Find information about best times to visit, peak seasons, and weather patterns",
+        "output_schema": SeasonalOutputSchema,
+        "output_file": "seasonal_result.json"
+    },
+    "dish": {
+        "role": "Dish Retrieval Agent",
+        "goal": "Retrieve local dishes from the database",
+        "backstory": "Find popular local dishes, their details, types, and pricing",
+        "output_schema": DishOutputSchema,
+        "output_file": "dish_result.json"
+    },
+    "transportation": {
+        "role": "Transportation Retrieval Agent",
+        "goal": "Retrieve transportation options from the database",
+        "backstory": "Find routes, providers, schedules, and prices for transportation",
+        "output_schema": TransportationOutputSchema,
+        "output_file": "transportation_result.json"
+    },
+    "activity": {
+        "role": "Senior RAG Retrieval Agent",
+        "goal": "Answer questions about activities in the Weaviate database",
+        "backstory": "Find travel activities from Weaviate DB",
+        "output_schema": ActivityOutputSchema,
+        "output_file": "activity_result.json"
+    }
+}
+
+GEMINI_MODEL_ID = "gemini-1.5-flash"
+
+# Filters that become hard caps in the vector search, with the cap they parse to (None for no cap).
+# In a multi-intent query each only caps the intent whose clause it came from
+SCOPED_FILTERS = {"budget": budget_limit_usd, "duration": duration_limit_hours}
+
+# Intents answered straight from the vector search when no mode is requested
+DIRECT_INTENTS = {"visa", "seasonal"}
+EXECUTION_MODES = ("agent", "direct")
+
 class AgenticRagCrew:
-    def __init__(self):
+    def __init__(self, max_parallel_intents: int = 4, intent_timeout: float = 180.0,
+                 max_results_per_intent: int = 10):
+        # Concurrency settings for multi-intent queries
+        self.max_parallel_intents = max_parallel_intents
+        self.intent_timeout = intent_timeout
+        # Items kept per intent after ranking; the search returns more so filtering has room to drop some
+        self.max_results_per_intent = max_results_per_intent
+        self._preprocess_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="preprocess")
+        
         # Load environment and set up Gemini API for filter extraction
         load_dotenv()
-        gemini_key = os.getenv('GEMINI_API_KEY')
-        genai.configure(api_key=gemini_key)
-
-        self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Initialize LLM for agents
-        self.llm = LLM(model="ollama/llama3.1:8b-instruct-q8_0", base_url="http://localhost:11434")
-        
-        # Create agents and tasks
-        self._create_agents_and_tasks()
-
-    def _create_agents_and_tasks(self):
-        """Create all agents and their associated tasks"""
-        # Define agent configurations
-        agent_configs = {
-            "accommodation": {
-                "role": "Accommodation Retrieval Agent",
-                "goal": "Retrieve accommodations from the database",
-                "backstory": "Find information about accommodation names, details, types, and average night prices (USD)",
-                "output_schema": AccommodationOutputSchema,
-                "output_file": "accommodation_result.json"
-            },
-            "restaurant": {
-                "role": "Restaurant Retrieval Agent",
-                "goal": "Retrieve restaurants from the database",
-                "backstory": "Find restaurants based on query from the Weaviate DB",
-                "output_schema": RestaurantOutputSchema,
-                "output_file": "restaurant_result.json"
-            },
-            "visa": {
-                "role": "Visa Information Retrieval Agent",
-                "goal": "Retrieve visa and travel timing information from the database",
-                "backstory": "Find information about visa requirements and regulations for destinations",
-                "output_schema": VisaOutputSchema,
-                "output_file": "visa_result.json"
-            },
-            "seasonal": {
-                "role": "Seasonal Information Retrieval Agent",
-                "goal": "Retrieve seasonal travel information from the database",
-                "backstory": "Find information about best times to visit, peak seasons, and weather patterns",
-                "output_schema": SeasonalOutputSchema,
-                "output_file": "seasonal_result.json"
-            },
-            "dish": {
-                "role": "Dish Retrieval Agent",
-                "goal": "Retrieve local dishes from the database",
-                "backstory": "Find popular local dishes, their details, types, and pricing",
-                "output_schema": DishOutputSchema,
-                "output_file": "dish_result.json"
-            },
-            "transportation": {
-                "role": "Transportation Retrieval Agent",
-                "goal": "Retrieve transportation options from the database",
-                "backstory": "Find routes, providers, schedules, and prices for transportation",
-                "output_schema": TransportationOutputSchema,
-                "output_file": "transportation_result.json"
-            },
-            "activity": {
-                "role": "Senior RAG Retrieval Agent",
-                "goal": "Answer questions about activities in the Weaviate database",
-                "backstory": "Find travel activities from Weaviate DB",
-                "output_schema": ActivityOutputSchema,
-                "output_file": "activity_result.json"
-            }
-        }
         
-        # Create agents and tasks
+        # Near-duplicate queries reuse a finished answer; QUERY_CACHE_MAX_ENTRIES=0 turns this off
+        max_cached = int(os.getenv("QUERY_CACHE_MAX_ENTRIES") or 512)
+        self.result_cache = SemanticResultCache(
+            max_entries=max_cached,
+            ttl_seconds=float(os.getenv("QUERY_CACHE_TTL_SECONDS") or 3600),
+        ) if max_cached > 0 else None
+        registry.register_collector("caches", self._cache_metrics)
+        # Budget tier cut-offs; reloaded on lookup whenever ingestion rewrites the file
+        price_stats.load()
+        # The Gemini client, the LLM and each intent's agent are created on first use (or by warm_up)
+        self._gemini_key = os.getenv('GEMINI_API_KEY')
+        self.gemini_model = None
+        if not self._gemini_key:
+            print("[Warning] GEMINI_API_KEY not set, filter extraction runs with local rules only")
+        self._llm = None
         self.agents = {}
         self.tasks = {}
+        self._agents_lock = threading.Lock()
+        self._gemini_lock = threading.Lock()
+
+    def _get_llm(self):
+        if self._llm is None:
+            from crewai import LLM
+            self._llm = LLM(model=f"ollama/{OLLAMA_MODEL_ID}", base_url=OLLAMA_BASE_URL)
+        return self._llm
+
+    def _get_task(self, intent: str):
+        """The intent's agent and task, built (and crewai imported) the first time the intent runs"""
+        task = self.tasks.get(intent)
+        if task is not None:
+            return task
+        with self._agents_lock:
+            if intent not in self.tasks:
+                from crewai import Agent, Task
+                from tools.weaviate_tool import WeaviateTool
+                config = AGENT_CONFIGS[intent]
+                
+                self.agents[intent] = Agent(
+                    role=config["role"],
+                    goal=config["goal"],
+                    backstory=config["backstory"],
+                    tools=[WeaviateTool()],
+                    verbose=True,
+                    llm=self._get_llm()
+                )
+                
+                self.tasks[intent] = Task(
+                    description=f"Retrieve {intent} data related to {{query}}. Use WeaviateTool and ensure results are specific and structured.",
+                    expected_output=f"Relevant {intent} data as JSON",
+                    output_json=config["output_schema"],
+                    output_file=os.path.join("/", config["output_file"]),
+                    agent=self.agents[intent]
+                )
+            return self.tasks[intent]
+
+    def _get_gemini_model(self):
+        if self.gemini_model is None:
+            with self._gemini_lock:
+                if self.gemini_model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self._gemini_key)
+                    self.gemini_model = genai.GenerativeModel(GEMINI_MODEL_ID)
+        return self.gemini_model
+
+    def warm_up(self, report: Optional[StartupReport] = None) -> StartupReport:
+        """Load everything the first request would otherwise wait for, with independent steps in parallel.
         
-        for agent_type, config in agent_configs.items():
-            # Create agent
-            self.agents[agent_type] = Agent(
-                role=config["role"],
-                goal=config["goal"],
-                backstory=config["backstory"],
-                tools=[WeaviateTool()],
-                verbose=True,
-                llm=self.llm
-            )
-            
-            # Create task
-            self.tasks[agent_type] = Task(
-                description=f"Retrieve {agent_type} data related to {{query}}. Use WeaviateTool and ensure results are specific and structured.",
-                expected_output=f"Relevant {agent_type} data as JSON",
-                output_json=config["output_schema"],
-                output_file=os.path.join("/", config["output_file"]),
-                agent=self.agents[agent_type]
-            )
-        
-        # Create main crew with all agents and tasks
-        self.crew = Crew(
-            agents=list(self.agents.values()),
-            tasks=list(self.tasks.values()),
-            process=Process.sequential,
-            verbose=True,
-            llm=self.llm
-        )
+        The encoder, intent classifier and Weaviate are required: without them nothing can be served.
+        Ollama and Gemini are optional, since direct mode and local filter rules work without them.
+        Agents are still built per intent on first use.
+        """
+        report = report or StartupReport()
+        steps = {
+            "embedding_model": vectorizer.warm_up,
+            "intent_classifier": get_embedding_classifier,
+            "weaviate": lambda: [client_manager.get_collection(config["name"]) for config in COLLECTION_MAP.values()],
+            "ollama": prime_ollama,
+        }
+        if self._gemini_key:
+            steps["gemini"] = self._get_gemini_model
+        report.run_parallel("warm_up", steps, optional={"ollama", "gemini"})
+        report.ready = True
+        return report
+
+    @traced("filter_extraction")
+    def extract_filters_from_query(self, query: str, local_filters: Optional[Tuple] = None) -> Dict[str, str]:
+        """Extract filters with local rules, asking Gemini only for fields the rules couldn't resolve"""
+        remote = self._extract_filters_with_gemini if self._gemini_key else None
+        filters, confidence = extract_filters(query, remote=remote, local=local_filters)
+        print(f"[Filter Confidence]: { {k: v for k, v in confidence.items() if v} }")
+        return filters
 
-    def extract_filters_from_query(self, query: str) -> Dict[str, str]:
-        """Extract filters from a query using Gemini API"""
+    @traced("gemini_filters")
+    def _extract_filters_with_gemini(self, query: str, fields: List[str]) -> Dict[str, str]:
+        """Extract only the given filter fields from a query using Gemini API"""
+        keys = ", ".join(f"'{field}'" for field in fields)
         prompt = (
-            "Analyze the following query and extract filters for budget, dietary preferences, city, type, duration, and suitability. "
-            "Return your answer as a JSON object with these keys: 'budget', 'dietary', 'city', 'type', 'duration', 'suitability'. "
+            f"Analyze the following query and extract these filters: {keys}. "
+            f"Return your answer as a JSON object with these keys: {keys}. "
             "If no filter is present, set the value to an empty string ('').\n\n"
             f"Query: {query}"
         )
         
-        response = self.gemini_model.generate_content(prompt)
+        response = self._get_gemini_model().generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        record_tokens(GEMINI_MODEL_ID, getattr(usage, "prompt_token_count", 0), getattr(usage, "candidates_token_count", 0))
+        # Gemini often wraps its JSON in a markdown code fence
+        text = response.text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
         try:
-            filters = json.loads(response.text)
+            filters = json.loads(text)
             return {k: v for k, v in filters.items() if v}  # Remove empty values
         except (json.JSONDecodeError, ValueError) as e:
             print(f"[Warning] Failed to parse filters from query: {e}")
             return {}
 
-    def run_task_by_classified_intent(self, query: str, filters: Dict[str, str] = None):
-        """Run tasks based on classified intents with ranking and filtering"""
-        # Get filters if not provided
+    def _start_preprocessing(self, query: str, filters: Dict[str, str] = None,
+                             local_filters: Optional[Tuple] = None) -> Dict[str, Future]:
+        """Submit filter extraction, intent classification and query embedding to run concurrently.
+        
+        local_filters is extract_filters_with_confidence(query) when the caller already ran the rules.
+        """
+        futures = {
+            "intents": self._preprocess_executor.submit(bind_current(classify_query_intent), query),
+            "vector": self._preprocess_executor.submit(bind_current(self._embed_query), query),
+        }
         if filters is None:
-            filters = self.extract_filters_from_query(query)
+            futures["filters"] = self._preprocess_executor.submit(bind_current(self.extract_filters_from_query),
+                                                                  query, local_filters)
+        return futures
+
+    @traced("embedding")
+    def _embed_query(self, query: str) -> np.ndarray:
+        return embedding_model.encode(query)
+
+    def _intents_from_classification(self, intent_result) -> List[str]:
+        # Convert to list of intents
+        return [intent_result.lower()] if isinstance(intent_result, str) else [i.lower() for i in intent_result]
+
+    def prepare_query_context(self, query: str, filters: Dict[str, str] = None,
+                              futures: Optional[Dict[str, Future]] = None) -> QueryContext:
+        """Extract filters, classify intent and embed the query concurrently (or collect already started futures)"""
+        futures = futures or self._start_preprocessing(query, filters)
+        
+        if "filters" in futures:
+            filters = futures["filters"].result()
         print(f"[Extracted Filters]: {filters}")
         
-        # Classify intent
-        intent_result = classify_query_intent(query)
+        intent_result = futures["intents"].result()
         print(f"[Classified Intent]: {intent_result}")
+        intents = self._intents_from_classification(intent_result)
         
-        # Convert to list of intents
-        intents = [intent_result.lower()] if isinstance(intent_result, str) else [i.lower() for i in intent_result]
-        
-        # Map intent to task
-        results = {}
+        return QueryContext(query=query, filters=filters, intents=intents, query_vector=futures["vector"].result(),
+                            filter_scopes=self._scope_filters(query, filters, self._runnable_intents(intents)))
+
+    def _scope_filters(self, query: str, filters: Dict[str, str], intents: List[str]) -> Dict[str, str]:
+        """Intent each budget/duration cap belongs to, judged by the clause it was read from.
         
+        "pasta dishes under €20" caps dishes, not the hotels asked for in the same query. A cap that
+        can't be traced to a clause (e.g. supplied by the caller or Gemini) caps no intent.
+        """
+        scopes = {}
+        for field, limit in SCOPED_FILTERS.items():
+            if len(intents) < 2 or not filters.get(field) or limit(filters[field]) is None:
+                continue
+            clause = filter_clause(query, field)
+            if not clause:
+                scopes[field] = ""
+                continue
+            classifier = get_embedding_classifier()
+            scores = dict(zip(classifier.labels, classifier.scores(clause)[0]))
+            scopes[field] = max(intents, key=lambda intent: scores.get(intent, -1.0))
+            print(f"[Filter Scope]: {field} applies to {scopes[field]} ({clause!r})")
+        return scopes
+
+    def _runnable_intents(self, intents: List[str]) -> List[str]:
+        """Keep only intents we have a task for, once each, in classification order"""
+        runnable = []
         for intent in intents:
-            task = self.tasks.get(intent)
-            if not task:
-                print(f"[Warning] Unknown intent: {intent}")
+            if intent in runnable:
                 continue
-            
-            # Run task with temporary crew
-            temp_crew = Crew(
-                agents=[task.agent],
-                tasks=[task],
-                verbose=True,
-                llm=self.llm,
-                process=Process.sequential
-            )
-            
-            output = temp_crew.kickoff(inputs={"query": query, "intent": intent})
-            raw_result = output.json_dict if hasattr(output, 'json_dict') else str(output)
-            
-            # Process results
-            if isinstance(raw_result, dict):
-                ranked_filtered_result = self._rank_and_filter_results(raw_result, query, filters, intent)
-                results[task.agent.role] = ranked_filtered_result
+            if intent in AGENT_CONFIGS:
+                runnable.append(intent)
             else:
-                results[task.agent.role] = raw_result
-        
-        if not results:
-            raise ValueError(f"No supported intents found in: {intents}")
-        
-        # Save results
+                print(f"[Warning] Unknown intent: {intent}")
+        return runnable
+
+    @traced("serialization")
+    def _save_results(self, results: Dict):
         output_file = "crew_result.json"
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=4)
         print(f"[Result saved to]: {output_file}")
+
+    def run_task_by_classified_intent(self, query: str, filters: Dict[str, str] = None, concurrent: bool = True,
+                                      mode: Optional[str] = None):
+        """Run tasks based on classified intents with ranking and filtering.
         
-        return results
-
-    def _rank_and_filter_results(self, result: Dict, query: str, filters: Dict[str, str], intent: str) -> Dict:
-        """Rank and filter results based on query and filters"""
-        # Define field mappings for different intents
-        field_mappings = {
-            "restaurant": {
-                "items_key": "restaurants",
-                "key_field": "RestaurantName",
-                "desc_field": "MealDescription",
-                "price_field": "AvgPricePerPersonInUSD",
-                "type_field": "TypeOfCuisine",
-                "suitability_field": "Suitability",
-                "duration_field": None
-            },
-            "dish": {
-                "items_key": "dishes",
-                "key_field": "DishName",
-                "desc_field": "DishDetails",
-                "price_field": "AvgPriceInUSD",
-                "type_field": "Type",
-                "suitability_field": "BestFor",
-                "duration_field": None
-            },
-            "transportation": {
-                "items_key": "transportations",
-                "key_field": "TransportMode",
-                "desc_field": "RouteInfo",
-                "price_field": "PriceRangeInUSD",
-                "type_field": "TransportMode",
-                "suitability_field": None,
-                "duration_field": "DurationInHours"
-            },
-            "activity": {
-                "items_key": "activities",
-                "key_field": "Activity",
-                "desc_field": "Description",
-                "price_field": "BudgetInUSD",
-                "type_field": "Category",
-                "suitability_field": "For",
-                "duration_field": "Duration"
-            },
-            "accommodation": {
-                "items_key": "accommodations",
-                "key_field": "AccommodationName",
-                "desc_field": "AccommodationDetails",
-                "price_field": "AvgNightPriceInUSD",
-                "type_field": "Type",
-                "suitability_field": None,
-                "duration_field": None
-            },
-            "visa": {
-                "items_key": "visas",
-                "key_field": "Question",
-                "desc_field": "Answer",
-                "price_field": None,
-                "type_field": None,
-                "suitability_field": None,
-                "duration_field": None
-            },
-            "seasonal": {
-                "items_key": "seasonals",
-                "key_field": "Question",
-                "desc_field": "Answer",
-                "price_field": None,
-                "type_field": None,
-                "suitability_field": None,
-                "duration_field": None
-            }
-        }
+        mode is "agent" (crew + LLM), "direct" (vector search only) or None to pick per intent.
+        """
+        with start_trace("query"):
+            if mode is not None and mode not in EXECUTION_MODES:
+                raise ValueError(f"Unknown execution mode: {mode}")
+        
+            # Filters, intents and the query vector don't depend on each other; the cache lookup only
+            # waits for the vector
+            local_filters = None if filters is not None else extract_filters_with_confidence(query)
+            futures = self._start_preprocessing(query, filters, local_filters)
+            lookup = self._cache_lookup(query, filters, mode, futures["vector"], local_filters)
+            if lookup["answer"] is not None:
+                self._cancel(futures)
+                return lookup["answer"].results
+        
+            context = self.prepare_query_context(query, filters, futures)
+            intents = context.intents
+            runnable = self._runnable_intents(intents)
+            generations = snapshot_generations(COLLECTION_MAP[intent]["name"] for intent in runnable)
+        
+            # Every path goes through the executor so each intent is bounded by intent_timeout;
+            # concurrent=False runs the intents one after another
+            intent_results = self._run_intents_concurrently(runnable, context, mode,
+                                                            max_workers=None if concurrent else 1)
+        
+            # Results are keyed by agent role, in classification order
+            results = {AGENT_CONFIGS[intent]["role"]: intent_results[intent] for intent in runnable}
+        
+            if not results:
+                raise ValueError(f"No supported intents found in: {intents}")
+        
+            self._save_results(results)
+            self._cache_store(lookup, CachedAnswer(runnable, context.filters, results, generations))
+            return results
+
+    def _cache_lookup(self, query: str, filters: Optional[Dict[str, str]], mode: Optional[str],
+                      vector: Future, local_filters: Optional[Tuple] = None) -> Dict:
+        """Look for a cached answer before paying for Gemini and crew runs.
+        
+        Caller-supplied filters key the lookup as-is; otherwise the local rule-based filters
+        (local_filters) do, since the Gemini pass is exactly what a hit should skip. When the rules leave
+        fields for Gemini to resolve (e.g. a city they don't know), the local filters aren't the final
+        ones and the query isn't cached at all: "things to do in Interlaken" must not be served
+        Zermatt's answer. `vector` is the preprocessing embedding future.
+        """
+        lookup = {"answer": None, "cacheable": False}
+        if self.result_cache is None:
+            return lookup
         
+        with span("cache_lookup") as record:
+            if filters is None:
+                filters, _, unresolved = local_filters
+                if unresolved and self._gemini_key:
+                    record["skipped"] = ",".join(unresolved)
+                    return lookup
+            lookup["cacheable"] = True
+            lookup["vector"] = vector.result()
+            lookup["filters"] = filters
+            lookup["scope"] = mode or "auto"
+            lookup["answer"] = self.result_cache.get(lookup["vector"], lookup["filters"], scope=lookup["scope"])
+            record["hit"] = lookup["answer"] is not None
+        if lookup["answer"] is not None:
+            print(f"[Cache hit]: {query}")
+        return lookup
+
+    @staticmethod
+    def _cancel(futures: Dict[str, Future]):
+        # A cache hit needs none of the preprocessing; whatever already started finishes in the background
+        for future in futures.values():
+            future.cancel()
+
+    def _cache_metrics(self):
+        """Scrape-time hit rates of the query-result and embedding caches"""
+        caches = {"embedding": embedding_model.stats()}
+        if self.result_cache is not None:
+            caches["query_result"] = self.result_cache.stats()
+        for name, help_text, stat in [("rag_cache_hits_total", "Cache hits (memory and disk)", "hits"),
+                                      ("rag_cache_misses_total", "Cache misses", "misses"),
+                                      ("rag_cache_hit_ratio", "Hits over lookups since start", "hit_rate"),
+                                      ("rag_cache_entries", "Entries held in memory", "entries")]:
+            type_name = "counter" if name.endswith("_total") else "gauge"
+            samples = {}
+            for cache, stats in caches.items():
+                value = stats[stat] + (stats.get("disk_hits", 0) if stat == "hits" else 0)
+                samples[(("cache", cache),)] = value
+            yield name, help_text, type_name, samples
+
+    def _cache_store(self, lookup: Dict, answer: CachedAnswer):
+        # Partial answers (failed or timed-out intents) are not worth repeating
+        if not lookup["cacheable"] or any(
+                isinstance(result, dict) and "error" in result for result in answer.results.values()):
+            return
+        self.result_cache.put(lookup["vector"], lookup["filters"], answer, scope=lookup["scope"])
+
+    def stream_task_by_classified_intent(self, query: str, filters: Dict[str, str] = None,
+                                         mode: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """Same pipeline as run_task_by_classified_intent, yielding (event, data) as each stage finishes.
+        
+        Events: "intents" and "filters" (whichever is ready first), one "result" per intent in completion
+        order, then "done" with every result keyed by agent role.
+        """
+        if mode is not None and mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        
+        # Consecutive steps of the stream may run on different threads, so the trace is passed along
+        # explicitly instead of being activated for the whole generator
+        trace = Trace("query_stream").start()
+        status = "error"
+        try:
+            yield from self._stream_stages(query, filters, mode, trace)
+            status = "ok"
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        finally:
+            trace.finish(status)
+
+    def _stream_stages(self, query: str, filters: Optional[Dict[str, str]], mode: Optional[str],
+                       trace: Trace) -> Iterator[Tuple[str, Any]]:
+        local_filters = None if filters is not None else extract_filters_with_confidence(query)
+        futures = trace.bind(self._start_preprocessing)(query, filters, local_filters)
+        lookup = trace.bind(self._cache_lookup)(query, filters, mode, futures["vector"], local_filters)
+        answer = lookup["answer"]
+        if answer is not None:
+            self._cancel(futures)
+            yield "intents", answer.intents
+            yield "filters", answer.filters
+            for intent in answer.intents:
+                role = AGENT_CONFIGS[intent]["role"]
+                yield "result", {"intent": intent, "agent": role, "result": answer.results[role]}
+            yield "done", answer.results
+            return
+        
+        stages = {futures["intents"]: "intents"}
+        if "filters" in futures:
+            stages[futures["filters"]] = "filters"
+        else:
+            yield "filters", filters
+        
+        runnable = []
+        for future in as_completed(stages):
+            if stages[future] == "filters":
+                filters = future.result()
+                print(f"[Extracted Filters]: {filters}")
+                yield "filters", filters
+            else:
+                intent_result = future.result()
+                print(f"[Classified Intent]: {intent_result}")
+                intents = self._intents_from_classification(intent_result)
+                runnable = self._runnable_intents(intents)
+                yield "intents", runnable
+        
+        if not runnable:
+            raise ValueError(f"No supported intents found in: {intents}")
+        
+        context = QueryContext(query=query, filters=filters, intents=intents, query_vector=futures["vector"].result(),
+                               filter_scopes=self._scope_filters(query, filters, runnable))
+        generations = snapshot_generations(COLLECTION_MAP[intent]["name"] for intent in runnable)
+        intent_results = {}
+        for intent, intent_result in self._iter_intent_results(runnable, context, mode, trace=trace):
+            intent_results[intent] = intent_result
+            yield "result", {"intent": intent, "agent": AGENT_CONFIGS[intent]["role"], "result": intent_result}
+        
+        # Same keys and order as run_task_by_classified_intent
+        results = {AGENT_CONFIGS[intent]["role"]: intent_results[intent] for intent in runnable}
+        self._save_results(results)
+        self._cache_store(lookup, CachedAnswer(runnable, filters, results, generations))
+        yield "done", results
+
+    def _run_intent(self, intent: str, context: QueryContext, mode: Optional[str] = None):
+        """Run a single intent in the requested (or default) execution mode"""
+        if mode is None:
+            mode = "direct" if intent in DIRECT_INTENTS else "agent"
+        
+        with span("intent", intent=intent, mode=mode):
+            if mode == "direct":
+                return self._run_intent_direct(intent, context)
+            return self._run_intent_with_agent(intent, context)
+
+    def _run_intent_direct(self, intent: str, context: QueryContext) -> Dict:
+        """Map vector search hits straight onto the intent's output schema, skipping the LLM"""
+        output_schema = AGENT_CONFIGS[intent]["output_schema"]
+        items_key = FIELD_MAPPINGS[intent]["items_key"]
+        item_schema = get_args(output_schema.model_fields[items_key].annotation)[0]
+        
+        filters = context.filters_for(intent)
+        hits = search_collection(context.query, intent, query_vector=context.query_vector, filters=filters)
+        items = [
+            item_schema(**{
+                field: "" if hit.get(field) is None else str(hit.get(field))
+                for field in item_schema.model_fields
+            })
+            for hit in hits
+        ]
+        raw_result = output_schema(**{items_key: items}).model_dump()
+        return self._rank_and_filter_results(raw_result, context.query, filters, intent,
+                                             top_k=self.max_results_per_intent, query_vector=context.query_vector)
+
+    def _run_intent_with_agent(self, intent: str, context: QueryContext):
+        """Run a single intent's task with a temporary crew and rank its output"""
+        from crewai import Crew, Process
+        task = self._get_task(intent)
+        
+        # Run task with temporary crew
+        temp_crew = Crew(
+            agents=[task.agent],
+            tasks=[task],
+            verbose=True,
+            llm=self._get_llm(),
+            process=Process.sequential
+        )
+        
+        # Lets WeaviateTool pick up the precomputed query vector
+        token = current_query_context.set(context)
+        try:
+            with span("crew_kickoff", intent=intent) as record:
+                output = temp_crew.kickoff(inputs={"query": context.query, "intent": intent})
+                # crewai sums usage over every LLM call the agent made, tool-use iterations included
+                usage = getattr(output, "token_usage", None)
+                if usage is not None:
+                    record["llm_requests"] = usage.successful_requests
+                    record_tokens(OLLAMA_MODEL_ID, usage.prompt_tokens, usage.completion_tokens,
+                                  requests=usage.successful_requests)
+        finally:
+            current_query_context.reset(token)
+        raw_result = output.json_dict if hasattr(output, 'json_dict') else str(output)
+        
+        # Process results
+        if isinstance(raw_result, dict):
+            return self._rank_and_filter_results(raw_result, context.query, context.filters_for(intent), intent,
+                                                 top_k=self.max_results_per_intent,
+                                                 query_vector=context.query_vector)
+        return raw_result
+
+    def _run_intents_concurrently(self, intents: List[str], context: QueryContext, mode: Optional[str] = None,
+                                  max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Run intents in a thread pool, each bounded by its own timeout"""
+        return dict(self._iter_intent_results(intents, context, mode, max_workers=max_workers))
+
+    def _iter_intent_results(self, intents: List[str], context: QueryContext, mode: Optional[str] = None,
+                             trace: Optional[Trace] = None, max_workers: Optional[int] = None
+                             ) -> Iterator[Tuple[str, Any]]:
+        """Yield (intent, result) in completion order; failures and timeouts come back as {"error": ...}.
+        
+        Up to max_workers (default max_parallel_intents) intents run at once.
+        """
+        if not intents:
+            return
+        started_at = {}
+        trace = trace or current_trace.get()
+        
+        def run(intent):
+            started_at[intent] = time.monotonic()
+            return self._run_intent(intent, context, mode)
+        
+        if trace is not None:
+            run = trace.bind(run)
+        
+        limit = min(max_workers or self.max_parallel_intents, len(intents))
+        # A thread per intent: a timed-out crew keeps its thread but gives up its slot, so it can't
+        # hold back the intents queued behind it
+        executor = ThreadPoolExecutor(max_workers=len(intents))
+        queued = list(intents)
+        futures = {}
+        pending = set()
+        
+        def submit_queued():
+            while queued and len(pending) < limit:
+                intent = queued.pop(0)
+                future = executor.submit(run, intent)
+                futures[future] = intent
+                pending.add(future)
+        
+        try:
+            submit_queued()
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    intent = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[Warning] Intent '{intent}' failed: {e}")
+                        result = {"error": str(e)}
+                    yield intent, result
+                
+                # The timeout clock starts when the intent actually starts running
+                now = time.monotonic()
+                for future in list(pending):
+                    intent = futures[future]
+                    if intent in started_at and now - started_at[intent] > self.intent_timeout:
+                        print(f"[Warning] Intent '{intent}' timed out after {self.intent_timeout}s")
+                        pending.discard(future)
+                        yield intent, {"error": f"Timed out after {self.intent_timeout}s"}
+                submit_queued()
+        finally:
+            # Don't block on timed-out crews (or a consumer that stopped listening); they finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @traced("ranking")
+    def _rank_and_filter_results(self, result: Dict, query: str, filters: Dict[str, str], intent: str,
+                                 top_k: Optional[int] = None, query_vector: Optional[np.ndarray] = None) -> Dict:
+        """Rank and filter results based on query and filters, keeping the top_k best (all when None)"""
         # Get field mapping for current intent
-        mapping = field_mappings.get(intent)
+        mapping = FIELD_MAPPINGS.get(intent)
         if not mapping or mapping["items_key"] not in result:
             return result
         
         items = result[mapping["items_key"]]
-        key_field = mapping["key_field"]
-        desc_field = mapping["desc_field"]
         price_field = mapping["price_field"]
-        type_field = mapping["type_field"]
-        suitability_field = mapping["suitability_field"]
-        duration_field = mapping["duration_field"]
         
-        # 1. Rank by similarity
-        query_embedding = embedding_model.encode(query.lower())
-        
-        def calculate_similarity(item):
-            item_text = f"{item.get(key_field, '')} {item.get(desc_field, '')}".lower()
-            item_embedding = embedding_model.encode(item_text)
-            similarity = np.dot(query_embedding, item_embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(item_embedding)
-            )
-            return similarity if not np.isnan(similarity) else 0.0
-        
-        ranked_items = sorted(items, key=calculate_similarity, reverse=True)
-        filtered_items = ranked_items
+        # 1. Score every item in one batched pass (query, type and suitability similarity)
+        scores = score_items(
+            items,
+            query,
+            key_field=mapping["key_field"],
+            desc_field=mapping["desc_field"],
+            filters=filters,
+            encoder=embedding_model,
+            type_field=mapping["type_field"],
+            suitability_field=mapping["suitability_field"],
+            query_vector=query_vector,
+        )
+        keep = np.ones(len(items), dtype=bool)
         
         # 2. Apply filters
-        # City filter
-        if "city" in filters:
-            city_filter = filters["city"].lower()
-            filtered_items = [item for item in filtered_items if item.get("City", "").lower() == city_filter]
-        
-        # Budget filter
-        if "budget" in filters and price_field:
-            budget_value = filters["budget"].lower()
+        # City/country are applied inside the vector search (search_collection), which widens to the
+        # country and then every location when the city is too sparse, so they are not re-checked here
+        
+        # Budget tier filter; numeric budgets and durations were applied inside the vector search
+        tier = budget_tier(filters.get("budget")) if price_field else None
+        if tier:
             try:
-                # Calculate price statistics
-                prices = []
-                for item in items:
-                    if item.get(price_field):
-                        # Handle various price formats
-                        price_str = str(item.get(price_field)).replace('$', '').replace('~', '')
-                        try:
-                            if '-' in price_str:  # Handle ranges
-                                price_str = price_str.split('-')[0]
-                            prices.append(float(price_str))
-                        except ValueError:
-                            continue
+                item_prices = np.array([self._extract_price(item.get(price_field, float('inf'))) for item in items])
+                # Terciles precomputed over the collection (per city where there is enough data),
+                # falling back to the spread of this result set when no statistics exist yet
+                bounds = price_stats.tier_bounds(COLLECTION_MAP[intent]["name"], filters.get("city"))
+                if bounds is None:
+                    prices = item_prices[np.isfinite(item_prices)]
+                    if prices.size:
+                        price_mean = np.mean(prices)
+                        price_std = np.std(prices) or 1.0
+                        bounds = (price_mean - price_std, price_mean + price_std)
                 
-                if prices:
-                    price_mean = np.mean(prices)
-                    price_std = np.std(prices) or 1.0
-                    
-                    # Apply budget filter
-                    if budget_value in ["low", "cheap", "affordable"]:
-                        threshold = price_mean - price_std
-                        filtered_items = [
-                            item for item in filtered_items 
-                            if self._extract_price(item.get(price_field, float('inf'))) <= threshold
-                        ]
-                    elif budget_value in ["medium", "moderate"]:
-                        threshold_low = price_mean - price_std
-                        threshold_high = price_mean + price_std
-                        filtered_items = [
-                            item for item in filtered_items
-                            if threshold_low <= self._extract_price(item.get(price_field, float('inf'))) <= threshold_high
-                        ]
-                    elif budget_value in ["high", "expensive", "luxury"]:
-                        threshold = price_mean + price_std
-                        filtered_items = [
-                            item for item in filtered_items 
-                            if self._extract_price(item.get(price_field, float('inf'))) >= threshold
-                        ]
+                if bounds is not None:
+                    low, high = bounds
+                    if tier == "low":
+                        keep &= item_prices <= low
+                    elif tier == "medium":
+                        keep &= (item_prices >= low) & (item_prices <= high)
+                    elif tier == "high":
+                        keep &= np.isfinite(item_prices) & (item_prices >= high)
             except Exception as e:
                 print(f"[Warning] Error in budget filtering: {e}")
         
-        # Apply remaining filters if needed (simplified implementation)
-        for filter_name, field in [
-            ("type", type_field),
-            ("suitability", suitability_field)
-        ]:
-            if filter_name in filters and field:
-                filter_embedding = embedding_model.encode(filters[filter_name].lower())
-                
-                # Sort by similarity to filter
-                def get_field_similarity(item):
-                    field_text = str(item.get(field, "")).lower()
-                    field_embedding = embedding_model.encode(field_text)
-                    sim = np.dot(filter_embedding, field_embedding) / (
-                        np.linalg.norm(filter_embedding) * np.linalg.norm(field_embedding)
-                    )
-                    return sim if not np.isnan(sim) else 0.0
-                
-                filtered_items = sorted(filtered_items, key=get_field_similarity, reverse=True)
+        # 3. Pick the best-scoring survivors
+        candidates = np.flatnonzero(keep)
+        order = candidates[top_k_indices(scores[candidates], top_k)]
         
-        return {mapping["items_key"]: filtered_items}
+        return {mapping["items_key"]: [items[i] for i in order]}
     
     def _extract_price(self, price_value):
-        """Extract numeric price from various formats"""
-        if isinstance(price_value, (int, float)):
-            return float(price_value)
-        
-        price_str = str(price_value).replace('$', '').replace('~', '')
-        try:
-            if '-' in price_str:  # Handle ranges
-                price_str = price_str.split('-')[0]
-            return float(price_str)
-        except ValueError:
-            return float('inf')  # Default to infinity if can't parse
+        """Extract numeric price from various formats (lower end of a range)"""
+        low, _ = parse_price_range(price_value)
+        return float('inf') if low is None else low  # Default to infinity if can't parse
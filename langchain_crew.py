@@ -5,16 +5,14 @@ from pydantic import BaseModel, Field
 from langchain_ollama.llms import OllamaLLM
 from langchain.agents import Tool, create_react_agent, AgentExecutor
 from langchain.prompts import PromptTemplate
-from config.weaviate_setup.weaviate_cloud_conn import create_connection_with_weaviate_cloud
+from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
 from tools.weaviate_tools.vectorizer import model
 
 # Custom Weaviate search tool
 def weaviate_search(query: str) -> str:
     """Search the Weaviate vector database for travel activities or restaurants based on the query."""
-    client = create_connection_with_weaviate_cloud()
-
     if "restaurant" in query.lower():
-        collection = client.collections.get("Restaurants")
+        collection = get_weaviate_collection("Restaurants")
         return_properties = [
             "country", "city", "restaurant_name", "type_of_cuisine", "meals_served",
             "recommended_dish", "meal_description", "avg_price_per_person",
@@ -22,7 +20,7 @@ def weaviate_search(query: str) -> str:
         ]
         key = "restaurants"
     else:
-        collection = client.collections.get("Activity")
+        collection = get_weaviate_collection("Activity")
         return_properties = [
             "country", "city", "activity", "description", "typeOfTraveler", "duration",
             "budgetInUSD", "budgetDetails", "tipsAndRecommendations", "for", "familyFriendly", "category"
@@ -38,7 +36,6 @@ def weaviate_search(query: str) -> str:
     )
 
     results = [obj.properties for obj in response.objects]
-    client.close()
     return json.dumps({key: results})
 
 weaviate_tool = Tool(
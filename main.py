@@ -1,44 +1,196 @@
-import nest_asyncio
-from fastapi import FastAPI, Query
-from fastapi.responses import FileResponse
+import time
+_import_started = time.perf_counter()
+
+import argparse
+import atexit
+import gc
+import json
+import subprocess
+import sys
+import threading
+from contextlib import asynccontextmanager
+from typing import Callable, Optional, Sequence
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pyngrok import ngrok
 import uvicorn
 from crew import AgenticRagCrew
+from tools.startup import StartupReport
+from tools.metrics import CONTENT_TYPE, registry
+from tools.tracing import start_trace
+from tools.weaviate_tools import vectorizer
+from tools.weaviate_tools.embedding_server import DEFAULT_SOCKET_PATH
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+# The ngrok URL index.html was written against
+INDEX_HTML_PLACEHOLDER_URL = "https://388d-34-125-10-21.ngrok-free.app"
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def open_ngrok_tunnel(port: int) -> str:
+    from pyngrok import ngrok
+    public_url = ngrok.connect(port).public_url
+    print(f" Open the HTML UI here: {public_url}")
+    return public_url
+
+def patch_index_html(public_url: str, path: str = "index.html"):
+    with open(path, "r") as f:
+        html = f.read().replace(INDEX_HTML_PLACEHOLDER_URL, public_url)
+    with open(path, "w") as f:
+        f.write(html)
+
+def ngrok_hook(port: int) -> Callable[[], None]:
+    """Launcher hook: expose the server through ngrok and point index.html at the tunnel"""
+    return lambda: patch_index_html(open_ngrok_tunnel(port))
+
+def start_embedding_server(socket_path: str) -> subprocess.Popen:
+    """Sibling process holding the only copy of the model; this process and its workers become its clients"""
+    server = subprocess.Popen([sys.executable, "-m", "tools.weaviate_tools.embedding_server", "--socket", socket_path])
+    atexit.register(server.terminate)
+    vectorizer.use_embedding_server(socket_path)
+    return server
+
+def create_app(crew: Optional[AgenticRagCrew] = None, preload_model: bool = True,
+               startup_hooks: Sequence[Callable[[], None]] = ()) -> FastAPI:
+    """Build the API without side effects beyond loading the embedding weights.
+    
+    Safe to import under multi-worker servers: with gunicorn --preload the factory runs once in the
+    parent, so the weights are shared copy-on-write by every forked worker, while connections, thread
+    pools and the warm-up forward pass are created per worker after the fork. `startup_hooks` run in
+    each process as it starts serving, so per-server work like the ngrok tunnel belongs in the launcher.
+    """
+    startup = StartupReport()
+    startup.record("imports", IMPORT_SECONDS)
+    
+    if preload_model:
+        with startup.phase("preload_model"):
+            vectorizer.preload()
+    
+    if crew is None:
+        with startup.phase("crew"):
+            crew = AgenticRagCrew()
+    
+    def warm_up():
+        crew.warm_up(startup)
+        print(startup.summary())
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        for hook in startup_hooks:
+            hook()
+        # Requests are served while warming up (they load what they need lazily); /healthz reports ready after
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+        yield
+    
+    app = FastAPI(lifespan=lifespan)
+    app.state.crew = crew
+    app.state.startup = startup
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    @app.get("/")
+    def serve_html():
+        return FileResponse("index.html")
+
+    @app.get("/api/{any_agent}")  
+    def run_agent(any_agent: str, response: Response, query: str = Query(...), mode: Optional[str] = Query(None)):
+        with start_trace("query") as trace:
+            response.headers["X-Trace-Id"] = trace.trace_id
+            try:
+                # filters = crew.extract_filters_from_query(query)
+                result = crew.run_task_by_classified_intent(query, mode=mode)
+                return result
+            except Exception as e:
+                return {"error": str(e)}
+
+    @app.get("/healthz")
+    def healthz():
+        """Readiness: 200 once the required warm-up steps succeeded, 503 while warming up or if one failed.
+        
+        Failed optional steps (Ollama, Gemini) are listed under startup.warnings without changing the status.
+        """
+        status = "ready" if startup.healthy else ("warming_up" if not startup.ready else "degraded")
+        return JSONResponse({"status": status, "startup": startup.as_dict()}, status_code=200 if startup.healthy else 503)
+
+    @app.get("/metrics")
+    def metrics():
+        """Prometheus scrape: stage latency histograms, in-flight stages, LLM tokens and cache hit rates"""
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/api/{any_agent}/stream")
+    async def stream_agent(any_agent: str, request: Request, query: str = Query(...), mode: Optional[str] = Query(None)):
+        """Server-Sent Events: intents, filters, then each intent's result as soon as it is ready"""
+        async def events():
+            stages = crew.stream_task_by_classified_intent(query, mode=mode)
+            try:
+                # The crew pipeline blocks, so each step runs in the threadpool instead of the event loop
+                async for event, data in iterate_in_threadpool(stages):
+                    yield sse_event(event, data)
+                    if await request.is_disconnected():
+                        break
+            except Exception as e:
+                yield sse_event("error", {"error": str(e)})
+            finally:
+                stages.close()
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    return app
+
+def serve_with_gunicorn(host: str, port: int, workers: int):
+    """Pre-fork server: the app (and the embedding weights) load in the parent, then workers fork"""
+    from gunicorn.app.base import BaseApplication
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", True)
+            # Crew runs can take minutes
+            self.cfg.set("timeout", 600)
+
+        def load(self):
+            app = create_app()
+            # Runs in the parent before the fork: objects allocated so far are never collected, so the
+            # workers' collectors won't write to (and copy) their pages
+            gc.collect()
+            gc.freeze()
+            return app
+
+    PreloadedApplication().run()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the travel RAG API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="More than 1 serves through gunicorn with preloading")
+    parser.add_argument("--no-ngrok", action="store_true", help="Don't open an ngrok tunnel or rewrite index.html")
+    parser.add_argument("--embedding-server", nargs="?", const=DEFAULT_SOCKET_PATH, metavar="SOCKET",
+                        help="Encode in one batching embedding server process shared by all workers")
+    args = parser.parse_args()
+
+    if args.embedding_server:
+        start_embedding_server(args.embedding_server)
+
+    hooks = [] if args.no_ngrok else [ngrok_hook(args.port)]
+    if args.workers > 1:
+        # One tunnel for the whole server, opened by the launcher rather than by every worker
+        for hook in hooks:
+            hook()
+        serve_with_gunicorn(args.host, args.port, args.workers)
+    else:
+        import nest_asyncio
+        nest_asyncio.apply()
+        uvicorn.run(create_app(startup_hooks=hooks), host=args.host, port=args.port)
 
-nest_asyncio.apply()
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-crew = AgenticRagCrew()
-
-@app.get("/")
-def serve_html():
-    return FileResponse("index.html")
-
-@app.get("/api/{any_agent}")  
-def run_agent(any_agent: str, query: str = Query(...)):
-    try:
-        # filters = crew.extract_filters_from_query(query)
-        result = crew.run_task_by_classified_intent(query)
-        return result
-    except Exception as e:
-        return {"error": str(e)}
-
-tunnel = ngrok.connect(8000)
-public_url = tunnel.public_url
-print(f" Open the HTML UI here: {public_url}")
-
-with open("index.html", "r") as f:
-    html = f.read().replace("https://388d-34-125-10-21.ngrok-free.app", public_url)
-
-with open("index.html", "w") as f:
-    f.write(html)
-
-uvicorn.run(app, port=8000)
+if __name__ == "__main__":
+    main()
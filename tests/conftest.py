@@ -0,0 +1,36 @@
+import zlib
+import numpy as np
+import pytest
+
+
+class HashingEncoder:
+    """Deterministic stand-in for MiniLM: each word maps to a fixed random vector, a text to their sum.
+
+    Texts sharing words come out similar, which is all the retrieval and caching code relies on.
+    """
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+        self.calls = []
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in text.lower().split():
+            vector += np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(self.dimensions)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, **kwargs):
+        self.calls.append(sentences)
+        if isinstance(sentences, str):
+            return self._vector(sentences)
+        vectors = [self._vector(text) for text in sentences]
+        return np.stack(vectors) if vectors else np.empty((0, self.dimensions), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimensions
+
+
+@pytest.fixture
+def encoder():
+    return HashingEncoder()
@@ -0,0 +1,100 @@
+import pytest
+from tools import activity_seach_tool
+from tools.activity_seach_tool import search_collection
+from tools.numeric_fields import MIN_PRICE_PROPERTY
+from tools.weaviate_tools.local_vector_store import LocalVectorStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalVectorStore(str(tmp_path))
+    monkeypatch.setattr(activity_seach_tool, "client_manager", store)
+    return store
+
+
+def add(store, collection, encoder, rows):
+    store.get_collection(collection).upsert([(None, row, encoder.encode(text)) for text, row in rows])
+
+
+def search(encoder, query, intent, **kwargs):
+    return search_collection(query, intent, certainty=0.0, query_vector=encoder.encode(query), **kwargs)
+
+
+def test_visa_and_seasonal_ignore_the_location_filter(store, encoder):
+    # Their "Country" property holds the topic, so filtering it on "Italy" would drop every row
+    for collection in ("Visa", "Seasonal"):
+        add(store, collection, encoder, [
+            ("schengen visa requirements", {"Country": "Requirements", "Question": "Do I need a visa?", "Answer": "Yes"}),
+            ("transit visa rules", {"Country": "Transit Visas", "Question": "Transit?", "Answer": "No"}),
+        ])
+
+    filters = {"city": "Rome", "country": "Italy"}
+    assert len(search(encoder, "visa requirements", "visa", filters=filters)) == 2
+    assert len(search(encoder, "best season", "seasonal", filters=filters)) == 2
+
+
+def test_city_results_come_first_then_country_then_everywhere(store, encoder):
+    add(store, "Activity", encoder, [
+        ("rome walking tour", {"Activity": "Walking tour", "City": "Rome", "Country": "Italy"}),
+        ("florence walking tour", {"Activity": "Uffizi", "City": "Florence", "Country": "Italy"}),
+        ("cairo walking tour", {"Activity": "Old Cairo", "City": "Cairo", "Country": "Egypt"}),
+    ])
+
+    hits = search(encoder, "walking tour", "activity", filters={"city": "Rome"}, min_city_hits=3)
+    assert [hit["City"] for hit in hits] == ["Rome", "Florence", "Cairo"]
+
+    hits = search(encoder, "walking tour", "activity", filters={"city": "Rome"}, min_city_hits=2)
+    assert [hit["City"] for hit in hits] == ["Rome", "Florence"]
+
+
+def test_enough_city_hits_stop_the_widening(store, encoder):
+    add(store, "Activity", encoder, [
+        ("rome walking tour", {"Activity": "Walking tour", "City": "Rome", "Country": "Italy"}),
+        ("florence walking tour", {"Activity": "Uffizi", "City": "Florence", "Country": "Italy"}),
+    ])
+    hits = search(encoder, "walking tour", "activity", filters={"city": "Rome"}, min_city_hits=1)
+    assert [hit["City"] for hit in hits] == ["Rome"]
+
+
+def test_range_caps_keep_unparsed_prices(store, encoder):
+    add(store, "Dishes", encoder, [
+        ("carbonara pasta", {"DishName": "Carbonara", "City": "Rome", MIN_PRICE_PROPERTY: 15.0}),
+        ("truffle pasta", {"DishName": "Truffle pasta", "City": "Rome", MIN_PRICE_PROPERTY: 60.0}),
+        ("cacio e pepe pasta", {"DishName": "Cacio e pepe", "City": "Rome", MIN_PRICE_PROPERTY: None}),
+    ])
+    hits = search(encoder, "pasta", "dish", filters={"budget": "under 22 USD"}, min_city_hits=0)
+    assert {hit["DishName"] for hit in hits} == {"Carbonara", "Cacio e pepe"}
+
+
+class BrokenClientManager:
+    def __init__(self, error):
+        self.error = error
+        self.client = object()
+        self.invalidated = []
+
+    def get_client(self):
+        return self.client
+
+    def get_collection(self, name):
+        raise self.error
+
+    def invalidate(self, client=None):
+        self.invalidated.append(client)
+
+
+def test_connection_errors_invalidate_the_client_that_failed(monkeypatch, encoder):
+    manager = BrokenClientManager(ConnectionError("refused"))
+    monkeypatch.setattr(activity_seach_tool, "client_manager", manager)
+
+    with pytest.raises(ConnectionError):
+        search(encoder, "pasta", "dish")
+    assert manager.invalidated == [manager.client]
+
+
+def test_other_errors_keep_the_client(monkeypatch, encoder):
+    manager = BrokenClientManager(ValueError("bad filter"))
+    monkeypatch.setattr(activity_seach_tool, "client_manager", manager)
+
+    with pytest.raises(ValueError):
+        search(encoder, "pasta", "dish", filters={"budget": "under 20 USD"})
+    assert manager.invalidated == []
@@ -0,0 +1,86 @@
+import copy
+import numpy as np
+from tools.weaviate_tools.embedding_cache import CachedEncoder
+
+
+def test_repeated_texts_are_encoded_once(encoder):
+    cached = CachedEncoder(encoder, "test")
+    first = cached.encode(["rome", "paris", "rome"])
+    second = cached.encode("paris")
+
+    assert encoder.calls == [["rome", "paris"]]
+    np.testing.assert_array_equal(first[1], second)
+    np.testing.assert_array_equal(first[0], first[2])
+    assert cached.stats()["misses"] == 2
+    assert cached.stats()["hits"] == 1
+
+
+def test_cached_vectors_match_the_model(encoder):
+    cached = CachedEncoder(encoder, "test")
+    cached.encode(["cheap hotels in rome"])
+    np.testing.assert_allclose(cached.encode(["cheap hotels in rome"])[0], encoder.encode("cheap hotels in rome"))
+
+
+def test_lru_evicts_the_oldest_vector_past_max_bytes(encoder):
+    cached = CachedEncoder(encoder, "test", max_bytes=2 * encoder.dimensions * 4)
+    cached.encode(["a", "b"])
+    cached.encode("a")
+    cached.encode("c")
+
+    assert cached.stats()["entries"] == 2
+    encoder.calls.clear()
+    cached.encode(["a", "c"])
+    assert encoder.calls == []
+    cached.encode("b")
+    assert encoder.calls == [["b"]]
+
+
+def test_disk_store_is_shared_between_instances(encoder, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    expected = CachedEncoder(encoder, "test", disk_path=path).encode(["visa for italy"])
+
+    encoder.calls.clear()
+    reopened = CachedEncoder(encoder, "test", disk_path=path)
+    np.testing.assert_allclose(reopened.encode(["visa for italy"]), expected)
+    assert encoder.calls == []
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_disk_entries_are_keyed_by_model(encoder, tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEncoder(encoder, "model-a", disk_path=path).encode("rome")
+    encoder.calls.clear()
+    CachedEncoder(encoder, "model-b", disk_path=path).encode("rome")
+    assert encoder.calls == [["rome"]]
+
+
+def test_kwargs_that_change_vectors_bypass_the_cache(encoder):
+    cached = CachedEncoder(encoder, "test")
+    cached.encode("rome", normalize_embeddings=True)
+    cached.encode("rome", normalize_embeddings=True)
+    assert len(encoder.calls) == 2
+    assert cached.stats()["entries"] == 0
+
+
+def test_model_attributes_are_forwarded(encoder):
+    assert CachedEncoder(encoder, "test").get_sentence_embedding_dimension() == encoder.dimensions
+
+
+class Unloadable:
+    def __getattr__(self, name):
+        raise AssertionError(f"model touched for {name}")
+
+
+def test_copy_does_not_reach_the_model():
+    cached = CachedEncoder(Unloadable(), "test")
+    assert not hasattr(cached, "__deepcopy__")
+    assert copy.copy(cached).model_name == "test"
+
+
+def test_lazy_model_is_not_loaded_by_dunder_probes():
+    from tools.weaviate_tools.vectorizer import LazySentenceTransformer
+
+    lazy = LazySentenceTransformer("not-a-real-model")
+    assert not hasattr(lazy, "__deepcopy__")
+    copy.copy(lazy)
+    assert not lazy.loaded
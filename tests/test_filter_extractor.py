@@ -0,0 +1,94 @@
+import pytest
+from tools.filter_extractor import extract_filters, extract_filters_with_confidence, filter_clause
+
+MULTI_INTENT_QUERY = (
+    "I'm planning a 7-day trip to Italy with my vegetarian wife and two children. We need visa information, "
+    "affordable family-friendly hotels in Rome and Florence, local pasta dishes under €20, efficient "
+    "transportation between cities, and cultural activities that take less than 3 hours."
+)
+
+
+@pytest.mark.parametrize("query, tier", [
+    ("Cheap restaurants in Rome", "low"),
+    ("Luxury hotels in Cairo", "high"),
+    ("Affordable Hotels", "low"),
+    ("MODERATE prices please", "medium"),
+    ("a hostel, we're on a budget", "low"),
+])
+def test_tier_words_match_regardless_of_case(query, tier):
+    filters, confidence, _ = extract_filters_with_confidence(query)
+    assert filters["budget"] == tier
+    assert confidence["budget"] == 0.8
+
+
+def test_the_word_budget_alone_is_left_for_the_fallback():
+    filters, _, unresolved = extract_filters_with_confidence("my budget is 80")
+    assert "budget" not in filters
+    assert unresolved == ["budget"]
+
+
+@pytest.mark.parametrize("query, budget", [
+    ("Dinner for 10,50 euros", "11.55 USD"),
+    ("hotel under $1,200", "under 1200 USD"),
+    ("pasta under €20", "under 22 USD"),
+    ("tour for 40 dollars", "40 USD"),
+])
+def test_explicit_amounts_are_converted_to_usd(query, budget):
+    assert extract_filters_with_confidence(query)[0]["budget"] == budget
+
+
+def test_city_implies_its_country():
+    filters, confidence, _ = extract_filters_with_confidence("things to do in Rome")
+    assert filters["city"] == "Rome"
+    assert filters["country"] == "Italy"
+    assert confidence["country"] == 0.9
+
+
+def test_unknown_capitalized_place_is_unresolved():
+    _, _, unresolved = extract_filters_with_confidence("things to do in Interlaken")
+    assert unresolved == ["city"]
+
+
+def test_activity_length_wins_over_trip_length():
+    assert extract_filters_with_confidence(MULTI_INTENT_QUERY)[0]["duration"] == "less than 3 hours"
+
+
+def test_remote_is_only_asked_for_unresolved_fields():
+    asked = []
+
+    def remote(query, fields):
+        asked.append(fields)
+        return {"city": "Interlaken", "budget": "ignored"}
+
+    filters, confidence = extract_filters("cheap things to do in Interlaken", remote=remote)
+    assert asked == [["city"]]
+    assert filters == {"budget": "low", "city": "Interlaken"}
+    assert confidence["city"] == 0.7
+
+
+def test_remote_failure_keeps_the_local_filters():
+    def remote(query, fields):
+        raise TimeoutError("gemini down")
+
+    filters, _ = extract_filters("cheap things to do in Interlaken", remote=remote)
+    assert filters == {"budget": "low"}
+
+
+def test_reused_local_result_is_not_modified():
+    local = extract_filters_with_confidence("things to do in Interlaken")
+    filters, _ = extract_filters("things to do in Interlaken", remote=lambda q, f: {"city": "Interlaken"}, local=local)
+    assert filters["city"] == "Interlaken"
+    assert "city" not in local[0]
+
+
+def test_filter_clause_finds_the_phrase_an_amount_came_from():
+    assert filter_clause(MULTI_INTENT_QUERY, "budget") == "local pasta dishes under €20"
+    assert filter_clause(MULTI_INTENT_QUERY, "duration") == "cultural activities that take less than 3 hours"
+
+
+def test_filter_clause_keeps_amounts_with_separators_whole():
+    assert filter_clause("A suite for $1,200. Also trains", "budget") == "A suite for $1,200"
+
+
+def test_filter_clause_is_empty_without_an_amount():
+    assert filter_clause("cheap hotels", "budget") == ""
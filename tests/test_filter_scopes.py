@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+import crew as crew_module
+from tools.query_context import QueryContext
+
+# COMPLEX_QUERIES[4] in test.py
+ITALY_QUERY = (
+    "I'm planning a 7-day trip to Italy with my vegetarian wife and two children (ages 8 and 12). We need visa "
+    "information, affordable family-friendly hotels in Rome and Florence, local pasta dishes under €20, efficient "
+    "transportation between cities, seasonal events in June, and cultural activities that take less than 3 hours."
+)
+ITALY_INTENTS = ["visa", "accommodation", "dish", "transportation", "seasonal", "activity"]
+
+
+def test_unscoped_filters_apply_to_every_intent():
+    context = QueryContext(query="q", filters={"city": "Rome", "budget": "under 22 USD"})
+    assert context.filters_for("accommodation") == {"city": "Rome", "budget": "under 22 USD"}
+
+
+def test_scoped_filters_apply_to_their_intent_only():
+    context = QueryContext(query="q", filters={"city": "Rome", "budget": "under 22 USD"},
+                           filter_scopes={"budget": "dish"})
+    assert context.filters_for("dish") == {"city": "Rome", "budget": "under 22 USD"}
+    assert context.filters_for("accommodation") == {"city": "Rome"}
+
+
+def test_empty_scope_applies_to_no_intent():
+    context = QueryContext(query="q", filters={"budget": "under 22 USD"}, filter_scopes={"budget": ""})
+    assert context.filters_for("dish") == {}
+
+
+class KeywordClassifier:
+    """Scores a clause by the intent words it contains, standing in for the embedding classifier"""
+    KEYWORDS = {
+        "visa": ["visa"], "accommodation": ["hotel", "hotels", "stay"], "dish": ["dishes", "pasta"],
+        "restaurant": ["restaurants"], "transportation": ["transportation", "get"],
+        "seasonal": ["seasonal", "season"], "activity": ["activities"],
+    }
+
+    def __init__(self):
+        self.labels = list(self.KEYWORDS)
+
+    def scores(self, text):
+        words = text.lower().split()
+        return np.array([[sum(word in words for word in self.KEYWORDS[label]) for label in self.labels]], dtype=float)
+
+
+@pytest.fixture
+def crew(monkeypatch):
+    monkeypatch.setenv("QUERY_CACHE_MAX_ENTRIES", "0")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setattr(crew_module, "get_embedding_classifier", KeywordClassifier)
+    return crew_module.AgenticRagCrew()
+
+
+def test_each_cap_goes_to_the_intent_it_was_asked_for(crew):
+    filters = {"country": "Italy", "budget": "under 22 USD", "duration": "less than 3 hours"}
+    assert crew._scope_filters(ITALY_QUERY, filters, ITALY_INTENTS) == {"budget": "dish", "duration": "activity"}
+
+
+def test_single_intent_keeps_its_caps(crew):
+    assert crew._scope_filters("hotels under $100", {"budget": "under 100 USD"}, ["accommodation"]) == {}
+
+
+def test_tiers_and_stay_lengths_are_not_scoped(crew):
+    # Neither one is a cap on a numeric property, so there is nothing to scope
+    query = "a cheap hotel for 5 nights and things to do"
+    filters = {"budget": "low", "duration": "5 nights"}
+    assert crew._scope_filters(query, filters, ["accommodation", "activity"]) == {}
+
+
+def test_cap_without_a_source_clause_applies_to_no_intent(crew):
+    # e.g. passed in by the API caller rather than read from the query
+    scopes = crew._scope_filters("hotels and dishes in Rome", {"budget": "under 50 USD"}, ["accommodation", "dish"])
+    assert scopes == {"budget": ""}
+
+
+def test_direct_search_gets_the_scoped_filters(crew, monkeypatch):
+    searched = {}
+
+    def search_collection(query, intent, query_vector=None, filters=None, **kwargs):
+        searched[intent] = filters
+        return []
+
+    monkeypatch.setattr(crew_module, "search_collection", search_collection)
+    context = QueryContext(query=ITALY_QUERY, filters={"city": "Rome", "budget": "under 22 USD"},
+                           intents=["dish", "accommodation"], query_vector=np.ones(8, dtype=np.float32),
+                           filter_scopes={"budget": "dish"})
+    for intent in context.intents:
+        crew._run_intent_direct(intent, context)
+
+    assert searched == {"dish": {"city": "Rome", "budget": "under 22 USD"}, "accommodation": {"city": "Rome"}}
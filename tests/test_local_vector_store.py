@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from weaviate.classes.query import Filter
+from tools.weaviate_tools.local_vector_store import LocalVectorStore
+
+ROWS = [
+    ("00000000-0000-0000-0000-000000000001", {"Name": "Colosseum tour", "City": "Rome", "Price": 40.0}, [1.0, 0.0, 0.0]),
+    ("00000000-0000-0000-0000-000000000002", {"Name": "Uffizi visit", "City": "Florence", "Price": 25.0}, [0.8, 0.6, 0.0]),
+    ("00000000-0000-0000-0000-000000000003", {"Name": "Pyramids trip", "City": "Cairo", "Price": None}, [0.0, 1.0, 0.0]),
+    ("00000000-0000-0000-0000-000000000004", {"Name": "Nile cruise", "City": "Cairo", "Price": 120.0}, [0.0, 0.0, 1.0]),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.get_collection("Activities").upsert(ROWS)
+    return store
+
+
+def names(result):
+    return [obj.properties["Name"] for obj in result.objects]
+
+
+def search(store, vector=(1.0, 0.0, 0.0), **kwargs):
+    return store.get_collection("Activities").query.near_vector(list(vector), **kwargs)
+
+
+def test_near_vector_ranks_by_cosine_similarity(store):
+    result = search(store, return_metadata=None)
+    assert names(result) == ["Colosseum tour", "Uffizi visit", "Pyramids trip", "Nile cruise"]
+    assert result.objects[0].metadata.distance == pytest.approx(0.0, abs=1e-6)
+    assert result.objects[1].metadata.certainty == pytest.approx(0.9)
+
+
+def test_limit_offset_and_certainty(store):
+    assert names(search(store, limit=1, offset=1)) == ["Uffizi visit"]
+    assert names(search(store, certainty=0.85)) == ["Colosseum tour", "Uffizi visit"]
+    assert names(search(store, distance=0.1)) == ["Colosseum tour"]
+
+
+def test_text_equality_ignores_case(store):
+    assert names(search(store, filters=Filter.by_property("City").equal("rome"))) == ["Colosseum tour"]
+
+
+def test_any_of_and_all_of(store):
+    either = Filter.any_of([Filter.by_property("City").equal("Rome"), Filter.by_property("City").equal("Cairo")])
+    assert set(names(search(store, filters=either))) == {"Colosseum tour", "Pyramids trip", "Nile cruise"}
+
+    both = Filter.all_of([Filter.by_property("City").equal("Cairo"), Filter.by_property("Price").greater_than(100)])
+    assert names(search(store, filters=both)) == ["Nile cruise"]
+
+
+def test_range_filters_skip_unset_values(store):
+    cap = Filter.by_property("Price").less_or_equal(40)
+    assert set(names(search(store, filters=cap))) == {"Colosseum tour", "Uffizi visit"}
+
+    unset = Filter.by_property("Price").is_none(True)
+    assert names(search(store, filters=unset)) == ["Pyramids trip"]
+
+
+def test_contains_any_and_missing_properties(store):
+    cities = Filter.by_property("City").contains_any(["florence", "CAIRO"])
+    assert len(search(store, filters=cities).objects) == 3
+    assert search(store, filters=Filter.by_property("Country").equal("Italy")).objects == []
+
+
+def test_return_properties_fill_unset_with_none(store):
+    result = search(store, limit=1, return_properties=["Name", "Country"])
+    assert result.objects[0].properties == {"Name": "Colosseum tour", "Country": None}
+
+
+def test_upsert_overwrites_an_existing_uuid(store):
+    collection = store.get_collection("Activities")
+    collection.upsert([(ROWS[0][0], {"Name": "Night tour", "City": "Rome"}, [0.0, 0.0, 1.0])])
+
+    assert len(collection) == 4
+    assert names(search(store, vector=(0.0, 0.0, 1.0), limit=2)) == ["Night tour", "Nile cruise"]
+    assert search(store, vector=(0.0, 0.0, 1.0), limit=1).objects[0].properties["Price"] is None
+
+
+def test_delete_many(store):
+    collection = store.get_collection("Activities")
+    deleted = collection.data.delete_many(where=Filter.by_property("City").equal("Cairo"))
+
+    assert deleted.successful == 2
+    assert len(collection) == 2
+    assert set(names(search(store))) == {"Colosseum tour", "Uffizi visit"}
+
+
+def test_wrong_dimension_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.get_collection("Activities").upsert([(None, {"Name": "x"}, [1.0, 0.0])])
+
+
+def test_saved_collections_reload(store, tmp_path):
+    store.get_collection("Activities").data.delete_by_id(ROWS[3][0])
+    store.close()
+
+    reloaded = LocalVectorStore(str(tmp_path))
+    collection = reloaded.get_collection("Activities")
+    assert len(collection) == 3
+    assert names(search(reloaded, limit=2)) == ["Colosseum tour", "Uffizi visit"]
+    assert names(search(reloaded, filters=Filter.by_property("Price").is_none(True))) == ["Pyramids trip"]
+
+    collection.upsert([(None, {"Name": "Gelato class", "City": "Rome"}, [1.0, 0.1, 0.0])])
+    assert len(collection) == 4
+
+
+def test_unknown_collection_starts_empty(store):
+    missing = store.get_collection("Missing")
+    assert len(missing) == 0
+    assert missing.query.near_vector([1.0, 0.0, 0.0]).objects == []
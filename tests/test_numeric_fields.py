@@ -0,0 +1,60 @@
+import pytest
+from tools.numeric_fields import (USD_RATES, budget_limit_usd, duration_limit_hours, parse_amount,
+                                  parse_duration_hours, parse_price_range)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2-3 hours", 3.0), ("45 min", 0.75), ("half day", 4.0), ("one hour", 1.0), ("3", 3.0), ("2h", 2.0),
+    # Words ending in "one" aren't numbers
+    ("Done in 2 hours", 2.0), ("Someone will guide you for 3 hours", 3.0),
+    ("1 hour 30 minutes", 1.5), ("2 hours and 15 minutes", 2.25), ("30 minutes to 1 hour", 1.0),
+    ("45 minutes - 2 hours", 2.0), ("1-2 days", 48.0), ("no duration given", None), (None, None), (1.5, 1.5),
+])
+def test_parse_duration_hours(text, expected):
+    assert parse_duration_hours(text) == expected
+
+
+@pytest.mark.parametrize("amount, expected", [
+    ("50", 50.0), ("1,200", 1200.0), ("1,200.50", 1200.5), ("10.50", 10.5), ("10,50", 10.5), ("19,5", 19.5),
+])
+def test_parse_amount_tells_decimal_commas_from_thousands(amount, expected):
+    assert parse_amount(amount) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$10-20", (10.0, 20.0)),
+    ("~15", (15.0, 15.0)),
+    ("Free", (0.0, 0.0)),
+    ("1,200 USD", (1200.0, 1200.0)),
+    ("€19,50", (19.5 * USD_RATES["eur"], 19.5 * USD_RATES["eur"])),
+    ("£10-20", (10 * USD_RATES["gbp"], 20 * USD_RATES["gbp"])),
+    (25, (25.0, 25.0)),
+])
+def test_parse_price_range(text, expected):
+    assert parse_price_range(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", ["ask at the desk", "", None])
+def test_unparseable_prices_have_no_range(text):
+    assert parse_price_range(text) == (None, None)
+
+
+def test_budget_limit_is_the_upper_end_and_none_for_tiers():
+    assert budget_limit_usd("under 50 USD") == 50.0
+    assert budget_limit_usd("low") is None
+
+
+@pytest.mark.parametrize("duration, expected", [
+    ("under 3 hours", 3.0),
+    ("less than 2 hours", 2.0),
+    # Without an upper-bound qualifier the cap gets some slack
+    ("about 2 hours", 2.5),
+    ("half day", 5.0),
+])
+def test_duration_limit_hours(duration, expected):
+    assert duration_limit_hours(duration) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("stay", ["5 nights", "2 weeks", "7 days", "1-2 days"])
+def test_stay_lengths_are_never_a_duration_cap(stay):
+    assert duration_limit_hours(stay) is None
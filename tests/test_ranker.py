@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from tools.ranker import score_items, top_k_indices
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 49])
+def test_top_k_matches_a_full_sort(k):
+    scores = np.random.default_rng(k).standard_normal(50)
+    assert list(top_k_indices(scores, k)) == list(np.argsort(-scores)[:k])
+
+
+def test_top_k_returns_everything_sorted_when_k_is_none_or_large():
+    scores = np.array([0.1, 0.9, 0.5])
+    assert list(top_k_indices(scores)) == [1, 2, 0]
+    assert list(top_k_indices(scores, 10)) == [1, 2, 0]
+
+
+def test_top_k_of_zero_is_empty():
+    assert top_k_indices(np.array([0.3, 0.2]), 0).size == 0
+
+
+def test_top_k_keeps_input_order_among_ties():
+    scores = np.array([0.5, 0.9, 0.5, 0.5])
+    assert list(top_k_indices(scores)) == [1, 0, 2, 3]
+
+
+def test_score_items_ranks_the_matching_item_first_with_one_encode_call(encoder):
+    items = [
+        {"Name": "Camel ride", "Description": "desert safari at sunset"},
+        {"Name": "Pasta class", "Description": "cooking fresh pasta with a chef"},
+        {"Name": "Museum tour", "Description": "ancient history collection"},
+    ]
+    scores = score_items(items, "fresh pasta cooking", key_field="Name", desc_field="Description",
+                         filters={}, encoder=encoder)
+    assert scores.shape == (3,)
+    assert int(np.argmax(scores)) == 1
+    assert len(encoder.calls) == 1
+
+
+def test_score_items_reuses_a_precomputed_query_vector(encoder):
+    items = [{"Name": "Pasta class", "Description": "cooking"}]
+    query_vector = encoder.encode("pasta")
+    encoder.calls.clear()
+    score_items(items, "pasta", key_field="Name", desc_field="Description", filters={}, encoder=encoder,
+                query_vector=query_vector)
+    assert encoder.calls == [["pasta class cooking"]]
+
+
+def test_score_items_adds_type_similarity_when_the_filter_is_set(encoder):
+    items = [{"Name": "A", "Description": "", "Type": "seafood"}, {"Name": "A", "Description": "", "Type": "dessert"}]
+    scores = score_items(items, "a", key_field="Name", desc_field="Description", filters={"type": "seafood"},
+                         encoder=encoder, type_field="Type")
+    assert scores[0] > scores[1]
+
+
+def test_score_items_without_items_skips_the_encoder(encoder):
+    assert score_items([], "anything", key_field="Name", desc_field="Description", filters={},
+                       encoder=encoder).size == 0
+    assert encoder.calls == []
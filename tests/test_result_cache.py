@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from tools import result_cache
+from tools.result_cache import CachedAnswer, SemanticResultCache, mark_collection_changed, snapshot_generations
+
+
+@pytest.fixture(autouse=True)
+def generations_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "GENERATIONS_DIR", str(tmp_path))
+
+
+def answer(intents=("restaurant",), collections=("Restaurants",)):
+    return CachedAnswer(intents=list(intents), filters={}, results={"restaurant": "Trattoria"},
+                        generations=snapshot_generations(collections))
+
+
+def test_same_query_and_filters_hit(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta in rome"), {"city": "Rome"}, answer())
+
+    assert cache.get(encoder.encode("cheap pasta in rome"), {"city": "rome "}).results == {"restaurant": "Trattoria"}
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_filters_miss(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta"), {"city": "Rome"}, answer())
+
+    assert cache.get(encoder.encode("cheap pasta"), {"city": "Florence"}) is None
+    assert cache.get(encoder.encode("cheap pasta"), None) is None
+
+
+def test_empty_filter_values_are_ignored(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta"), {"city": "Rome", "budget": ""}, answer())
+    assert cache.get(encoder.encode("cheap pasta"), {"city": "Rome", "duration": None}) is not None
+
+
+def test_scope_separates_entries(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta"), {}, answer(), scope="stream")
+    assert cache.get(encoder.encode("cheap pasta"), {}) is None
+    assert cache.get(encoder.encode("cheap pasta"), {}, scope="stream") is not None
+
+
+def test_unrelated_query_misses(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta in rome"), {}, answer())
+    assert cache.get(encoder.encode("museum tickets cairo"), {}) is None
+
+
+def test_visa_answers_need_a_closer_match():
+    stored = np.array([1.0, 0.0], dtype=np.float32)
+    near = np.array([0.87, np.sqrt(1 - 0.87 ** 2)], dtype=np.float32)
+
+    cache = SemanticResultCache()
+    cache.put(stored, {}, answer(intents=["restaurant"]))
+    cache.put(stored, {"city": "Rome"}, answer(intents=["restaurant", "visa"]))
+    assert cache.get(near, {}) is not None
+    assert cache.get(near, {"city": "Rome"}) is None
+
+
+def test_ingestion_marker_invalidates_answers_that_read_the_collection(encoder):
+    cache = SemanticResultCache()
+    vector = encoder.encode("cheap pasta")
+    cache.put(vector, {}, answer(collections=["Restaurants"]))
+    cache.put(vector, {"city": "Rome"}, answer(collections=["Hotels"]))
+
+    mark_collection_changed("Restaurants")
+
+    assert cache.get(vector, {}) is None
+    assert cache.get(vector, {"city": "Rome"}) is not None
+    assert cache.stats()["entries"] == 1
+
+
+def test_expired_answers_are_dropped(encoder, monkeypatch):
+    cache = SemanticResultCache(ttl_seconds=60)
+    vector = encoder.encode("cheap pasta")
+    cache.put(vector, {}, answer())
+
+    later = result_cache.time.time() + 61
+    monkeypatch.setattr(result_cache.time, "time", lambda: later)
+    assert cache.get(vector, {}) is None
+
+
+def test_least_recently_used_entry_is_evicted(encoder):
+    cache = SemanticResultCache(max_entries=2)
+    queries = ["cheap pasta", "museum tickets", "desert safari"]
+    cache.put(encoder.encode(queries[0]), {}, answer())
+    cache.put(encoder.encode(queries[1]), {}, answer())
+    cache.get(encoder.encode(queries[0]), {})
+    cache.put(encoder.encode(queries[2]), {}, answer())
+
+    assert cache.get(encoder.encode(queries[0]), {}) is not None
+    assert cache.get(encoder.encode(queries[1]), {}) is None
+    assert cache.get(encoder.encode(queries[2]), {}) is not None
+
+
+def test_clear_empties_the_cache(encoder):
+    cache = SemanticResultCache()
+    cache.put(encoder.encode("cheap pasta"), {}, answer())
+    cache.clear()
+    assert cache.get(encoder.encode("cheap pasta"), {}) is None
+    assert cache.stats()["entries"] == 0
@@ -1,80 +1,173 @@
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
-from typing import Type, Optional
+from typing import Optional, List, Dict, Any
 import json
-from config.weaviate_setup.weaviate_cloud_conn import create_connection_with_weaviate_cloud
+import numpy as np
+from weaviate.classes.query import Filter
+from config.weaviate_setup.weaviate_client_manager import CONNECTION_ERRORS, client_manager
 from tools.weaviate_tools.vectorizer import model
+from tools.filter_extractor import CITY_GAZETTEER
+from tools.tracing import span
+from tools.numeric_fields import DURATION_PROPERTY, MIN_PRICE_PROPERTY, budget_limit_usd, duration_limit_hours
 
+# With fewer hits than this, the search widens from the city to the country, then to every location
+MIN_CITY_HITS = 5
 
-class WeaviateToolSchema(BaseModel):
-    query: str = Field(..., description="The query to search and retrieve relevant information.")
-    intent: str = Field(..., description="The classified agent type such as 'activity', 'dish', etc.")
 
+COLLECTION_MAP = {
+    "activity": {
+        "name": "Activity",
+        "properties": ["Country", "City", "Activity", "Description", "TypeOfTraveler", "Duration", "BudgetInUSD", "BudgetDetails", "TipsAndRecommendations", "For", "FamilyFriendly", "Category"],
+        # Filters pushed down as numeric range conditions (see tools/numeric_fields.py)
+        "range_filters": ["budget", "duration"]
+    },
+    "dish": {
+        "name": "Dishes",
+        "properties": ["Country", "City", "DishName", "DishDetails", "Type", "AvgPriceInUSD", "BestFor"],
+        "range_filters": ["budget"]
+    },
+    "restaurant": {
+        "name": "Restaurants",
+        "properties": ["Country", "City", "RestaurantName", "TypeOfCuisine", "MealsServed", "RecommendedDish", "MealDescription", "AvgPricePerPersonInUSD", "BudgetRange", "Suitability"],
+        "range_filters": ["budget"]
+    },
+    "scam": {
+        "name": "Scams",
+        "properties": ["Country", "City", "ScamType", "Description", "Location", "PreventionTips"]
+    },
+    "accommodation": {
+        "name": "Accommodations",
+        "properties": ["Country", "City", "AccommodationName", "AccommodationDetails", "Type", "AvgNightPriceInUSD"],
+        "range_filters": ["budget"]
+    },
+    "transportation": {
+        "name": "Transportation",
+        "properties": ["Country", "From", "To", "TransportMode", "Provider", "Schedule", "RouteInfo", "DurationInHours", "PriceRangeInUSD", "CostDetailsAndOptions", "AdditionalInfo"],
+        "range_filters": ["budget", "duration"],
+        # Routes match a city at either end
+        "city_properties": ["From", "To"]
+    },
+    "visa": {
+        "name": "Visa",
+        "properties": ["Country", "Question", "Answer"],
+        "city_properties": [],
+        # "Country" holds the topic ("Requirements", "Transit Visas", ...), not a place
+        "country_properties": []
+    },
+    "seasonal": {
+        "name": "Seasonal",
+        "properties": ["Country", "Question", "Answer"],
+        "city_properties": [],
+        "country_properties": []
+    }
+}
 
-class WeaviateTool(BaseTool):
-    name: str = "WeaviateTool"
-    description: str = "Search Weaviate for activities, dishes, restaurants, visa info, etc."
-    args_schema: Type[BaseModel] = WeaviateToolSchema
 
-    def _run(self, query: str, intent: str) -> str:
-        client = create_connection_with_weaviate_cloud()
-        print(f"Weaviate Query: {query}")
-        print(f"Intent: {intent}")
+def _at_most_or_unset(prop: str, limit: float):
+    # is_none needs the collection's null state indexed (index_null_state in weaviate_schema.py)
+    return Filter.any_of([Filter.by_property(prop).less_or_equal(limit), Filter.by_property(prop).is_none(True)])
 
-        collection_map = {
-            "activity": {
-                "name": "Activity",
-                "properties": ["Country", "City", "Activity", "Description", "TypeOfTraveler", "Duration", "BudgetInUSD", "BudgetDetails", "TipsAndRecommendations", "For", "FamilyFriendly", "Category"]
-            },
-            "dish": {
-                "name": "Dishes",
-                "properties": ["Country", "City", "DishName", "DishDetails", "Type", "AvgPriceInUSD", "BestFor"]
-            },
-            "restaurant": {
-                "name": "Restaurants",
-                "properties": ["Country", "City", "RestaurantName", "TypeOfCuisine", "MealsServed", "RecommendedDish", "MealDescription", "AvgPricePerPersonInUSD", "BudgetRange", "Suitability"]
-            },
-            "scam": {
-                "name": "Scams",
-                "properties": ["Country", "City", "ScamType", "Description", "Location", "PreventionTips"]
-            },
-            "accommodation": {
-                "name": "Accommodations",
-                "properties": ["Country", "City", "AccommodationName", "AccommodationDetails", "Type", "AvgNightPriceInUSD"]
-            },
-            "transportation": {
-                "name": "Transportation",
-                "properties": ["Country", "From", "To", "TransportMode", "Provider", "Schedule", "RouteInfo", "DurationInHours", "PriceRangeInUSD", "CostDetailsAndOptions", "AdditionalInfo"]
-            },
-            "visa": {
-                "name": "Visa",
-                "properties": ["Country", "Question", "Answer"]
-            },
-            "seasonal": {
-                "name": "Seasonal",
-                "properties": ["Country", "Question", "Answer"]
-            }
-        }
 
-        intent = intent.lower().strip()
-        if intent not in collection_map:
-            return json.dumps({"error": f"Unknown intent '{intent}' — no matching collection."})
+def _range_conditions(config: Dict[str, Any], filters: Dict[str, str]) -> List:
+    """Budget/duration caps as conditions on the numeric properties derived at ingest.
+    
+    Objects whose text couldn't be parsed have the property unset; they still match and are left to ranking.
+    """
+    conditions = []
+    range_filters = config.get("range_filters", [])
+    if "budget" in range_filters and filters.get("budget"):
+        # Tier words (low/medium/high) have no cap and are handled after retrieval
+        cap = budget_limit_usd(filters["budget"])
+        if cap is not None:
+            conditions.append(_at_most_or_unset(MIN_PRICE_PROPERTY, cap))
+    if "duration" in range_filters and filters.get("duration"):
+        hours = duration_limit_hours(filters["duration"])
+        if hours is not None:
+            conditions.append(_at_most_or_unset(DURATION_PROPERTY, hours))
+    return conditions
 
-        collection_name = collection_map[intent]["name"]
-        return_properties = collection_map[intent]["properties"]
 
+def _search_filter(config: Dict[str, Any], city: str = "", country: str = "", conditions: Optional[List] = None):
+    """Server-side where filter on the collection's country/city properties plus any range conditions, or None"""
+    conditions = list(conditions or [])
+    country_properties = config.get("country_properties", ["Country"])
+    if country and country_properties:
+        conditions.append(Filter.any_of([Filter.by_property(prop).equal(country) for prop in country_properties]))
+    city_properties = config.get("city_properties", ["City"])
+    if city and city_properties:
+        conditions.append(Filter.any_of([Filter.by_property(prop).equal(city) for prop in city_properties]))
+    return Filter.all_of(conditions) if conditions else None
+
+
+def _near_vector(config: Dict[str, Any], query_vector, certainty: float, limit: int, where=None):
+    with span("weaviate_search", collection=config["name"]) as record:
+        collection = client_manager.get_collection(config["name"])
+        response = collection.query.near_vector(
+            list(map(float, query_vector)),
+            certainty=certainty,
+            limit=limit,
+            filters=where,
+            return_properties=config["properties"]
+        )
+        record["hits"] = len(response.objects)
+        return [obj.properties for obj in response.objects]
+
+
+def search_collection(query: str, intent: str, certainty: float = 0.65, limit: int = 15,
+                      query_vector: Optional[np.ndarray] = None, filters: Optional[Dict[str, str]] = None,
+                      min_city_hits: int = MIN_CITY_HITS) -> List[Dict[str, Any]]:
+    """Run a near_vector search on the collection mapped to the intent and return the object properties.
+    
+    City/country and budget/duration filters are applied by Weaviate during the search. When the city
+    yields fewer than min_city_hits objects, the rest of the limit is filled from the same country, and
+    from every location if the country is still too sparse.
+    """
+    config = COLLECTION_MAP[intent]
+    if query_vector is None:
+        query_vector = model.encode(query)
+    filters = filters or {}
+    city = str(filters.get("city") or "").strip()
+    country = str(filters.get("country") or "").strip() or CITY_GAZETTEER.get(city.lower(), "")
+    if not config.get("city_properties", ["City"]):
+        city = ""
+    if not config.get("country_properties", ["Country"]):
+        country = ""
+    ranges = _range_conditions(config, filters)
+    # Narrowest first; each level only runs while the ones before it are too sparse
+    locations = [(city, country)] if city else []
+    locations += [("", country)] if country else []
+    locations.append(("", ""))
+    
+    def search(conditions: List) -> List[Dict[str, Any]]:
+        hits, seen = [], set()
+        for level, (level_city, level_country) in enumerate(locations):
+            if level:
+                narrower = locations[level - 1][0] or locations[level - 1][1]
+                print(f"[Search] {len(hits)} {config['name']} hits in {narrower}, "
+                      f"widening to {level_country or 'all locations'}")
+            where = _search_filter(config, level_city, level_country, conditions)
+            for hit in _near_vector(config, query_vector, certainty, limit, where):
+                if len(hits) >= limit:
+                    break
+                key = json.dumps(hit, sort_keys=True, default=str)
+                if key not in seen:
+                    seen.add(key)
+                    hits.append(hit)
+            if len(hits) >= min_city_hits:
+                break
+        return hits
+
+    # Other threads share this client, so only a broken connection is dropped, and only this one
+    client = client_manager.get_client()
+    try:
         try:
-            collection = client.collections.get(collection_name)
-            query_vector = model.encode(query).tolist()
-            response = collection.query.near_vector(
-                query_vector,
-                certainty=0.65,
-                limit=15,
-                return_properties=return_properties
-            )
-            rag_res = [obj.properties for obj in response.objects]
-            client.close()
-            return json.dumps({collection_name.lower(): rag_res})
+            return search(ranges)
+        except CONNECTION_ERRORS:
+            raise
         except Exception as e:
-            client.close()
-            return json.dumps({"error": str(e)})
+            if not ranges:
+                raise
+            # Collections created before index_null_state can't evaluate is_none; better uncapped than no results
+            print(f"[Warning] Range filters failed on {config['name']} ({e}); searching without them")
+            return search([])
+    except CONNECTION_ERRORS:
+        client_manager.invalidate(client)
+        raise
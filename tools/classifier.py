@@ -1,9 +1,52 @@
 import requests
 import re
+from tools.embedding_classifier import get_embedding_classifier
+from tools.tracing import record_tokens, traced
 
 OLLAMA_MODEL_ID = "llama3.1:8b-instruct-q8_0"
+OLLAMA_BASE_URL = "http://localhost:11434"
+# How long Ollama keeps the model in memory after the last request
+OLLAMA_KEEP_ALIVE = "30m"
 
-def classify_query_intent(query: str):
+# Labels match the crew's AGENT_CONFIGS keys; the LLM sometimes shortens them anyway
+_LABEL_ALIASES = {"transport": "transportation"}
+
+# Reused across calls so the LLM fallback keeps its connection to Ollama alive
+_ollama_session = requests.Session()
+
+def _format_labels(found_labels):
+    if len(found_labels) == 1:
+        return found_labels[0]
+    elif found_labels:
+        return found_labels
+    else:
+        return "unknown"
+
+def prime_ollama(keep_alive: str = OLLAMA_KEEP_ALIVE, timeout: float = 300.0):
+    """Load the model into Ollama's memory ahead of the first query; a request without a prompt only loads it"""
+    response = _ollama_session.post(f"{OLLAMA_BASE_URL}/api/generate",
+                                    json={"model": OLLAMA_MODEL_ID, "keep_alive": keep_alive}, timeout=timeout)
+    response.raise_for_status()
+
+@traced("classification")
+def classify_query_intent(query: str, use_llm_fallback: bool = True):
+    """Classify locally with the embedding classifier; ask the LLM only when it isn't confident"""
+    query = query.strip().replace("\n", " ").replace("\r", " ")
+
+    try:
+        found_labels, confidence = get_embedding_classifier().classify(query)
+    except Exception as e:
+        print(f"[Local Intent Classifier Error]: {e}")
+        found_labels, confidence = [], 0.0
+
+    if found_labels or not use_llm_fallback:
+        return _format_labels(found_labels)
+
+    print(f"[Intent Classifier]: low local confidence ({confidence:.2f}), falling back to LLM")
+    return classify_query_intent_llm(query)
+
+@traced("classification_llm")
+def classify_query_intent_llm(query: str):
     query = query.strip().replace("\n", " ").replace("\r", " ")
 
     system_prompt = (
@@ -14,7 +57,7 @@ def classify_query_intent(query: str):
         "- visa\n"
         "- scam\n"
         "- dish\n"
-        "- transport\n"
+        "- transportation\n"
         "- seasonal\n"
         "- restaurant\n\n"
         "Rules:\n"
@@ -32,22 +75,19 @@ def classify_query_intent(query: str):
     }
 
     try:
-        response = requests.post("http://localhost:11434/api/generate", json=payload)
+        response = _ollama_session.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload)
         response.raise_for_status()
 
-        raw = response.json()["response"].strip().lower()
+        body = response.json()
+        record_tokens(OLLAMA_MODEL_ID, body.get("prompt_eval_count"), body.get("eval_count"))
+        raw = body["response"].strip().lower()
         # print(f"[Classifier Raw Output]: {raw}")
 
-        valid_labels = ["activity", "accommodation", "visa", "restaurant","scam","transport","dish","seasonal"]
-        found_labels = [label.strip() for label in raw.split(",") if label.strip() in valid_labels]
-
+        valid_labels = ["activity", "accommodation", "visa", "restaurant","scam","transportation","dish","seasonal"]
+        labels = [_LABEL_ALIASES.get(label.strip(), label.strip()) for label in raw.split(",")]
+        found_labels = list(dict.fromkeys(label for label in labels if label in valid_labels))
 
-        if len(found_labels) == 1:
-            return found_labels[0]  
-        elif found_labels:
-            return found_labels     
-        else:
-            return "unknown"
+        return _format_labels(found_labels)
 
     except Exception as e:
         print(f"[Intent Classifier Error]: {e}")
@@ -0,0 +1,167 @@
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Labelled example queries per category; their normalized mean is the category centroid
+CATEGORY_EXAMPLES = {
+    "activity": [
+        "things to do in Cairo",
+        "family-friendly activities for kids",
+        "cultural activities that take less than 3 hours",
+        "best tours and sightseeing in Rome",
+        "outdoor adventures and hiking trips",
+        "museums and historical sites to visit",
+        "relaxing activities for a senior couple",
+        "what can I do in the evening in Barcelona",
+    ],
+    "accommodation": [
+        "budget hotel for 5 nights",
+        "where should we stay for under $150 per night",
+        "affordable family-friendly hotels in Florence",
+        "cheap hostels near the city center",
+        "luxury resorts with a pool",
+        "apartment rentals for a week",
+        "best place to stay near the old town",
+        "guesthouse with breakfast included",
+    ],
+    "visa": [
+        "visa information for my US passport",
+        "what visa do we need to enter Japan",
+        "do I need a visa to travel to Italy",
+        "tourist visa requirements and documents",
+        "how long can I stay without a visa",
+        "visa on arrival for Egypt",
+        "Schengen visa application process",
+        "entry requirements for travellers",
+    ],
+    "scam": [
+        "common tourist scams to avoid",
+        "is it safe to take taxis from the airport",
+        "how to avoid being ripped off by street vendors",
+        "pickpockets and fraud near tourist attractions",
+        "fake tour guides and ticket scams",
+        "safety tips against tourist traps",
+        "overcharging scams at restaurants",
+        "what frauds target travelers in Cairo",
+    ],
+    "dish": [
+        "authentic local dishes to try",
+        "quick seafood dishes in Barcelona",
+        "local pasta dishes under 20 euros",
+        "traditional food I must taste",
+        "famous street food specialties",
+        "typical desserts of the region",
+        "vegetarian local dishes",
+        "what is the national dish of Egypt",
+    ],
+    "transportation": [
+        "how can I get around the city",
+        "how do I get from La Rambla to Sagrada Familia",
+        "efficient transportation between cities",
+        "train from Rome to Florence",
+        "airport transfer options and prices",
+        "public transport passes and metro tickets",
+        "bus or ferry schedule between towns",
+        "cheapest way to travel between Cairo and Luxor",
+    ],
+    "seasonal": [
+        "best time to visit Japan",
+        "cherry blossom season dates",
+        "seasonal events in June",
+        "what is the weather like in winter",
+        "peak tourist season and crowds",
+        "festivals happening in summer",
+        "when is the rainy season",
+        "is December a good month to travel to Egypt",
+    ],
+    "restaurant": [
+        "affordable restaurants near tourist attractions",
+        "vegetarian restaurants in Rome",
+        "top family-friendly restaurants in Cairo",
+        "where to eat dinner with a view",
+        "cheap places to eat lunch",
+        "fine dining restaurant recommendations",
+        "cafes and restaurants near the hotel",
+        "best rated local restaurants for a $50 budget",
+    ],
+}
+
+# Clause boundaries used to split multi-intent queries before scoring
+_CLAUSE_SPLIT = re.compile(r"[.?!;,]+|\s+and\s+", re.IGNORECASE)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingIntentClassifier:
+    """Nearest-centroid, multi-label intent classifier over sentence embeddings"""
+
+    def __init__(self, encoder, examples: Dict[str, List[str]] = CATEGORY_EXAMPLES,
+                 thresholds: Optional[Dict[str, float]] = None, default_threshold: float = 0.45,
+                 min_confidence: float = 0.40):
+        self.encoder = encoder
+        self.labels = list(examples)
+        self.thresholds = {label: default_threshold for label in self.labels}
+        self.thresholds.update(thresholds or {})
+        self.min_confidence = min_confidence
+
+        texts = [text for label in self.labels for text in examples[label]]
+        vectors = _normalize_rows(np.asarray(encoder.encode(texts), dtype=np.float32))
+
+        centroids = []
+        offset = 0
+        for label in self.labels:
+            count = len(examples[label])
+            centroids.append(vectors[offset:offset + count].mean(axis=0))
+            offset += count
+        self.centroids = _normalize_rows(np.stack(centroids))
+
+    def _segments(self, query: str) -> List[str]:
+        clauses = [clause.strip() for clause in _CLAUSE_SPLIT.split(query) if clause and len(clause.strip()) > 3]
+        return [query] + clauses
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity of each query segment (row) to each category centroid (column)"""
+        segments = self._segments(query)
+        vectors = _normalize_rows(np.asarray(self.encoder.encode(segments), dtype=np.float32))
+        return vectors @ self.centroids.T
+
+    def classify(self, query: str) -> Tuple[List[str], float]:
+        """Return (labels, confidence); an empty list means nothing cleared its threshold"""
+        segment_scores = self.scores(query)
+        best_per_label = segment_scores.max(axis=0)
+        confidence = float(best_per_label.max())
+
+        found = set()
+        # Each clause votes for its best category; the full query can add any that clear the bar
+        for row in segment_scores:
+            best = int(row.argmax())
+            if row[best] >= self.thresholds[self.labels[best]]:
+                found.add(best)
+        for index, label in enumerate(self.labels):
+            if segment_scores[0, index] >= self.thresholds[label]:
+                found.add(index)
+
+        if confidence < self.min_confidence:
+            return [], confidence
+        labels = [self.labels[index] for index in sorted(found, key=lambda i: -best_per_label[i])]
+        return labels, confidence
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_embedding_classifier() -> EmbeddingIntentClassifier:
+    """Build the shared classifier on first use from the already-loaded MiniLM model"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                from tools.weaviate_tools.vectorizer import model
+                _classifier = EmbeddingIntentClassifier(model)
+    return _classifier
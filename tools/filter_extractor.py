@@ -0,0 +1,260 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from tools.numeric_fields import AMOUNT_PATTERN, CURRENCY_ALIASES, USD_RATES, parse_amount
+
+FILTER_FIELDS = ["budget", "dietary", "city", "country", "type", "duration", "suitability"]
+
+# Cities and countries present in our collections, city -> country
+CITY_GAZETTEER = {
+    "cairo": "Egypt", "giza": "Egypt", "alexandria": "Egypt", "luxor": "Egypt", "aswan": "Egypt",
+    "hurghada": "Egypt", "sharm el sheikh": "Egypt", "dahab": "Egypt", "siwa": "Egypt",
+    "rome": "Italy", "florence": "Italy", "venice": "Italy", "milan": "Italy", "naples": "Italy",
+    "pisa": "Italy", "amalfi": "Italy", "bologna": "Italy", "turin": "Italy",
+    "barcelona": "Spain", "madrid": "Spain", "seville": "Spain", "valencia": "Spain", "granada": "Spain",
+    "marrakech": "Morocco", "essaouira": "Morocco", "fes": "Morocco", "casablanca": "Morocco",
+    "tokyo": "Japan", "kyoto": "Japan", "osaka": "Japan",
+    "new york": "USA", "los angeles": "USA", "san francisco": "USA", "miami": "USA",
+    "dubrovnik": "Croatia", "zagreb": "Croatia",
+    "paris": "France", "lyon": "France",
+    "istanbul": "Turkey", "lisbon": "Portugal", "athens": "Greece", "santorini": "Greece",
+}
+
+COUNTRY_GAZETTEER = {
+    "egypt": "Egypt", "italy": "Italy", "spain": "Spain", "morocco": "Morocco", "japan": "Japan",
+    "usa": "USA", "united states": "USA", "america": "USA", "croatia": "Croatia", "france": "France",
+    "turkey": "Turkey", "portugal": "Portugal", "greece": "Greece",
+}
+
+BUDGET_TIERS = {
+    # Not "budget" alone: "my budget is 80" names an amount, not a tier
+    "low": ["cheap", "affordable", "budget-friendly", "on a budget", "inexpensive", "low-cost", "economical"],
+    "medium": ["moderate", "mid-range", "mid range", "reasonably priced"],
+    "high": ["luxury", "expensive", "high-end", "upscale", "premium", "fine dining"],
+}
+
+DIETARY_TERMS = {
+    "vegetarian": "vegetarian", "vegan": "vegan", "gluten-free": "gluten-free", "gluten free": "gluten-free",
+    "halal": "halal", "kosher": "kosher", "pescatarian": "pescatarian", "dairy-free": "dairy-free",
+    "lactose": "dairy-free", "nut-free": "nut-free", "nut allergy": "nut-free",
+}
+
+SUITABILITY_TERMS = {
+    "family": "family", "families": "family", "kids": "family", "children": "family", "child": "family",
+    "family-friendly": "family",
+    "couple": "couples", "couples": "couples", "romantic": "couples", "honeymoon": "couples",
+    "solo": "solo", "alone": "solo",
+    "senior": "seniors", "seniors": "seniors", "elderly": "seniors", "retired": "seniors",
+    "business": "business", "meetings": "business",
+    "friends": "groups", "group": "groups",
+    "students": "students", "backpackers": "backpackers",
+}
+
+TYPE_TERMS = [
+    # cuisines and dishes
+    "seafood", "italian", "pasta", "pizza", "street food", "dessert", "egyptian", "japanese", "sushi", "tapas",
+    # accommodation
+    "hotel", "hostel", "resort", "apartment", "guesthouse", "boutique", "camp",
+    # activities
+    "cultural", "outdoor", "adventure", "historical", "museum", "relaxing", "nightlife", "shopping",
+    "beach", "hiking", "diving", "snorkeling", "tour",
+    # transport
+    "train", "bus", "ferry", "taxi", "metro", "flight",
+]
+
+_PRICE_QUALIFIER = r"(?P<qualifier>under|below|less than|max(?:imum)?|up to|at most|within)?\s*"
+_PRICE_PATTERNS = [
+    # $50, under €20
+    re.compile(_PRICE_QUALIFIER + r"(?P<currency>[$€£])\s?(?P<amount>%s)" % AMOUNT_PATTERN, re.IGNORECASE),
+    # 50 USD, under 20 euros
+    re.compile(_PRICE_QUALIFIER + r"(?P<amount>%s)\s?(?P<currency>usd|eur|gbp|dollars?|euros?|pounds?)\b" % AMOUNT_PATTERN,
+               re.IGNORECASE),
+]
+
+_DURATION_PATTERN = re.compile(
+    r"(?P<qualifier>under|less than|within|at most|up to|about|around)?\s*"
+    r"(?P<amount>\d+(?:\.\d+)?|half|one|two|three|four|five)[\s-]?"
+    r"(?P<unit>hours?|hrs?|minutes?|mins?|days?|nights?|weeks?)\b",
+    re.IGNORECASE,
+)
+_SHORT_UNITS = ("hour", "hr", "min")
+
+# Clause boundaries; punctuation only counts before a space, so "$1,200" and "10.50" stay in one piece
+_CLAUSE_BOUNDARY = re.compile(r"[.?!;,](?:\s+|$)(?:and\s+)?|\s+and\s+", re.IGNORECASE)
+
+# Words that suggest a field is being talked about even when no rule could resolve it
+_FIELD_CUES = {
+    "budget": re.compile(r"\b(budget|price|cost|spend|money)\b", re.IGNORECASE),
+    "duration": re.compile(r"\b(quick|short|long|half-day|full-day|all day)\b", re.IGNORECASE),
+    "city": re.compile(r"\b(?:in|to|near|around|visiting)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)"),
+}
+
+
+def _find_terms(text: str, terms) -> List[Tuple[int, str]]:
+    found = []
+    for term in terms:
+        match = re.search(r"\b" + re.escape(term) + r"\b", text, re.IGNORECASE)
+        if match:
+            found.append((match.start(), term))
+    return sorted(found)
+
+
+def _price_match(text: str) -> Optional[re.Match]:
+    for pattern in _PRICE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match
+    return None
+
+
+def _duration_match(text: str) -> Tuple[Optional[re.Match], int]:
+    """The duration phrase to filter on and how many were found"""
+    matches = list(_DURATION_PATTERN.finditer(text))
+    if not matches:
+        return None, 0
+    # Activity-length durations (hours/minutes) are more useful as filters than trip length
+    short = [m for m in matches if m.group("unit").lower().startswith(_SHORT_UNITS)]
+    return (short or matches)[0], len(matches)
+
+
+def _extract_budget(text: str) -> Tuple[str, float]:
+    match = _price_match(text)
+    if match:
+        currency = CURRENCY_ALIASES.get(match.group("currency").lower(), "usd")
+        amount = parse_amount(match.group("amount")) * USD_RATES[currency]
+        value = f"{amount:g} USD"
+        if match.group("qualifier"):
+            value = f"under {value}"
+        return value, 1.0
+
+    for tier, words in BUDGET_TIERS.items():
+        if _find_terms(text, words):
+            return tier, 0.8
+    return "", 0.0
+
+
+def _extract_duration(text: str) -> Tuple[str, float]:
+    match, count = _duration_match(text)
+    if match is None:
+        return "", 0.0
+
+    unit = match.group("unit").lower()
+    if not unit.endswith("s") and match.group("amount") not in ("1", "one", "half"):
+        unit += "s"
+    value = f"{match.group('amount')} {unit}"
+    if match.group("qualifier"):
+        value = f"{match.group('qualifier').lower()} {value}"
+    return value, 1.0 if count == 1 else 0.8
+
+
+def _extract_location(text: str) -> Tuple[str, float, str, float]:
+    cities = _find_terms(text, CITY_GAZETTEER)
+    countries = _find_terms(text, COUNTRY_GAZETTEER)
+
+    city, city_confidence = "", 0.0
+    if cities:
+        city = cities[0][1].title()
+        city_confidence = 1.0 if len(cities) == 1 else 0.7
+
+    country, country_confidence = "", 0.0
+    if countries:
+        country = COUNTRY_GAZETTEER[countries[0][1]]
+        country_confidence = 1.0 if len(countries) == 1 else 0.7
+    elif cities:
+        country = CITY_GAZETTEER[cities[0][1]]
+        country_confidence = 0.9
+    return city, city_confidence, country, country_confidence
+
+
+def filter_clause(query: str, field: str) -> str:
+    """The clause of the query the local rules read a "budget" or "duration" amount from, or "" if none.
+
+    "local pasta dishes under €20" in "... hotels in Rome, local pasta dishes under €20, ..." tells
+    which intent a budget is about.
+    """
+    if field == "budget":
+        match = _price_match(query)
+    elif field == "duration":
+        match, _ = _duration_match(query)
+    else:
+        raise ValueError(f"No clause lookup for filter field: {field}")
+    if match is None:
+        return ""
+
+    start = 0
+    for boundary in _CLAUSE_BOUNDARY.finditer(query):
+        if boundary.end() <= match.start():
+            start = boundary.end()
+        elif boundary.start() >= match.end():
+            return query[start:boundary.start()].strip()
+    return query[start:].strip()
+
+
+def extract_filters_with_confidence(query: str) -> Tuple[Dict[str, str], Dict[str, float], List[str]]:
+    """Extract filters with local rules only.
+
+    Returns (filters, confidence, unresolved): filters has the same keys as the LLM extractor
+    (empty fields dropped), confidence is per field in [0, 1], and unresolved lists fields the
+    query seems to talk about but that no rule could pin down.
+    """
+    text = query.lower()
+    values = dict.fromkeys(FILTER_FIELDS, "")
+    confidence = dict.fromkeys(FILTER_FIELDS, 0.0)
+
+    values["budget"], confidence["budget"] = _extract_budget(text)
+    values["duration"], confidence["duration"] = _extract_duration(text)
+    values["city"], confidence["city"], values["country"], confidence["country"] = _extract_location(text)
+
+    dietary = _find_terms(text, DIETARY_TERMS)
+    if dietary:
+        values["dietary"] = ", ".join(dict.fromkeys(DIETARY_TERMS[term] for _, term in dietary))
+        confidence["dietary"] = 1.0
+
+    suitability = _find_terms(text, SUITABILITY_TERMS)
+    if suitability:
+        values["suitability"] = ", ".join(dict.fromkeys(SUITABILITY_TERMS[term] for _, term in suitability))
+        confidence["suitability"] = 0.9
+
+    types = _find_terms(text, TYPE_TERMS)
+    if types:
+        values["type"] = ", ".join(term for _, term in types)
+        confidence["type"] = 0.8
+
+    unresolved = []
+    for field, cue in _FIELD_CUES.items():
+        if values[field]:
+            continue
+        matches = cue.findall(query)
+        if field == "city":
+            # A capitalized place we already know (e.g. a country) isn't an unknown city
+            matches = [m for m in matches if m.lower() not in COUNTRY_GAZETTEER and m.lower() not in CITY_GAZETTEER]
+        if matches:
+            unresolved.append(field)
+            confidence[field] = 0.3
+
+    filters = {field: value for field, value in values.items() if value}
+    return filters, confidence, unresolved
+
+
+def extract_filters(query: str, remote: Optional[Callable[[str, List[str]], Dict[str, str]]] = None,
+                    min_confidence: float = 0.6, local: Optional[Tuple] = None
+                    ) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """Extract filters locally, asking `remote` only for fields the rules couldn't resolve.
+
+    `local` is a result of extract_filters_with_confidence(query) to reuse instead of running the rules again.
+    """
+    filters, confidence, unresolved = local or extract_filters_with_confidence(query)
+    # The caller may hold on to its copy (e.g. as a cache key)
+    filters, confidence = dict(filters), dict(confidence)
+    ask_remote = [field for field in unresolved if confidence[field] < min_confidence]
+
+    if remote is not None and ask_remote:
+        try:
+            remote_filters = remote(query, ask_remote)
+        except Exception as e:
+            print(f"[Warning] Remote filter extraction failed: {e}")
+            remote_filters = {}
+        for field in ask_remote:
+            if remote_filters.get(field):
+                filters[field] = str(remote_filters[field])
+                confidence[field] = 0.7
+    return filters, confidence
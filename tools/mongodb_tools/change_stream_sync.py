@@ -0,0 +1,255 @@
+"""Keep Weaviate collections in step with MongoDB by tailing change streams.
+
+Change streams need a replica set. To try it locally:
+    mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017 &
+    mongosh --eval "rs.initiate()"
+    python -m tools.mongodb_tools.change_stream_sync --uri "mongodb://localhost:27017/?replicaSet=rs0" \\
+        --database travel --map restaurants=Restaurants --map visa=Visa
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+from bson import json_util
+from weaviate.classes.query import Filter
+from config.mongodb_setup.mongodb_cloud_conn import create_connection_with_mongodb_cloud
+from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
+from tools.weaviate_tools.ingestion import (COLLECTION_SPECS, MONGO_ID_PROPERTY, ingest_documents,
+                                            notify_collection_changed)
+
+WATCHED_OPERATIONS = ["insert", "update", "replace", "delete"]
+
+
+class SyncState:
+    """Resume token plus the MongoDB _id -> Weaviate UUID map of objects this sync wrote"""
+
+    def __init__(self, state_dir: str):
+        os.makedirs(state_dir, exist_ok=True)
+        self.token_path = os.path.join(state_dir, "resume_token.json")
+        self._db = sqlite3.connect(os.path.join(state_dir, "id_map.sqlite"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS id_map (coll TEXT, mongo_id TEXT, weaviate_id TEXT, "
+                         "PRIMARY KEY (coll, mongo_id))")
+        self._db.commit()
+
+    def load_token(self):
+        if not os.path.exists(self.token_path):
+            return None
+        with open(self.token_path, "r", encoding="utf-8") as f:
+            return json_util.loads(f.read())
+
+    def save_token(self, token):
+        tmp_path = f"{self.token_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json_util.dumps(token))
+        os.replace(tmp_path, self.token_path)
+
+    def get_ids(self, coll: str, mongo_ids: List[str]) -> Dict[str, str]:
+        if not mongo_ids:
+            return {}
+        placeholders = ",".join("?" * len(mongo_ids))
+        rows = self._db.execute(
+            f"SELECT mongo_id, weaviate_id FROM id_map WHERE coll = ? AND mongo_id IN ({placeholders})",
+            [coll, *mongo_ids],
+        ).fetchall()
+        return dict(rows)
+
+    def put_ids(self, coll: str, mapping: Dict[str, str]):
+        self._db.executemany("INSERT OR REPLACE INTO id_map (coll, mongo_id, weaviate_id) VALUES (?, ?, ?)",
+                             [(coll, mongo_id, weaviate_id) for mongo_id, weaviate_id in mapping.items()])
+        self._db.commit()
+
+    def delete_ids(self, coll: str, mongo_ids: List[str]):
+        self._db.executemany("DELETE FROM id_map WHERE coll = ? AND mongo_id = ?",
+                             [(coll, mongo_id) for mongo_id in mongo_ids])
+        self._db.commit()
+
+
+class ChangeStreamSync:
+    """Tails a MongoDB database's change stream and applies changes to Weaviate in micro-batches"""
+
+    def __init__(self, database_name: str, collection_map: Dict[str, str], state_dir: str = ".sync_state",
+                 mongo_client=None, micro_batch_size: int = 64, max_batch_wait: float = 1.0,
+                 max_retry_wait: float = 60.0):
+        # MongoDB collection name -> Weaviate collection name (a key of COLLECTION_SPECS)
+        self.collection_map = collection_map
+        self.micro_batch_size = micro_batch_size
+        self.max_batch_wait = max_batch_wait
+        self.max_retry_wait = max_retry_wait
+        self.state = SyncState(state_dir)
+
+        if mongo_client is None:
+            mongo_client = create_connection_with_mongodb_cloud()
+            if isinstance(mongo_client, str):
+                raise ConnectionError(mongo_client)
+        self.db = mongo_client[database_name]
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.counters = {"events_received": 0, "events_applied": 0, "upserts": 0, "deletes": 0,
+                         "batches": 0, "errors": 0}
+        self._last_lag: float = 0.0
+        self._started_at = time.monotonic()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus lag (source commit to Weaviate apply, for the newest change) and applied events/sec"""
+        with self._lock:
+            stats = dict(self.counters)
+            elapsed = time.monotonic() - self._started_at
+            stats["events_per_second"] = stats["events_applied"] / elapsed if elapsed else 0.0
+            stats["lag_seconds"] = self._last_lag
+            return stats
+
+    def stop(self):
+        self._stop.set()
+
+    def _pipeline(self) -> List[Dict]:
+        return [{"$match": {
+            "ns.coll": {"$in": list(self.collection_map)},
+            "operationType": {"$in": WATCHED_OPERATIONS},
+        }}]
+
+    def run(self):
+        """Block and sync until stop() is called, resuming from the persisted token if there is one"""
+        resume_token = self.state.load_token()
+        if resume_token is not None:
+            print("[Sync] Resuming change stream from saved token")
+
+        with self.db.watch(self._pipeline(), full_document="updateLookup", resume_after=resume_token,
+                           max_await_time_ms=int(self.max_batch_wait * 1000)) as stream:
+            batch = []
+            batch_started = None
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    batch.append(change)
+                    batch_started = batch_started or time.monotonic()
+                    with self._lock:
+                        self.counters["events_received"] += 1
+
+                batch_full = len(batch) >= self.micro_batch_size
+                batch_due = batch and time.monotonic() - batch_started >= self.max_batch_wait
+                if batch_full or batch_due or (batch and change is None):
+                    if not self._apply_with_retry(batch):
+                        break
+                    # Only advance the token once the batch is in Weaviate
+                    self.state.save_token(stream.resume_token)
+                    batch, batch_started = [], None
+
+    def _apply_with_retry(self, changes: List[Dict]) -> bool:
+        """Apply a batch, retrying with backoff while Weaviate fails; False if stop() was called first.
+
+        Applying is idempotent (upserts are keyed by natural key), so a retry may redo collections that
+        already went through. The resume token stays on the previous batch until this one succeeds.
+        """
+        attempt = 0
+        while True:
+            try:
+                self._apply_batch(changes)
+                return True
+            except Exception:
+                delay = min(2 ** attempt, self.max_retry_wait)
+                attempt += 1
+                print(f"[Sync] Retrying batch of {len(changes)} changes in {delay:.0f}s (attempt {attempt})")
+                if self._stop.wait(delay):
+                    return False
+
+    def _apply_batch(self, changes: List[Dict]):
+        # The newest event per document wins
+        latest: Dict[str, Dict[str, Dict]] = {}
+        for change in changes:
+            coll = change["ns"]["coll"]
+            latest.setdefault(coll, {})[str(change["documentKey"]["_id"])] = change
+
+        for coll, by_id in latest.items():
+            try:
+                self._apply_collection_changes(coll, by_id)
+            except Exception as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                print(f"[Sync] Failed to apply {len(by_id)} changes for {coll}: {e}")
+                raise
+
+        with self._lock:
+            self.counters["events_applied"] += len(changes)
+            self.counters["batches"] += 1
+            cluster_time = changes[-1].get("clusterTime")
+            if cluster_time is not None:
+                self._last_lag = max(0.0, time.time() - cluster_time.time)
+
+    def _apply_collection_changes(self, coll: str, by_id: Dict[str, Dict]):
+        weaviate_name = self.collection_map[coll]
+        spec = COLLECTION_SPECS[weaviate_name]
+        collection = get_weaviate_collection(spec.collection)
+
+        upserts = {mongo_id: change["fullDocument"] for mongo_id, change in by_id.items()
+                   if change["operationType"] != "delete" and change.get("fullDocument")}
+        deleted = [mongo_id for mongo_id, change in by_id.items()
+                   if change["operationType"] == "delete" or not change.get("fullDocument")]
+
+        known = self.state.get_ids(coll, list(by_id))
+        new_ids = {mongo_id: spec.object_id(doc) for mongo_id, doc in upserts.items()}
+
+        # Deleted documents, plus updates whose natural key changed and so moved to a new UUID
+        stale = [known[mongo_id] for mongo_id in deleted if mongo_id in known]
+        stale += [known[mongo_id] for mongo_id, weaviate_id in new_ids.items()
+                  if mongo_id in known and known[mongo_id] != weaviate_id]
+        # The same through the MongoId property, for objects loaded by ingest_documents or
+        # stream_mongodb_to_weaviate, which never went through the id map
+        conditions = [Filter.by_id().contains_any(stale)] if stale else []
+        if deleted:
+            conditions.append(Filter.by_property(MONGO_ID_PROPERTY).contains_any(deleted))
+        conditions += [Filter.all_of([Filter.by_property(MONGO_ID_PROPERTY).equal(mongo_id),
+                                      Filter.by_id().not_equal(weaviate_id)])
+                       for mongo_id, weaviate_id in new_ids.items()]
+
+        if upserts:
+            # Only the changed documents get embedded
+            report = ingest_documents(weaviate_name, list(upserts.values()), collection=collection)
+            if report.failed:
+                raise RuntimeError(f"{len(report.failed)} objects failed to write, e.g. {report.failed[0]['error']}")
+            self.state.put_ids(coll, new_ids)
+        if conditions:
+            result = collection.data.delete_many(where=Filter.any_of(conditions) if len(conditions) > 1 else conditions[0])
+            if result.successful:
+                notify_collection_changed(spec.collection, collection)
+        if deleted:
+            self.state.delete_ids(coll, deleted)
+
+        with self._lock:
+            self.counters["upserts"] += len(upserts)
+            self.counters["deletes"] += len(deleted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB connection string (defaults to the cloud cluster)")
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--map", action="append", required=True, metavar="MONGO_COLL=WEAVIATE_COLL",
+                        help="Collection to sync, e.g. restaurants=Restaurants; repeatable")
+    parser.add_argument("--state-dir", default=".sync_state")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-wait", type=float, default=1.0)
+    parser.add_argument("--stats-every", type=float, default=30.0, help="Seconds between counter reports")
+    args = parser.parse_args()
+
+    collection_map = dict(pair.split("=", 1) for pair in args.map)
+    mongo_client = create_connection_with_mongodb_cloud(args.uri) if args.uri else None
+    sync = ChangeStreamSync(args.database, collection_map, state_dir=args.state_dir, mongo_client=mongo_client,
+                            micro_batch_size=args.batch_size, max_batch_wait=args.max_wait)
+
+    def report():
+        while not sync._stop.wait(args.stats_every):
+            print(f"[Sync stats] {sync.stats()}")
+
+    threading.Thread(target=report, daemon=True).start()
+    try:
+        sync.run()
+    except KeyboardInterrupt:
+        sync.stop()
+    print(f"[Sync stats] {sync.stats()}")
+
+
+if __name__ == "__main__":
+    main()
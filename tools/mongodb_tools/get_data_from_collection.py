@@ -1,12 +1,33 @@
+from typing import Dict, Iterator, List, Optional
 from config.mongodb_setup.mongodb_collection_conn import create_connection_with_mongodb_db_collection
 
-def get_data_from_mongodb_collection(database_name: str, collection_name: str):
+def get_mongodb_collection(database_name: str, collection_name: str):
+    collection = create_connection_with_mongodb_db_collection(database_name=database_name,
+                                                              collection_name=collection_name)
+    # The connection helpers report failures as a message string
+    if isinstance(collection, str):
+        raise ConnectionError(f"{collection}: {database_name}.{collection_name}")
+    return collection
+
+def iter_mongodb_documents(database_name: str, collection_name: str, fields: Optional[List[str]] = None,
+                           batch_size: int = 500, after_id=None, include_id: bool = False) -> Iterator[Dict]:
+    """Stream documents in _id order through a server-side cursor, optionally resuming after an _id"""
+    collection = get_mongodb_collection(database_name, collection_name)
+
+    projection = {field: 1 for field in fields} if fields else {}
+    if not include_id:
+        projection["_id"] = 0
+    query = {"_id": {"$gt": after_id}} if after_id is not None else {}
 
+    cursor = collection.find(query, projection or None).sort("_id", 1).batch_size(batch_size)
+    try:
+        for document in cursor:
+            yield document
+    finally:
+        cursor.close()
+
+def get_data_from_mongodb_collection(database_name: str, collection_name: str):
     try:
-        collection = create_connection_with_mongodb_db_collection(database_name=database_name, 
-                                                                  collection_name=collection_name)
-        
-        documents = list(collection.find({}, {"_id": 0}))
-        return documents
-    except:
-        return f"Error while fetching data from mongodb collection: {collection_name}"
+        return list(iter_mongodb_documents(database_name, collection_name))
+    except Exception as e:
+        raise RuntimeError(f"Error while fetching data from mongodb collection: {collection_name}") from e
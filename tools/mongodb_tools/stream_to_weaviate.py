@@ -0,0 +1,65 @@
+import os
+from typing import Optional
+from bson import json_util
+from tools.mongodb_tools.get_data_from_collection import iter_mongodb_documents
+from tools.weaviate_tools.ingestion import COLLECTION_SPECS, IngestionReport, ingest_documents
+
+
+def load_checkpoint(checkpoint_path: str):
+    """Return the last _id written by a previous run, or None to start from the beginning"""
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json_util.loads(f.read()).get("last_id")
+
+
+def save_checkpoint(checkpoint_path: str, database_name: str, collection_name: str, last_id):
+    # Write-then-rename so an interrupted save never leaves a truncated checkpoint
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json_util.dumps({"database": database_name, "collection": collection_name, "last_id": last_id}))
+    os.replace(tmp_path, checkpoint_path)
+
+
+def stream_mongodb_to_weaviate(database_name: str, collection_name: str, weaviate_collection: str,
+                               checkpoint_path: Optional[str] = None, read_batch_size: int = 500,
+                               encode_batch_size: int = 64, **batch_options) -> IngestionReport:
+    """Load a MongoDB collection into Weaviate without materializing it.
+
+    Documents flow cursor -> chunk -> embed -> batch write, so memory stays at roughly one chunk
+    regardless of collection size. After each chunk is written the last _id is checkpointed; running
+    again with the same checkpoint_path resumes after it. The checkpoint stops at the last chunk before
+    the first failed object, and is kept when the load finishes with failures, so a re-run retries them.
+    """
+    spec = COLLECTION_SPECS[weaviate_collection]
+    after_id = load_checkpoint(checkpoint_path)
+    if after_id is not None:
+        print(f"[Stream] Resuming {database_name}.{collection_name} after _id {after_id}")
+
+    documents = iter_mongodb_documents(
+        database_name,
+        collection_name,
+        fields=list(spec.field_mapping.values()),
+        batch_size=read_batch_size,
+        after_id=after_id,
+        include_id=True,
+    )
+
+    failed_before = False
+
+    def checkpoint(chunk, failed):
+        nonlocal failed_before
+        # A resume skips everything up to the checkpoint, so it must never move past a failed object
+        failed_before = failed_before or bool(failed)
+        if checkpoint_path and not failed_before:
+            save_checkpoint(checkpoint_path, database_name, collection_name, chunk[-1]["_id"])
+
+    report = ingest_documents(weaviate_collection, documents, encode_batch_size=encode_batch_size,
+                              on_chunk=checkpoint, **batch_options)
+
+    if checkpoint_path and report.failed:
+        print(f"[Stream] {len(report.failed)} objects failed; keeping {checkpoint_path} so a re-run retries them")
+    elif checkpoint_path and os.path.exists(checkpoint_path):
+        # A clean finish removes its checkpoint so the next run starts fresh
+        os.remove(checkpoint_path)
+    return report
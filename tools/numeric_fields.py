@@ -0,0 +1,129 @@
+import re
+from typing import Optional, Tuple
+
+# Numeric companions of the TEXT price/duration properties, filled in once at ingest
+MIN_PRICE_PROPERTY = "MinPriceInUSD"
+MAX_PRICE_PROPERTY = "MaxPriceInUSD"
+DURATION_PROPERTY = "DurationHours"
+
+# Rough conversion to USD, which is what every price property is stored in
+USD_RATES = {"usd": 1.0, "eur": 1.1, "gbp": 1.27}
+CURRENCY_ALIASES = {
+    "$": "usd", "usd": "usd", "dollar": "usd", "dollars": "usd",
+    "€": "eur", "eur": "eur", "euro": "eur", "euros": "eur",
+    "£": "gbp", "gbp": "gbp", "pound": "gbp", "pounds": "gbp",
+}
+
+# Thousands groups ("1,200") or a decimal part with either separator ("10.50", "10,50")
+AMOUNT_PATTERN = r"\d+(?:,\d{3})*(?:[.,]\d+)?"
+_NUMBER = re.compile(AMOUNT_PATTERN)
+# A comma followed by one or two digits is a decimal comma, not a thousands separator
+_DECIMAL_COMMA = re.compile(r"\d+,\d{1,2}")
+_CURRENCY = re.compile(r"[$€£]|\b(?:usd|eur|gbp|dollars?|euros?|pounds?)\b", re.IGNORECASE)
+_FREE = re.compile(r"\bfree\b", re.IGNORECASE)
+
+_WORD_NUMBERS = {"half": 0.5, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5}
+# Anchored so words ending in "one" ("someone", "done") aren't read as a number
+_DURATION = re.compile(
+    r"\b(?P<amount>\d+(?:\.\d+)?|(?:half|one|two|three|four|five)\b)"
+    r"(?:\s*(?:-|to)\s*(?P<upper>\d+(?:\.\d+)?))?[\s-]*(?P<unit>hours?|hrs?|h\b|minutes?|mins?|days?|nights?|weeks?)?",
+    re.IGNORECASE,
+)
+# What joins two amounts: "1 hour 30 minutes" adds them up, "30 minutes to 1 hour" is a range
+_COMPOUND_GAP = re.compile(r"^\s*(?:,|and)?\s*$")
+_RANGE_GAP = re.compile(r"^\s*(?:-|to|or)\s*$")
+_UNIT_HOURS = {"h": 1.0, "hr": 1.0, "hour": 1.0, "min": 1 / 60, "minute": 1 / 60, "day": 24.0, "night": 24.0,
+               "week": 168.0}
+_DAY_WORDS = {"half day": 4.0, "half-day": 4.0, "full day": 8.0, "full-day": 8.0, "all day": 8.0}
+# "5 nights" or "2 weeks" in a query is how long the trip is, not how long an activity may take
+_STAY_LENGTH = re.compile(r"\b(?:days?|nights?|weeks?)\b", re.IGNORECASE)
+
+# Duration filter qualifiers that mean "no longer than"; anything else gets some slack
+_UPPER_BOUND_QUALIFIERS = ("under", "less than", "within", "at most", "up to")
+DURATION_SLACK = 1.25
+
+
+def parse_amount(amount: str) -> float:
+    """Number matched by AMOUNT_PATTERN: "1,200" is 1200.0, "19,50" is 19.5"""
+    if _DECIMAL_COMMA.fullmatch(amount):
+        return float(amount.replace(",", "."))
+    return float(amount.replace(",", ""))
+
+
+def parse_price_range(value) -> Tuple[Optional[float], Optional[float]]:
+    """(min, max) price in USD from values like "$10-20", "~15", "1,200 EUR" or "Free"; (None, None) if unparseable"""
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+
+    text = str(value)
+    numbers = [parse_amount(n) for n in _NUMBER.findall(text)]
+    if not numbers:
+        return (0.0, 0.0) if _FREE.search(text) else (None, None)
+
+    currency = _CURRENCY.search(text)
+    rate = USD_RATES[CURRENCY_ALIASES.get(currency.group(0).lower(), "usd")] if currency else 1.0
+    return min(numbers) * rate, max(numbers) * rate
+
+
+def parse_duration_hours(value) -> Optional[float]:
+    """Upper bound in hours from values like "2-3 hours", "45 min", "half day"; bare numbers are hours"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).strip().lower()
+    for words, hours in _DAY_WORDS.items():
+        if words in text:
+            return hours
+
+    matches = list(_DURATION.finditer(text))
+    # Bare numbers only count as hours when nothing in the text has a unit
+    if any(match.group("unit") for match in matches):
+        matches = [match for match in matches if match.group("unit")]
+    if not matches:
+        return None
+
+    longest = current = _match_hours(matches[0])
+    for previous, match in zip(matches, matches[1:]):
+        gap = text[previous.end():match.start()]
+        if _COMPOUND_GAP.match(gap):
+            current += _match_hours(match)
+        elif _RANGE_GAP.match(gap):
+            current = _match_hours(match)
+        else:
+            break
+        longest = max(longest, current)
+    return longest
+
+
+def _match_hours(match: re.Match) -> float:
+    amount = match.group("upper") or match.group("amount")
+    amount = _WORD_NUMBERS.get(amount) or float(amount)
+    unit = (match.group("unit") or "hour").lower().rstrip("s")
+    return amount * _UNIT_HOURS.get(unit, 1.0)
+
+
+def budget_limit_usd(budget_filter: str) -> Optional[float]:
+    """Spending cap from an extracted budget filter ("under 50 USD", "$40"); None for tiers like "low" """
+    _, upper = parse_price_range(budget_filter)
+    return upper
+
+
+def duration_limit_hours(duration_filter: str) -> Optional[float]:
+    """Longest acceptable duration for an extracted duration filter ("under 3 hours", "about 2 hours").
+    
+    None when there is no cap, including stay lengths ("5 nights", "2 weeks").
+    """
+    text = str(duration_filter or "").lower()
+    if _STAY_LENGTH.search(text) and not any(words in text for words in _DAY_WORDS):
+        return None
+    hours = parse_duration_hours(duration_filter)
+    if hours is None:
+        return None
+    if str(duration_filter).strip().lower().startswith(_UPPER_BOUND_QUALIFIERS):
+        return hours
+    return hours * DURATION_SLACK
+
@@ -0,0 +1,199 @@
+"""Per-collection and per-city price quantiles behind the low/medium/high budget tiers.
+
+The table is computed from the numeric MinPriceInUSD property (see tools/numeric_fields.py) and kept in
+a small JSON file, refreshed by ingestion (at most every PRICE_STATS_REFRESH_SECONDS) and re-read by
+running servers when it changes. Recompute everything with:
+    python -m tools.price_stats
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import numpy as np
+from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
+from tools.filter_extractor import BUDGET_TIERS
+from tools.numeric_fields import MIN_PRICE_PROPERTY
+
+PRICE_STATS_PATH = os.getenv("PRICE_STATS_PATH") or "price_stats.json"
+# Ingestion rescans a collection for its tiers at most this often; changes in between (e.g. change-stream
+# micro-batches) are folded into one rescan when the interval is up
+PRICE_STATS_REFRESH_SECONDS = float(os.getenv("PRICE_STATS_REFRESH_SECONDS") or 60)
+
+# Collections that carry MinPriceInUSD
+PRICED_COLLECTIONS = ["Activity", "Restaurants", "Dishes", "Accommodations", "Transportation"]
+
+# Tiers split at the terciles, so each holds roughly a third of the collection
+TIER_QUANTILES = (1 / 3, 2 / 3)
+# Cities with fewer priced objects than this use the collection-wide bounds
+MIN_CITY_SAMPLES = 8
+
+_TIER_WORDS = {word: tier for tier, words in BUDGET_TIERS.items() for word in [tier, *words]}
+# Gemini answers "budget" for the low tier; the local rules don't read the bare word as a tier
+_TIER_WORDS["budget"] = "low"
+
+
+def budget_tier(budget_filter: str) -> Optional[str]:
+    """"low", "medium" or "high" for tier-style budget filters ("cheap", "luxury", ...), else None"""
+    return _TIER_WORDS.get(str(budget_filter or "").strip().lower())
+
+
+def _bounds(prices) -> Dict[str, float]:
+    low, high = np.quantile(np.asarray(prices, dtype=np.float64), TIER_QUANTILES)
+    return {"low": float(low), "high": float(high), "count": len(prices)}
+
+
+def compute_price_stats(collection_name: str, collection=None) -> Dict[str, Dict[str, float]]:
+    """Tier bounds for the whole collection ("*") and every city with enough priced objects"""
+    if collection is None:
+        collection = get_weaviate_collection(collection_name)
+
+    by_city: Dict[str, list] = {}
+    prices = []
+    # Weaviate's aggregate API has no quantiles, so read the two properties and compute them here
+    for obj in collection.iterator(return_properties=["City", MIN_PRICE_PROPERTY]):
+        price = obj.properties.get(MIN_PRICE_PROPERTY)
+        if price is None:
+            continue
+        prices.append(price)
+        city = str(obj.properties.get("City") or "").strip().lower()
+        if city:
+            by_city.setdefault(city, []).append(price)
+
+    if not prices:
+        return {}
+    stats = {"*": _bounds(prices)}
+    stats.update({city: _bounds(values) for city, values in by_city.items() if len(values) >= MIN_CITY_SAMPLES})
+    return stats
+
+
+class PriceStatsTable:
+    """In-memory view of the stats file; lookups are dict reads, reloading only when the file changes"""
+
+    def __init__(self, path: str = PRICE_STATS_PATH):
+        self.path = path
+        self._stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._mtime_ns = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._stats = json.load(f)
+            self._mtime_ns = mtime_ns
+
+    def tier_bounds(self, collection_name: str, city: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """(low, high) price cut-offs for the city if it has its own row, else for the collection"""
+        self.load()
+        stats = self._stats.get(collection_name)
+        if not stats:
+            return None
+        row = stats.get(str(city or "").strip().lower()) or stats.get("*")
+        return (row["low"], row["high"]) if row else None
+
+    def update(self, collection_name: str, collection=None):
+        """Recompute one collection and rewrite the file atomically, keeping the other collections"""
+        with self._lock:
+            current = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    current = json.load(f)
+            current[collection_name] = compute_price_stats(collection_name, collection=collection)
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._stats = current
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+
+
+price_stats = PriceStatsTable()
+
+
+def _update_quietly(collection_name: str, collection=None):
+    try:
+        price_stats.update(collection_name, collection=collection)
+    except Exception as e:
+        print(f"[Warning] Could not refresh price statistics for {collection_name}: {e}")
+
+
+class DebouncedRefresh:
+    """Recomputes a collection at most once per interval: the first change runs at once, later ones share a timer"""
+
+    def __init__(self, interval: float = PRICE_STATS_REFRESH_SECONDS, update=_update_quietly):
+        self.interval = interval
+        self._update = update
+        self._last_run: Dict[str, float] = {}
+        # collection name -> (timer, newest collection handle)
+        self._scheduled: Dict[str, Tuple[threading.Timer, object]] = {}
+        self._lock = threading.Lock()
+
+    def request(self, collection_name: str, collection=None):
+        with self._lock:
+            if collection_name in self._scheduled:
+                timer, _ = self._scheduled[collection_name]
+                self._scheduled[collection_name] = (timer, collection)
+                return
+            last_run = self._last_run.get(collection_name)
+            wait = 0.0 if last_run is None else last_run + self.interval - time.monotonic()
+            if wait > 0:
+                timer = threading.Timer(wait, self._run_scheduled, args=(collection_name,))
+                timer.daemon = True
+                self._scheduled[collection_name] = (timer, collection)
+                timer.start()
+                return
+            self._last_run[collection_name] = time.monotonic()
+        self._update(collection_name, collection)
+
+    def _run_scheduled(self, collection_name: str):
+        with self._lock:
+            scheduled = self._scheduled.pop(collection_name, None)
+            if scheduled is None:
+                return
+            self._last_run[collection_name] = time.monotonic()
+        self._update(collection_name, scheduled[1])
+
+    def flush(self):
+        """Run every scheduled recompute now, e.g. before a short-lived loader exits"""
+        with self._lock:
+            names = list(self._scheduled)
+            for timer, _ in self._scheduled.values():
+                timer.cancel()
+        for name in names:
+            self._run_scheduled(name)
+
+
+_refresh = DebouncedRefresh()
+atexit.register(_refresh.flush)
+
+
+def refresh_price_stats(collection_name: str, collection=None):
+    """Called after a collection changes; failures only leave the previous bounds in place"""
+    if collection_name not in PRICED_COLLECTIONS:
+        return
+    _refresh.request(collection_name, collection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", action="append", choices=PRICED_COLLECTIONS,
+                        help="Collection to recompute; repeatable, defaults to all priced collections")
+    args = parser.parse_args()
+
+    for name in args.collection or PRICED_COLLECTIONS:
+        price_stats.update(name)
+        row = price_stats.tier_bounds(name)
+        print(f"[Price stats] {name}: " + (f"low <= {row[0]:g} USD, high >= {row[1]:g} USD" if row else "no prices"))
+
+
+if __name__ == "__main__":
+    main()
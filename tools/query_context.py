@@ -0,0 +1,29 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+
+
+@dataclass
+class QueryContext:
+    """Everything pre-computed about a query before any intent runs"""
+    query: str
+    filters: Dict[str, str] = field(default_factory=dict)
+    intents: List[str] = field(default_factory=list)
+    query_vector: Optional[np.ndarray] = None
+    # Filter field -> the one intent it applies to ("" for none); unscoped fields apply to every intent
+    filter_scopes: Dict[str, str] = field(default_factory=dict)
+
+    def filters_for(self, intent: str) -> Dict[str, str]:
+        """The filters to apply to one intent's search and ranking"""
+        return {key: value for key, value in self.filters.items() if self.filter_scopes.get(key, intent) == intent}
+
+    def vector_for(self, query: str) -> Optional[np.ndarray]:
+        """The precomputed vector, if `query` is the text it was computed from"""
+        if self.query_vector is not None and query.strip() == self.query.strip():
+            return self.query_vector
+        return None
+
+
+# Set by the crew around an intent's run so WeaviateTool can reuse the query vector
+current_query_context: ContextVar[Optional[QueryContext]] = ContextVar("current_query_context", default=None)
@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+import numpy as np
+
+# Weight of each similarity signal in the combined score
+DEFAULT_WEIGHTS = {
+    "query": 1.0,
+    "type": 0.5,
+    "suitability": 0.5,
+}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Return indices of the k highest scores, best first, using a partial sort"""
+    n = scores.shape[0]
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def score_items(items: List[Dict], query: str, key_field: str, desc_field: str,
+                filters: Dict[str, str], encoder, type_field: Optional[str] = None,
+                suitability_field: Optional[str] = None,
+                weights: Optional[Dict[str, float]] = None,
+                query_vector: Optional[np.ndarray] = None) -> np.ndarray:
+    """Score items against the query and the type/suitability filters with a single batched encode"""
+    if not items:
+        return np.zeros(0, dtype=np.float32)
+
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    n = len(items)
+
+    # Every text for this request goes into one encode call:
+    # [query, item_0 .. item_n, (filter, field_0 .. field_n) per active signal]
+    # A precomputed query vector takes the query's slot instead of being re-encoded
+    texts = [] if query_vector is not None else [query.lower()]
+    texts.extend(f"{item.get(key_field, '')} {item.get(desc_field, '')}".lower() for item in items)
+
+    signals = []
+    for signal_name, field in [("type", type_field), ("suitability", suitability_field)]:
+        if field and filters.get(signal_name):
+            signals.append(signal_name)
+            texts.append(str(filters[signal_name]).lower())
+            texts.extend(str(item.get(field, "")).lower() for item in items)
+
+    embeddings = np.asarray(encoder.encode(texts), dtype=np.float32)
+    if query_vector is not None:
+        embeddings = np.vstack([np.asarray(query_vector, dtype=np.float32).reshape(1, -1), embeddings])
+    embeddings = _normalize_rows(embeddings)
+
+    query_vec = embeddings[0]
+    item_matrix = embeddings[1:n + 1]
+    scores = weights["query"] * (item_matrix @ query_vec)
+
+    offset = n + 1
+    for signal_name in signals:
+        filter_vec = embeddings[offset]
+        field_matrix = embeddings[offset + 1:offset + 1 + n]
+        scores += weights[signal_name] * (field_matrix @ filter_vec)
+        offset += n + 1
+
+    return np.nan_to_num(scores, nan=0.0)
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Cosine similarity a new query needs to reuse a cached answer. An entry covering several intents
+# uses the strictest of their thresholds. Filters must match exactly, so city/budget changes never
+# slip through on embedding similarity alone.
+DEFAULT_THRESHOLDS = {
+    "visa": 0.90,
+    "seasonal": 0.90,
+    "transportation": 0.90,
+}
+DEFAULT_THRESHOLD = 0.85
+
+# Ingestion touches a marker file per collection; cached answers older than the marker are dropped.
+# A directory on disk so loads from other processes (scripts, the change-stream worker) count too.
+GENERATIONS_DIR = os.getenv("QUERY_CACHE_STATE_DIR") or ".query_cache"
+
+
+def _marker_path(collection_name: str) -> str:
+    return os.path.join(GENERATIONS_DIR, f"{collection_name}.generation")
+
+
+def mark_collection_changed(collection_name: str):
+    """Invalidate every cached answer that read from this Weaviate collection"""
+    os.makedirs(GENERATIONS_DIR, exist_ok=True)
+    path = _marker_path(collection_name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+    # Some filesystems only move mtime on a coarse tick when writing; set it at full precision
+    now_ns = time.time_ns()
+    os.utime(path, ns=(now_ns, now_ns))
+
+
+def collection_generation(collection_name: str) -> int:
+    try:
+        return os.stat(_marker_path(collection_name)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def snapshot_generations(collection_names: Iterable[str]) -> Dict[str, int]:
+    return {name: collection_generation(name) for name in collection_names}
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> Tuple:
+    # Empty values mean "no filter", and case differences aren't real differences
+    return tuple(sorted(
+        (str(key).lower(), str(value).strip().lower())
+        for key, value in (filters or {}).items() if value not in (None, "")
+    ))
+
+
+@dataclass
+class CachedAnswer:
+    """A finished answer: the intents that ran, the filters they used and results keyed by agent role"""
+    intents: List[str]
+    filters: Dict[str, Any]
+    results: Dict[str, Any]
+    generations: Dict[str, int] = field(default_factory=dict)
+    created_at: float = 0.0
+
+
+class SemanticResultCache:
+    """Maps query embeddings to finished crew results, matching near-duplicate queries"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0,
+                 thresholds: Optional[Dict[str, float]] = None, default_threshold: float = DEFAULT_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.default_threshold = default_threshold
+
+        # One row per slot so a lookup is a single matrix-vector product
+        self._vectors: Optional[np.ndarray] = None
+        self._slots: "OrderedDict[int, Tuple[Tuple, CachedAnswer]]" = OrderedDict()
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _threshold(self, intents: Iterable[str]) -> float:
+        return max((self.thresholds.get(intent, self.default_threshold) for intent in intents),
+                   default=self.default_threshold)
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _is_fresh(self, entry: CachedAnswer, now: float) -> bool:
+        if now - entry.created_at > self.ttl_seconds:
+            return False
+        return all(collection_generation(name) == generation for name, generation in entry.generations.items())
+
+    def _release(self, slot: int):
+        del self._slots[slot]
+        self._free.append(slot)
+
+    def get(self, query_vector, filters: Optional[Dict[str, Any]], scope: str = "") -> Optional[CachedAnswer]:
+        """Best cached answer for a similar query with identical filters, or None"""
+        key = (scope, _filters_key(filters))
+        query_vector = self._normalize(query_vector)
+        now = time.time()
+
+        with self._lock:
+            if self._vectors is None or not self._slots:
+                self.misses += 1
+                return None
+
+            slots = np.fromiter((slot for slot, (entry_key, _) in self._slots.items() if entry_key == key),
+                                dtype=np.int64)
+            if slots.size:
+                similarities = self._vectors[slots] @ query_vector
+                for i in np.argsort(-similarities):
+                    slot = int(slots[i])
+                    entry = self._slots[slot][1]
+                    if not self._is_fresh(entry, now):
+                        self._release(slot)
+                        continue
+                    if similarities[i] >= self._threshold(entry.intents):
+                        self._slots.move_to_end(slot)
+                        self.hits += 1
+                        return entry
+                    # Sorted best first, but thresholds differ per entry, so keep looking
+
+            self.misses += 1
+            return None
+
+    def put(self, query_vector, filters: Optional[Dict[str, Any]], answer: CachedAnswer, scope: str = ""):
+        """Store an answer under the lookup filters; its generations must be read before it was computed"""
+        query_vector = self._normalize(query_vector)
+        answer.created_at = time.time()
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, query_vector.shape[0]), dtype=np.float32)
+            if not self._free:
+                # Least recently used goes first
+                self._release(next(iter(self._slots)))
+            slot = self._free.pop()
+            self._vectors[slot] = query_vector
+            self._slots[slot] = ((scope, _filters_key(filters)), answer)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._slots),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+            self._free = list(range(self.max_entries - 1, -1, -1))
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Collection, Dict, List, Optional
+
+
+class StartupReport:
+    """Wall-clock breakdown of server start-up; warm-up steps run in parallel and are listed under their group"""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self.phases: List[Dict] = []
+        self.errors: Dict[str, str] = {}
+        # Failures of optional steps: reported, but the server is still healthy without them
+        self.warnings: Dict[str, str] = {}
+        self.ready = False
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, group: Optional[str] = None, error: Optional[str] = None,
+               optional: bool = False):
+        with self._lock:
+            self.phases.append({"name": name, "seconds": round(seconds, 3), "group": group})
+            if error is not None:
+                (self.warnings if optional else self.errors)[name] = error
+
+    @contextmanager
+    def phase(self, name: str, group: Optional[str] = None, optional: bool = False):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, group=group, error=error, optional=optional)
+
+    def run_parallel(self, group: str, steps: Dict[str, Callable[[], object]], optional: Collection[str] = ()):
+        """Run independent steps concurrently; a failing step is recorded and does not stop the others.
+        
+        Steps named in `optional` only add a warning when they fail instead of making the server unhealthy.
+        """
+        def run(name, step):
+            try:
+                with self.phase(name, group=group, optional=name in optional):
+                    step()
+            except Exception as e:
+                print(f"[Warning] Warm-up step '{name}' failed: {e}")
+
+        with self.phase(group):
+            with ThreadPoolExecutor(max_workers=max(len(steps), 1), thread_name_prefix="warm-up") as executor:
+                for future in [executor.submit(run, name, step) for name, step in steps.items()]:
+                    future.result()
+
+    @property
+    def healthy(self) -> bool:
+        return self.ready and not self.errors
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "uptime_seconds": round(time.time() - self.created_at, 3),
+                "phases": list(self.phases),
+                "errors": dict(self.errors),
+                "warnings": dict(self.warnings),
+            }
+
+    def _line(self, phase: Dict, indent: str) -> str:
+        status = ""
+        if phase["name"] in self.errors:
+            status = f"  FAILED: {self.errors[phase['name']]}"
+        elif phase["name"] in self.warnings:
+            status = f"  FAILED (optional): {self.warnings[phase['name']]}"
+        return f"{indent}{phase['name']:<20} {phase['seconds']:>8.3f}s{status}"
+
+    def summary(self) -> str:
+        phases = self.as_dict()["phases"]
+        lines = ["[Startup] Time breakdown:"]
+        # Groups are recorded after their steps finish, but read better above them
+        for phase in phases:
+            if phase["group"] is None:
+                lines.append(self._line(phase, "  "))
+                lines.extend(self._line(step, "    ") for step in phases if step["group"] == phase["name"])
+        return "\n".join(lines)
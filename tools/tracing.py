@@ -0,0 +1,143 @@
+import functools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from tools.metrics import registry
+
+STAGE_SECONDS = registry.histogram("rag_stage_duration_seconds", "Wall time per pipeline stage", ["stage", "status"])
+STAGE_IN_FLIGHT = registry.gauge("rag_stage_in_flight", "Stages currently running", ["stage"])
+LLM_TOKENS = registry.counter("rag_llm_tokens_total", "LLM tokens used", ["model", "kind"])
+LLM_REQUESTS = registry.counter("rag_llm_requests_total", "LLM calls, including each agent iteration", ["model"])
+
+# The trace of the request being served; worker threads get it through Trace.bind
+current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Spans of one request, collected from every thread that works on it"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.tokens: Dict[str, int] = {"prompt": 0, "completion": 0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        token = current_trace.set(self)
+        try:
+            yield self
+        finally:
+            current_trace.reset(token)
+
+    def bind(self, fn: Callable) -> Callable:
+        """Wrap fn so it runs under this trace, e.g. when submitted to a thread pool"""
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with self.activate():
+                return fn(*args, **kwargs)
+        return run
+
+    def start(self) -> "Trace":
+        STAGE_IN_FLIGHT.inc(stage=self.name)
+        return self
+
+    def finish(self, status: str = "ok"):
+        """Record the whole request as a stage of its own and log the breakdown"""
+        STAGE_IN_FLIGHT.dec(stage=self.name)
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage=self.name, status=status)
+        print(self.summary())
+
+    def add_span(self, span: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(span)
+
+    def add_tokens(self, prompt: int, completion: int):
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"trace_id": self.trace_id, "name": self.name, "tokens": dict(self.tokens),
+                    "spans": sorted(self.spans, key=lambda span: span["start"])}
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{span['stage']} {span['seconds'] * 1000:.0f}ms" for span in self.as_dict()["spans"])
+        return (f"[Trace {self.trace_id}] {self.name} {time.perf_counter() - self.started:.2f}s "
+                f"(tokens {self.tokens['prompt']}+{self.tokens['completion']}): {stages}")
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Time a stage into the latency histogram and the current trace; yields a dict for extra attributes"""
+    trace = current_trace.get()
+    record = {"stage": stage, **attributes}
+    start = time.perf_counter()
+    status = "ok"
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    try:
+        yield record
+    except GeneratorExit:
+        raise
+    except BaseException as e:
+        status = "error"
+        record["error"] = str(e)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_SECONDS.observe(seconds, stage=stage, status=status)
+        if trace is not None:
+            record.update(start=round(start - trace.started, 4), seconds=round(seconds, 4), status=status)
+            trace.add_span(record)
+
+
+def traced(stage: str):
+    """Decorator form of span()"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+@contextmanager
+def start_trace(name: str):
+    """Open a trace for a request, or join the one already active (e.g. started by the web endpoint)"""
+    trace = current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace(name).start()
+    status = "error"
+    with trace.activate():
+        try:
+            yield trace
+            status = "ok"
+        finally:
+            trace.finish(status)
+
+
+def bind_current(fn: Callable) -> Callable:
+    """fn bound to the active trace, if any; for work handed to thread pools"""
+    trace = current_trace.get()
+    return trace.bind(fn) if trace is not None else fn
+
+
+def record_tokens(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int], requests: int = 1):
+    """Count an LLM call's tokens globally and on the current trace; missing counts are treated as zero"""
+    prompt_tokens, completion_tokens = int(prompt_tokens or 0), int(completion_tokens or 0)
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    LLM_REQUESTS.inc(requests, model=model)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_tokens(prompt_tokens, completion_tokens)
@@ -0,0 +1,45 @@
+"""The crewai tool agents use to search Weaviate; kept apart from activity_seach_tool so that plain
+searches (direct mode, benchmarks) don't import crewai."""
+import json
+from typing import Type
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from tools.activity_seach_tool import COLLECTION_MAP, search_collection
+from tools.query_context import current_query_context
+from tools.tracing import span
+
+
+class WeaviateToolSchema(BaseModel):
+    query: str = Field(..., description="The query to search and retrieve relevant information.")
+    intent: str = Field(..., description="The classified agent type such as 'activity', 'dish', etc.")
+
+
+class WeaviateTool(BaseTool):
+    name: str = "WeaviateTool"
+    description: str = "Search Weaviate for activities, dishes, restaurants, visa info, etc."
+    args_schema: Type[BaseModel] = WeaviateToolSchema
+
+    def _run(self, query: str, intent: str) -> str:
+        print(f"Weaviate Query: {query}")
+        print(f"Intent: {intent}")
+
+        intent = intent.lower().strip()
+        if intent not in COLLECTION_MAP:
+            return json.dumps({"error": f"Unknown intent '{intent}' — no matching collection."})
+
+        collection_name = COLLECTION_MAP[intent]["name"]
+
+        # Reuse the vector computed during query pre-processing when the agent passes the same query,
+        # and push the request's location filters down into the search
+        context = current_query_context.get()
+        query_vector = context.vector_for(query) if context else None
+        filters = context.filters_for(intent) if context else None
+
+        with span("weaviate_tool", intent=intent) as record:
+            try:
+                rag_res = search_collection(query, intent, query_vector=query_vector, filters=filters)
+                record["hits"] = len(rag_res)
+                return json.dumps({collection_name.lower(): rag_res})
+            except Exception as e:
+                record["error"] = str(e)
+                return json.dumps({"error": str(e)})
@@ -0,0 +1,96 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from tools.metrics import registry
+
+BATCH_SIZE = registry.histogram("rag_embedding_batch_size", "Texts per coalesced embedding forward pass",
+                                buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_WAIT_SECONDS = registry.histogram("rag_embedding_batch_wait_seconds",
+                                        "Time a text waited in the queue before its forward pass",
+                                        buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+# encode() kwargs a batched call can honour; anything else goes straight to the model
+_BATCHABLE_KWARGS = {"batch_size", "show_progress_bar"}
+
+
+class MicroBatcher:
+    """Coalesces encode calls from concurrent threads into shared forward passes.
+
+    A batch is run as soon as it holds max_batch_size texts, or max_wait_ms after its first text
+    arrived, whichever comes first. Lists longer than a batch (e.g. ingestion) skip the queue.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid: Optional[int] = None
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def load(self):
+        return self.model.load() if hasattr(self.model, "load") else self.model
+
+    def _ensure_worker(self):
+        # Started on first use in each process: a thread doesn't survive a fork, so a forked worker starts its own
+        if self._worker_pid != os.getpid():
+            with self._lock:
+                if self._worker_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+                    self._worker_pid = os.getpid()
+
+    def _next_batch(self, pending: "queue.Queue") -> List[Tuple[str, Future, float]]:
+        batch = [pending.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        pending = self._queue
+        while True:
+            batch = self._next_batch(pending)
+            started = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            for _, _, queued in batch:
+                BATCH_WAIT_SECONDS.observe(started - queued)
+            try:
+                vectors = np.asarray(self.model.encode([text for text, _, _ in batch], batch_size=len(batch)),
+                                     dtype=np.float32)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        """Queue one text; the future resolves to its vector once its batch has run"""
+        self._ensure_worker()
+        future: "Future[np.ndarray]" = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Drop-in replacement for SentenceTransformer.encode that shares forward passes across threads"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if set(kwargs) - _BATCHABLE_KWARGS or not texts or len(texts) > self.max_batch_size:
+            return self.model.encode(sentences, **kwargs)
+        futures = [self.submit(text) for text in texts]
+        vectors = np.stack([future.result() for future in futures])
+        return vectors[0] if single else vectors
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Union
+import numpy as np
+
+# encode() kwargs that don't change the produced vectors; anything else bypasses the cache
+_CACHE_SAFE_KWARGS = {"batch_size", "show_progress_bar"}
+
+
+class CachedEncoder:
+    """Wraps a SentenceTransformer with an in-memory LRU and an optional on-disk store"""
+
+    def __init__(self, model, model_name: str, max_bytes: int = 64 * 1024 * 1024,
+                 disk_path: Optional[str] = None):
+        self.model = model
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lru_bytes = 0
+        # Guards the LRU and the counters only; disk reads and writes happen outside it
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.disk_path = disk_path
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        # Anything not overridden here (e.g. get_sentence_embedding_dimension) goes to the model.
+        # Private and dunder lookups (copy, pickle) don't, and can't recurse before __init__ has run
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key: str, vector: np.ndarray):
+        if vector.nbytes > self.max_bytes:
+            return
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._lru_bytes -= old.nbytes
+        self._lru[key] = vector
+        self._lru_bytes += vector.nbytes
+        while self._lru_bytes > self.max_bytes:
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= evicted.nbytes
+
+    def _disk_connection(self) -> Optional[sqlite3.Connection]:
+        """One connection per thread, opened on first use; a SQLite connection must not be carried across a fork"""
+        if not self.disk_path:
+            return None
+        disk = getattr(self._local, "disk", None)
+        if disk is None or self._local.pid != os.getpid():
+            # Threads and worker processes share the file, so wait for each other's writes instead of
+            # failing; WAL lets readers go on while one of them writes
+            disk = sqlite3.connect(self.disk_path, timeout=30)
+            disk.execute("PRAGMA journal_mode=WAL")
+            disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            disk.commit()
+            self._local.disk, self._local.pid = disk, os.getpid()
+        return disk
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        disk = self._disk_connection()
+        if disk is None or not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = disk.execute(
+            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        return {key: np.frombuffer(blob, dtype=np.float32).copy() for key, blob in rows}
+
+    def _disk_put(self, entries: Dict[str, np.ndarray]):
+        disk = self._disk_connection()
+        if disk is None or not entries:
+            return
+        disk.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [(key, vector.tobytes()) for key, vector in entries.items()],
+        )
+        disk.commit()
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        """Drop-in replacement for SentenceTransformer.encode that serves repeated texts from cache"""
+        if set(kwargs) - _CACHE_SAFE_KWARGS:
+            return self.model.encode(sentences, **kwargs)
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.model.encode(texts, **kwargs)
+
+        keys = [self._key(text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                if key not in vectors:
+                    cached = self._lru_get(key)
+                    if cached is not None:
+                        vectors[key] = cached
+        lru_found = len(vectors)
+
+        from_disk = self._disk_get([key for key in dict.fromkeys(keys) if key not in vectors])
+        if from_disk:
+            with self._lock:
+                for key, vector in from_disk.items():
+                    self._lru_put(key, vector)
+            vectors.update(from_disk)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            encoded = np.asarray(self.model.encode(list(missing.values()), **kwargs), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+            with self._lock:
+                for key, vector in fresh.items():
+                    self._lru_put(key, vector)
+            self._disk_put(fresh)
+            vectors.update(fresh)
+
+        with self._lock:
+            self.hits += lru_found
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing)
+
+        result = np.stack([vectors[key] for key in keys])
+        return result[0] if single else result
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._lru),
+                "bytes": self._lru_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._lru_bytes = 0
@@ -0,0 +1,177 @@
+"""Embedding server: one copy of the model, shared by every worker process over a Unix socket.
+
+    python -m tools.weaviate_tools.embedding_server --socket /tmp/rag-embeddings.sock
+
+Clients (EMBEDDING_SERVER_SOCKET, or `python main.py --embedding-server`) send texts; the server
+coalesces concurrent requests from all connections into micro-batches (EMBEDDING_BATCH_MAX_SIZE,
+EMBEDDING_BATCH_MAX_WAIT_MS) and answers with float32 vectors. The model runs on EMBEDDING_BACKEND.
+
+Wire format, both ways: a 4-byte big-endian length, then the payload. Requests are JSON
+{"texts": [...]}; responses are one status byte (0 = ok) followed by the row-major float32
+vectors, or by a UTF-8 error message.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from typing import List, Union
+import numpy as np
+
+DEFAULT_SOCKET_PATH = "/tmp/rag-embeddings.sock"
+
+_HEADER = struct.Struct(">I")
+_OK, _ERROR = b"\x00", b"\x01"
+
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+
+def _send(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _receive(sock: socket.socket) -> bytes:
+    def exactly(count: int) -> bytes:
+        chunks = []
+        while count:
+            chunk = sock.recv(count)
+            if not chunk:
+                raise ConnectionError("Embedding server connection closed")
+            chunks.append(chunk)
+            count -= len(chunk)
+        return b"".join(chunks)
+
+    (length,) = _HEADER.unpack(exactly(_HEADER.size))
+    return exactly(length)
+
+
+class EmbeddingClient:
+    """SentenceTransformer-like encoder backed by an embedding server; one connection per thread"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, connect_timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        # A connection inherited through a fork would be shared with the parent
+        if sock is None or self._local.pid != os.getpid():
+            deadline = time.monotonic() + self.connect_timeout
+            while True:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.socket_path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    sock.close()
+                    # The server may still be loading the model
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.2)
+            self._local.sock, self._local.pid = sock, os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def _request(self, texts: List[str]) -> np.ndarray:
+        payload = json.dumps({"texts": texts}).encode("utf-8")
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send(sock, payload)
+                response = _receive(sock)
+                break
+            except (ConnectionError, BrokenPipeError):
+                # Stale connection, e.g. the server restarted; retry once on a fresh one
+                self._close()
+                if attempt:
+                    raise
+        if response[:1] != _OK:
+            raise EmbeddingServerError(response[1:].decode("utf-8", "replace"))
+        return np.frombuffer(response, dtype=np.float32, offset=1).reshape(len(texts), -1)
+
+    def load(self) -> "EmbeddingClient":
+        """Wait until the server accepts connections"""
+        self._connection()
+        return self
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = None,
+               show_progress_bar: bool = None) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        vectors = self._request(texts)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.encode("dimension").shape[0])
+
+
+def serve(socket_path: str, batcher) -> socketserver.ThreadingUnixStreamServer:
+    """Server answering encode requests through the given MicroBatcher; call serve_forever() on it"""
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    request = _receive(self.request)
+                except ConnectionError:
+                    return
+                try:
+                    texts = json.loads(request)["texts"]
+                    futures = [batcher.submit(text) for text in texts]
+                    vectors = np.stack([future.result() for future in futures]).astype(np.float32)
+                    _send(self.request, _OK + vectors.tobytes())
+                except Exception as e:
+                    _send(self.request, _ERROR + str(e).encode("utf-8"))
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    from tools.weaviate_tools.embedding_batcher import MicroBatcher
+    from tools.weaviate_tools.vectorizer import BACKEND, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, load_encoder
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SERVER_SOCKET") or DEFAULT_SOCKET_PATH)
+    parser.add_argument("--backend", default=BACKEND)
+    parser.add_argument("--max-batch-size", type=int, default=BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    encoder = load_encoder(args.backend, os.getenv("EMBEDDING_ONNX_FILE") or None)
+    encoder.load().encode(["warm up"])
+    server = serve(args.socket, MicroBatcher(encoder, args.max_batch_size, args.max_wait_ms))
+    print(f"[Embedding server] {args.backend} on {args.socket} "
+          f"(batches of up to {args.max_batch_size}, {args.max_wait_ms}ms wait)")
+    # Terminated by the launcher: still remove the socket file on the way out
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Export Weaviate collections into the memory-mapped format served by VECTOR_BACKEND=local.
+
+Run from the repository root:
+    python -m tools.weaviate_tools.export_collections --out vector_store
+    python -m tools.weaviate_tools.export_collections --out vector_store --dtype float16 --collection Visa
+
+Objects are streamed with the collection iterator, so memory stays flat regardless of collection size.
+"""
+import argparse
+import os
+import time
+from config.weaviate_setup.weaviate_client_manager import WeaviateClientManager
+from tools.weaviate_tools.mmap_collection import VECTOR_DTYPES, write_mmap_collection
+
+# The collections weaviate_schema.py creates (listed here because importing that script creates them)
+COLLECTION_NAMES = ["Activity", "Restaurants", "Dishes", "Scams", "Accommodations", "Transportation", "Visa", "Seasonal"]
+
+
+def _objects(collection):
+    for obj in collection.iterator(include_vector=True):
+        # Single-vector collections come back as {"default": [...]}
+        vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+        yield obj.uuid, vector, obj.properties
+
+
+def export_collection(manager: WeaviateClientManager, name: str, directory: str, dtype: str = "float32") -> int:
+    """Write one Weaviate collection to `directory`; returns the object count"""
+    return write_mmap_collection(directory, name, _objects(manager.get_collection(name)), dtype=dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="vector_store", help="Store root; each collection gets a subdirectory")
+    parser.add_argument("--dtype", default="float32", choices=VECTOR_DTYPES)
+    parser.add_argument("--collection", action="append", choices=COLLECTION_NAMES,
+                        help="Collection to export; repeatable, defaults to all")
+    args = parser.parse_args()
+
+    # Always read from Weaviate, whatever VECTOR_BACKEND says
+    manager = WeaviateClientManager()
+    try:
+        for name in args.collection or COLLECTION_NAMES:
+            start = time.perf_counter()
+            count = export_collection(manager, name, os.path.join(args.out, name), dtype=args.dtype)
+            print(f"[Export] {name}: {count} objects in {time.perf_counter() - start:.1f}s")
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import hashlib
+import json
+import time
+import uuid as uuid_lib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from weaviate.classes.query import Filter
+from tools.weaviate_tools.vectorizer import model
+from config.weaviate_setup.weaviate_client_manager import get_weaviate_collection
+from tools.result_cache import mark_collection_changed
+from tools.price_stats import refresh_price_stats
+from tools.numeric_fields import (DURATION_PROPERTY, MAX_PRICE_PROPERTY, MIN_PRICE_PROPERTY, parse_duration_hours,
+                                  parse_price_range)
+
+# Namespace for deterministic object UUIDs derived from each collection's natural key
+OBJECT_ID_NAMESPACE = uuid_lib.uuid5(uuid_lib.NAMESPACE_URL, "ragagents/weaviate-objects")
+CONTENT_HASH_PROPERTY = "ContentHash"
+# MongoDB _id of the source document, so change-stream deletes can find objects whatever loaded them
+MONGO_ID_PROPERTY = "MongoId"
+
+
+@dataclass
+class CollectionSpec:
+    """How raw documents map onto one Weaviate collection"""
+    collection: str
+    # str.format_map template over the raw document; its text is what gets embedded
+    text_template: str
+    # Weaviate property -> key in the raw document
+    field_mapping: Dict[str, str]
+    # Raw document keys that identify a record across loads
+    natural_key: List[str]
+    # TEXT properties parsed once at ingest into the numeric MinPriceInUSD/MaxPriceInUSD and DurationHours
+    price_property: Optional[str] = None
+    duration_property: Optional[str] = None
+
+    def text(self, doc: Dict) -> str:
+        return self.text_template.format_map(doc)
+
+    def properties(self, doc: Dict) -> Dict[str, Any]:
+        # Mapped properties are TEXT in weaviate_schema.py; the derived ones are NUMBER
+        properties = {prop: "" if doc.get(key) is None else str(doc.get(key)) for prop, key in self.field_mapping.items()}
+        properties.update(self.numeric_properties(properties))
+        if doc.get("_id") is not None:
+            properties[MONGO_ID_PROPERTY] = str(doc["_id"])
+        return properties
+
+    def numeric_properties(self, properties: Dict[str, str]) -> Dict[str, float]:
+        """Range-filterable numbers; unparseable values are left unset rather than guessed"""
+        numeric = {}
+        if self.price_property:
+            low, high = parse_price_range(properties.get(self.price_property))
+            if low is not None:
+                numeric[MIN_PRICE_PROPERTY] = low
+                numeric[MAX_PRICE_PROPERTY] = high
+        if self.duration_property:
+            hours = parse_duration_hours(properties.get(self.duration_property))
+            if hours is not None:
+                numeric[DURATION_PROPERTY] = hours
+        return numeric
+
+    def object_id(self, doc: Dict) -> str:
+        key = "|".join(str(doc.get(field, "")).strip().lower() for field in self.natural_key)
+        return str(uuid_lib.uuid5(OBJECT_ID_NAMESPACE, f"{self.collection}|{key}"))
+
+    def content_hash(self, doc: Dict) -> str:
+        # Covers the derived properties too, so a parser change re-syncs the affected objects
+        payload = self.text(doc) + json.dumps(self.properties(doc), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+COLLECTION_SPECS = {
+    "Accommodations": CollectionSpec(
+        collection="Accommodations",
+        text_template=("Accommodation: {Accommodation Name}. Type: {Type}. "
+                       "Description: {Accommodation Details}. Price per night: {Avg Night Price (USD)} USD. "
+                       "Location: {City}, {Country}."),
+        field_mapping={
+            "Country": "Country",
+            "City": "City",
+            "AccommodationName": "Accommodation Name",
+            "AccommodationDetails": "Accommodation Details",
+            "Type": "Type",
+            "AvgNightPriceInUSD": "Avg Night Price (USD)",
+        },
+        natural_key=["Country", "City", "Accommodation Name"],
+        price_property="AvgNightPriceInUSD",
+    ),
+    "Activity": CollectionSpec(
+        collection="Activity",
+        text_template=("Activity: {Activity}. Description: {Description}. Type of Traveler: {Type of Traveler}. "
+                       "Budget: {Budget details}. Tips: {Tips and Recommendations}. Best for: {For }. "
+                       "Category: {CATEGORY}."),
+        field_mapping={
+            "Country": "Country",
+            "City": "City",
+            "Activity": "Activity",
+            "Description": "Description",
+            "TypeOfTraveler": "Type of Traveler",
+            "Duration": "Duration",
+            "BudgetInUSD": "Budget (USD)",
+            "BudgetDetails": "Budget details",
+            "TipsAndRecommendations": "Tips and Recommendations",
+            "For": "For ",
+            "FamilyFriendly": "Family friendly",
+            "Category": "CATEGORY",
+        },
+        natural_key=["Country", "City", "Activity"],
+        price_property="BudgetInUSD",
+        duration_property="Duration",
+    ),
+    "Dishes": CollectionSpec(
+        collection="Dishes",
+        text_template=("Dish: {Dish Name}. Description: {Dish Details}. "
+                       "Type: {Type}. Price: {Avg Price (USD)} USD. "
+                       "Best For: {Best For}. Location: {City}, {Country}."),
+        field_mapping={
+            "Country": "Country",
+            "City": "City",
+            "DishName": "Dish Name",
+            "DishDetails": "Dish Details",
+            "Type": "Type",
+            "AvgPriceInUSD": "Avg Price (USD)",
+            "BestFor": "Best For",
+        },
+        natural_key=["Country", "City", "Dish Name"],
+        price_property="AvgPriceInUSD",
+    ),
+    "Restaurants": CollectionSpec(
+        collection="Restaurants",
+        text_template=("Restaurant: {Restaurant Name}. Cuisine: {Type of Cuisine}. "
+                       "Meals Served: {Meals Served}. Recommended Dish: {Recommended Dish}. "
+                       "Description: {Meal Description}. Price: {Avg Price per Person (USD)} USD. "
+                       "Budget Range: {Budget Range}. Suitability: {Suitability}. "
+                       "Location: {City}, {Country}."),
+        field_mapping={
+            "Country": "Country",
+            "City": "City",
+            "RestaurantName": "Restaurant Name",
+            "TypeOfCuisine": "Type of Cuisine",
+            "MealsServed": "Meals Served",
+            "RecommendedDish": "Recommended Dish",
+            "MealDescription": "Meal Description",
+            "AvgPricePerPersonInUSD": "Avg Price per Person (USD)",
+            "BudgetRange": "Budget Range",
+            "Suitability": "Suitability",
+        },
+        natural_key=["Country", "City", "Restaurant Name"],
+        price_property="AvgPricePerPersonInUSD",
+    ),
+    "Scams": CollectionSpec(
+        collection="Scams",
+        text_template=("Country: {Country}. City: {City}. "
+                       "Scam Type: {Scam Type}. Description: {Description}. "
+                       "Location: {Location}. Prevention Tips: {Prevention Tips}."),
+        field_mapping={
+            "Country": "Country",
+            "City": "City",
+            "ScamType": "Scam Type",
+            "Description": "Description",
+            "Location": "Location",
+            "PreventionTips": "Prevention Tips",
+        },
+        natural_key=["Country", "City", "Scam Type", "Location"],
+    ),
+    "Seasonal": CollectionSpec(
+        collection="Seasonal",
+        text_template="Country: {Country}. Question: {Question}. Answer: {Answer}.",
+        field_mapping={
+            "Country": "Country",
+            "Question": "Question",
+            "Answer": "Answer",
+        },
+        natural_key=["Country", "Question"],
+    ),
+    "Transportation": CollectionSpec(
+        collection="Transportation",
+        text_template=("Transport from {From} to {To} in {Country} via {Transport Mode}. "
+                       "Provider: {Provider}. Schedule: {Schedule}. Route: {Route Info}. "
+                       "Duration: {Duration in hours} hours. Price Range: {Price Range in USD} USD. "
+                       "Cost Options: {Cost Details and Options}. Additional Info: {Additional Info}."),
+        field_mapping={
+            "Country": "Country",
+            "From": "From",
+            "To": "To",
+            "TransportMode": "Transport Mode",
+            "Provider": "Provider",
+            "Schedule": "Schedule",
+            "RouteInfo": "Route Info",
+            "DurationInHours": "Duration in hours",
+            "PriceRangeInUSD": "Price Range in USD",
+            "CostDetailsAndOptions": "Cost Details and Options",
+            "AdditionalInfo": "Additional Info",
+        },
+        natural_key=["Country", "From", "To", "Transport Mode", "Provider"],
+        price_property="PriceRangeInUSD",
+        duration_property="DurationInHours",
+    ),
+    "Visa": CollectionSpec(
+        collection="Visa",
+        text_template="Country: {Country}. Question: {Question}. Answer: {Answer}.",
+        field_mapping={
+            "Country": "Country",
+            "Question": "Question",
+            "Answer": "Answer",
+        },
+        natural_key=["Country", "Question"],
+    ),
+}
+
+
+@dataclass
+class IngestionReport:
+    collection: str
+    total: int = 0
+    inserted: int = 0
+    failed: List[Dict] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"[Ingestion] {self.collection}: {self.inserted}/{self.total} inserted, "
+                f"{len(self.failed)} failed in {self.seconds:.1f}s ({self.objects_per_second:.1f} obj/s)")
+
+
+def written_collection_name(spec: CollectionSpec, collection=None) -> str:
+    """Name of the collection actually written: a scratch target (e.g. a benchmark's) isn't the spec's"""
+    return getattr(collection, "name", None) or spec.collection
+
+
+def notify_collection_changed(collection_name: str, collection=None):
+    """Drop cached answers built from the old objects and recompute the collection's price tiers"""
+    mark_collection_changed(collection_name)
+    refresh_price_stats(collection_name, collection)
+
+
+def _chunks(items: Iterable, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_batch(collection, objects: List[Dict], batch_size: int, concurrent_requests: int) -> List:
+    """Send objects through the batch API and return Weaviate's failed objects"""
+    with collection.batch.fixed_size(batch_size=batch_size, concurrent_requests=concurrent_requests) as batch:
+        for obj in objects:
+            batch.add_object(properties=obj["properties"], vector=obj["vector"], uuid=obj["uuid"])
+    return list(collection.batch.failed_objects)
+
+
+def ingest_documents(collection_name: str, docs: Iterable[Dict], encode_batch_size: int = 64,
+                     write_batch_size: int = 100, concurrent_requests: int = 2, max_retries: int = 3,
+                     collection=None, on_chunk: Optional[Callable[[List[Dict], List[Dict]], None]] = None) -> IngestionReport:
+    """Embed documents in batches and write them through Weaviate's batch API.
+
+    `docs` is consumed lazily one chunk at a time, so a generator keeps memory flat. Objects Weaviate
+    rejects are retried up to max_retries times with exponential backoff; whatever still fails ends
+    up in the report's `failed` list together with its error message. `on_chunk` is called with each
+    chunk's raw documents and that chunk's failed entries once the chunk has been written.
+    """
+    spec = COLLECTION_SPECS[collection_name]
+    if collection is None:
+        collection = get_weaviate_collection(spec.collection)
+    report = IngestionReport(collection=spec.collection)
+    start = time.perf_counter()
+
+    for chunk in _chunks(docs, encode_batch_size):
+        report.total += len(chunk)
+        texts = [spec.text(doc) for doc in chunk]
+        vectors = model.encode(texts, batch_size=encode_batch_size)
+        pending = {}
+        for doc, text, vector in zip(chunk, texts, vectors):
+            # Same natural key -> same UUID, so re-running a load overwrites instead of duplicating
+            object_id = spec.object_id(doc)
+            properties = spec.properties(doc)
+            properties[CONTENT_HASH_PROPERTY] = spec.content_hash(doc)
+            pending[object_id] = {"uuid": object_id, "properties": properties, "vector": vector.tolist()}
+
+        errors = {}
+        for attempt in range(max_retries + 1):
+            failed = _write_batch(collection, list(pending.values()), write_batch_size, concurrent_requests)
+            errors = {str(error.object_.uuid): error.message for error in failed}
+            pending = {object_id: obj for object_id, obj in pending.items() if object_id in errors}
+            if not pending or attempt == max_retries:
+                break
+            time.sleep(min(2 ** attempt, 30))
+
+        report.inserted += len(chunk) - len(pending)
+        failed = [{"uuid": object_id, "properties": obj["properties"], "error": errors[object_id]}
+                  for object_id, obj in pending.items()]
+        report.failed.extend(failed)
+        if on_chunk is not None:
+            on_chunk(chunk, failed)
+
+    report.seconds = time.perf_counter() - start
+    if report.inserted:
+        notify_collection_changed(written_collection_name(spec, collection), collection)
+    print(report.summary())
+    return report
+
+
+@dataclass
+class RefreshPlan:
+    collection: str
+    inserts: List[Dict] = field(default_factory=list)
+    updates: List[Dict] = field(default_factory=list)
+    unchanged: int = 0
+    deletes: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (f"[Refresh] {self.collection}: {len(self.inserts)} to insert, {len(self.updates)} to update, "
+                f"{self.unchanged} unchanged, {len(self.deletes)} to delete")
+
+
+def _existing_content_hashes(collection) -> Dict[str, str]:
+    return {
+        str(obj.uuid): obj.properties.get(CONTENT_HASH_PROPERTY) or ""
+        for obj in collection.iterator(return_properties=[CONTENT_HASH_PROPERTY])
+    }
+
+
+def plan_refresh(collection_name: str, docs: Iterable[Dict], collection=None,
+                 delete_missing: bool = True) -> RefreshPlan:
+    """Diff upstream documents against what is stored, by natural-key UUID and content hash"""
+    spec = COLLECTION_SPECS[collection_name]
+    if collection is None:
+        collection = get_weaviate_collection(spec.collection)
+    existing = _existing_content_hashes(collection)
+    plan = RefreshPlan(collection=spec.collection)
+
+    seen = set()
+    for doc in docs:
+        object_id = spec.object_id(doc)
+        if object_id in seen:
+            continue
+        seen.add(object_id)
+
+        stored_hash = existing.get(object_id)
+        if stored_hash is None:
+            plan.inserts.append(doc)
+        elif stored_hash != spec.content_hash(doc):
+            plan.updates.append(doc)
+        else:
+            plan.unchanged += 1
+
+    if delete_missing:
+        plan.deletes = [object_id for object_id in existing if object_id not in seen]
+    return plan
+
+
+def refresh_collection(collection_name: str, docs: Iterable[Dict], dry_run: bool = False,
+                       delete_missing: bool = True, delete_batch_size: int = 1000, collection=None,
+                       **batch_options) -> RefreshPlan:
+    """Incrementally sync a collection with upstream documents.
+
+    Only new or changed documents are embedded and written (batch writes with an existing UUID replace
+    the object); objects whose natural key vanished upstream are deleted. With dry_run the plan is
+    computed and returned without touching the collection.
+    """
+    spec = COLLECTION_SPECS[collection_name]
+    if collection is None:
+        collection = get_weaviate_collection(spec.collection)
+
+    plan = plan_refresh(collection_name, docs, collection=collection, delete_missing=delete_missing)
+    print(plan.summary())
+    if dry_run:
+        return plan
+
+    if plan.inserts or plan.updates:
+        ingest_documents(collection_name, plan.inserts + plan.updates, collection=collection, **batch_options)
+
+    for start in range(0, len(plan.deletes), delete_batch_size):
+        ids = plan.deletes[start:start + delete_batch_size]
+        collection.data.delete_many(where=Filter.by_id().contains_any(ids))
+    if plan.deletes:
+        notify_collection_changed(written_collection_name(spec, collection), collection)
+    return plan
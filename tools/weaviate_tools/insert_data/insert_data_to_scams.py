@@ -1,25 +1,4 @@
-from tools.weaviate_tools.vectorizer import model
-from config.weaviate_setup.weaviate_cloud_conn import create_connection_with_weaviate_cloud
+from tools.weaviate_tools.ingestion import ingest_documents
 
-def insert_data_to_seasonal_collection(data: dict):
-    client = create_connection_with_weaviate_cloud()
-    collection = client.collections.get("Scams")
-    
-    for doc in data:
-        text = (f"Country: {doc['Country']}. City: {doc['City']}. "
-                f"Scam Type: {doc['Scam Type']}. Description: {doc['Description']}. "
-                f"Location: {doc['Location']}. Prevention Tips: {doc['Prevention Tips']}.")
-        vector = model.encode(text).tolist()
-
-        weaviate_data = {
-            "Country": doc["Country"],
-            "City": doc["City"],
-            "ScamType": doc["Scam Type"],
-            "Description": doc["Description"],
-            "Location": doc["Location"],
-            "PreventionTips": doc["Prevention Tips"],
-        }
-
-        uuid = collection.data.insert(properties=weaviate_data, vector=vector)
-
-    client.close()
\ No newline at end of file
+def insert_data_to_scams_collection(data: dict, **batch_options):
+    return ingest_documents("Scams", data, **batch_options)
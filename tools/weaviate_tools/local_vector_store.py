@@ -0,0 +1,447 @@
+"""In-process stand-in for Weaviate collections.
+
+Implements the slice of the Weaviate v4 collection API this repo uses (query.near_vector,
+query.fetch_objects, data.insert / delete_many, batch.fixed_size, iterator) over a float32 matrix
+per collection, so retrieval and ingestion code runs unchanged against it. Select it with
+VECTOR_BACKEND=local (see config/weaviate_setup/weaviate_client_manager.py).
+
+Collections are stored in the memory-mapped format from mmap_collection.py and served straight from
+the mapping until the first write, which copies them into memory.
+"""
+import fnmatch
+import os
+import threading
+import uuid as uuid_lib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+from tools.ranker import top_k_indices
+from tools.weaviate_tools.mmap_collection import is_mmap_collection, open_mmap_collection, write_mmap_collection
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Weaviate's server-side default when a query sets no limit
+DEFAULT_QUERY_LIMIT = 10
+
+
+@dataclass
+class LocalMetadata:
+    distance: Optional[float] = None
+    certainty: Optional[float] = None
+
+
+@dataclass
+class LocalObject:
+    uuid: uuid_lib.UUID
+    properties: Dict[str, Any]
+    metadata: LocalMetadata = field(default_factory=LocalMetadata)
+    vector: Optional[Dict[str, List[float]]] = None
+
+
+@dataclass
+class LocalQueryReturn:
+    objects: List[LocalObject]
+
+
+@dataclass
+class LocalDeleteManyReturn:
+    matches: int
+    successful: int
+    failed: int = 0
+
+
+@dataclass
+class LocalErrorObject:
+    message: str
+    object_: Any
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _compare(column: List[Any], operator: str, value) -> np.ndarray:
+    if operator == "Like":
+        pattern = str(value).lower()
+        return np.array([v is not None and fnmatch.fnmatchcase(str(v).lower(), pattern) for v in column], dtype=bool)
+    if operator == "IsNull":
+        return np.array([(v is None or v == "") == bool(value) for v in column], dtype=bool)
+    if operator in ("ContainsAny", "ContainsNone"):
+        wanted = {str(v).lower() for v in value}
+        hits = np.array([v is not None and str(v).lower() in wanted for v in column], dtype=bool)
+        return hits if operator == "ContainsAny" else ~hits
+
+    # TEXT equality in Weaviate is case-insensitive under the default word tokenization
+    if isinstance(value, str):
+        values = [None if v is None else str(v).lower() for v in column]
+        value = value.lower()
+    else:
+        values = column
+    result = np.zeros(len(column), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None:
+            continue
+        try:
+            if operator == "Equal":
+                result[i] = v == value
+            elif operator == "NotEqual":
+                result[i] = v != value
+            elif operator == "LessThan":
+                result[i] = v < value
+            elif operator == "LessThanEqual":
+                result[i] = v <= value
+            elif operator == "GreaterThan":
+                result[i] = v > value
+            elif operator == "GreaterThanEqual":
+                result[i] = v >= value
+            else:
+                raise NotImplementedError(f"Filter operator {operator} is not supported by the local store")
+        except TypeError:
+            # Mixed types (e.g. a number compared against "") simply don't match
+            result[i] = False
+    return result
+
+
+class _Query:
+    def __init__(self, collection: "LocalCollection"):
+        self._collection = collection
+
+    def near_vector(self, near_vector, certainty: Optional[float] = None, distance: Optional[float] = None,
+                    limit: Optional[int] = None, offset: Optional[int] = None, filters=None,
+                    return_properties: Optional[Sequence[str]] = None, return_metadata=None,
+                    include_vector: bool = False, **kwargs) -> LocalQueryReturn:
+        return self._collection.search(near_vector, certainty=certainty, distance=distance, limit=limit,
+                                       offset=offset, filters=filters, return_properties=return_properties,
+                                       include_vector=include_vector)
+
+    def fetch_objects(self, limit: Optional[int] = None, offset: Optional[int] = None, filters=None,
+                      return_properties: Optional[Sequence[str]] = None, include_vector: bool = False,
+                      **kwargs) -> LocalQueryReturn:
+        return self._collection.fetch(limit=limit, offset=offset, filters=filters,
+                                      return_properties=return_properties, include_vector=include_vector)
+
+
+class _Data:
+    def __init__(self, collection: "LocalCollection"):
+        self._collection = collection
+
+    def insert(self, properties: Dict[str, Any], vector=None, uuid=None, **kwargs) -> uuid_lib.UUID:
+        if vector is None:
+            raise ValueError("The local store has no vectorizer; pass vector=")
+        return self._collection.upsert([(uuid, properties, vector)])[0]
+
+    def delete_by_id(self, uuid) -> bool:
+        return self._collection.delete_ids([str(uuid)]) > 0
+
+    def delete_many(self, where, **kwargs) -> LocalDeleteManyReturn:
+        rows = np.flatnonzero(self._collection.filter_mask(where))
+        deleted = self._collection.delete_rows(rows)
+        return LocalDeleteManyReturn(matches=deleted, successful=deleted)
+
+
+class _BatchWriter:
+    def __init__(self):
+        self.objects = []
+
+    def add_object(self, properties: Dict[str, Any], vector=None, uuid=None, **kwargs):
+        self.objects.append((uuid, properties, vector))
+        return uuid
+
+
+class _Batch:
+    def __init__(self, collection: "LocalCollection"):
+        self._collection = collection
+        self.failed_objects: List[LocalErrorObject] = []
+
+    @contextmanager
+    def fixed_size(self, batch_size: int = 100, concurrent_requests: int = 2):
+        writer = _BatchWriter()
+        self.failed_objects = []
+        yield writer
+        valid = []
+        for uuid, properties, vector in writer.objects:
+            if vector is None:
+                error_object = LocalObject(uuid=uuid_lib.UUID(str(uuid)) if uuid else None, properties=properties)
+                self.failed_objects.append(LocalErrorObject("missing vector", error_object))
+            else:
+                valid.append((uuid, properties, vector))
+        self._collection.upsert(valid)
+
+    dynamic = fixed_size
+
+
+class LocalCollection:
+    """One collection: a row-aligned float32 matrix, a column per property and a tombstone mask"""
+
+    def __init__(self, name: str, dimensions: Optional[int] = None, hnsw_min_size: int = 20000,
+                 dtype: str = "float32"):
+        self.name = name
+        self.hnsw_min_size = hnsw_min_size
+        # Vector dtype on disk, and of the mapped matrix until the first write copies it to float32
+        self.dtype = dtype
+
+        self._ids: Sequence[str] = []
+        self._rows: Optional[Dict[str, int]] = {}
+        self._columns: Dict[str, List[Any]] = {}
+        self._vectors = np.zeros((0, dimensions or 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._hnsw = None
+        self._lock = threading.RLock()
+        self.dirty = False
+
+        self.query = _Query(self)
+        self.data = _Data(self)
+        self.batch = _Batch(self)
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # Writes
+
+    def _row_index(self) -> Dict[str, int]:
+        # Built on demand for mapped collections; reads never need it
+        if self._rows is None:
+            self._rows = {object_id: row for row, object_id in enumerate(self._ids)}
+        return self._rows
+
+    def _materialize(self):
+        """Copy a mapped collection into writable memory before its first write"""
+        if isinstance(self._ids, list):
+            return
+        self._ids = list(self._ids)
+        self._columns = {name: list(column) for name, column in self._columns.items()}
+        self._vectors = np.array(self._vectors, dtype=np.float32)
+        self._row_index()
+
+    def _append_row(self, object_id: str, vector: np.ndarray) -> int:
+        row = len(self._ids)
+        if self._vectors.shape[1] == 0:
+            self._vectors = np.zeros((0, vector.shape[0]), dtype=np.float32)
+        if row >= self._vectors.shape[0]:
+            # Grow geometrically so bulk loads stay amortized O(n)
+            grown = np.zeros((max(16, row * 2), self._vectors.shape[1]), dtype=np.float32)
+            grown[:row] = self._vectors[:row]
+            self._vectors = grown
+            self._alive = np.concatenate([self._alive, np.zeros(grown.shape[0] - self._alive.shape[0], dtype=bool)])
+        self._ids.append(object_id)
+        self._rows[object_id] = row
+        for column in self._columns.values():
+            column.append(None)
+        return row
+
+    def upsert(self, objects: Sequence) -> List[uuid_lib.UUID]:
+        """Insert or replace (uuid, properties, vector) triples; an existing uuid is overwritten like Weaviate"""
+        written = []
+        with self._lock:
+            self._materialize()
+            for object_id, properties, vector in objects:
+                object_id = str(object_id or uuid_lib.uuid4())
+                vector = _normalize(np.asarray(vector, dtype=np.float32).reshape(-1))
+                if self._vectors.shape[1] and vector.shape[0] != self._vectors.shape[1]:
+                    raise ValueError(f"{self.name} holds {self._vectors.shape[1]}-d vectors, got {vector.shape[0]}")
+
+                row = self._rows.get(object_id)
+                if row is None:
+                    row = self._append_row(object_id, vector)
+                self._vectors[row] = vector
+                self._alive[row] = True
+                for name, column in self._columns.items():
+                    column[row] = properties.get(name)
+                for name, value in properties.items():
+                    if name not in self._columns:
+                        self._columns[name] = [None] * len(self._ids)
+                        self._columns[name][row] = value
+                written.append(uuid_lib.UUID(object_id))
+            if written:
+                self._hnsw = None
+                self.dirty = True
+        return written
+
+    def delete_rows(self, rows: Sequence[int]) -> int:
+        with self._lock:
+            self._materialize()
+            rows = [int(row) for row in rows if self._alive[row]]
+            for row in rows:
+                self._alive[row] = False
+                del self._rows[self._ids[row]]
+            if rows:
+                self._hnsw = None
+                self.dirty = True
+            return len(rows)
+
+    def delete_ids(self, object_ids: Sequence[str]) -> int:
+        with self._lock:
+            rows = self._row_index()
+            return self.delete_rows([rows[i] for i in map(str, object_ids) if i in rows])
+
+    # Reads
+
+    def filter_mask(self, filters) -> np.ndarray:
+        """Evaluate a weaviate.classes.query.Filter over the live rows"""
+        n = len(self._ids)
+        mask = self._alive[:n].copy()
+        if filters is None:
+            return mask
+        return mask & self._evaluate(filters, n)
+
+    def _evaluate(self, filters, n: int) -> np.ndarray:
+        operator = getattr(filters.operator, "value", filters.operator)
+        if operator in ("And", "Or", "Not"):
+            masks = [self._evaluate(f, n) for f in filters.filters]
+            if operator == "Not":
+                return ~masks[0]
+            return np.logical_and.reduce(masks) if operator == "And" else np.logical_or.reduce(masks)
+
+        target = filters.target
+        if not isinstance(target, str):
+            raise NotImplementedError("Reference filters are not supported by the local store")
+        column = self._ids if target == "_id" else self._columns.get(target, [None] * n)
+        return _compare(column, operator, filters.value)
+
+    def _project(self, row: int, return_properties: Optional[Sequence[str]]) -> Dict[str, Any]:
+        names = return_properties if return_properties is not None else self._columns.keys()
+        # Like Weaviate, unset properties come back as None
+        return {name: self._columns[name][row] if name in self._columns else None for name in names}
+
+    def _object(self, row: int, return_properties, include_vector: bool, similarity: Optional[float] = None):
+        metadata = LocalMetadata()
+        if similarity is not None:
+            metadata = LocalMetadata(distance=1.0 - similarity, certainty=(1.0 + similarity) / 2.0)
+        vector = {"default": self._vectors[row].tolist()} if include_vector else None
+        return LocalObject(uuid=uuid_lib.UUID(self._ids[row]), properties=self._project(row, return_properties),
+                           metadata=metadata, vector=vector)
+
+    def _build_hnsw(self, rows: np.ndarray):
+        index = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+        index.init_index(max_elements=len(rows), ef_construction=200, M=16)
+        index.add_items(np.asarray(self._vectors[rows], dtype=np.float32), rows)
+        index.set_ef(128)
+        return index
+
+    def search(self, near_vector, certainty: Optional[float] = None, distance: Optional[float] = None,
+               limit: Optional[int] = None, offset: Optional[int] = None, filters=None,
+               return_properties: Optional[Sequence[str]] = None, include_vector: bool = False) -> LocalQueryReturn:
+        """Cosine top-k, exact with NumPy or via HNSW for large unfiltered collections"""
+        limit = DEFAULT_QUERY_LIMIT if limit is None else limit
+        offset = offset or 0
+        # Vectors are unit length, so cosine similarity is a dot product
+        query = _normalize(np.asarray(near_vector, dtype=np.float32).reshape(-1))
+        min_similarity = -np.inf
+        if certainty is not None:
+            min_similarity = 2.0 * certainty - 1.0
+        if distance is not None:
+            min_similarity = max(min_similarity, 1.0 - distance)
+
+        with self._lock:
+            mask = self.filter_mask(filters)
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return LocalQueryReturn(objects=[])
+
+            k = min(limit + offset, rows.size)
+            if filters is None and hnswlib is not None and rows.size >= self.hnsw_min_size:
+                if self._hnsw is None:
+                    self._hnsw = self._build_hnsw(rows)
+                labels, distances = self._hnsw.knn_query(query, k=k)
+                ranked, similarities = labels[0].astype(np.int64), 1.0 - distances[0]
+            else:
+                # Score the (possibly mapped) matrix in place unless a filter or tombstone narrows it
+                candidates = self._vectors[:rows.size] if rows.size == len(self._ids) else self._vectors[rows]
+                scores = np.asarray(candidates @ query, dtype=np.float32)
+                order = top_k_indices(scores, k)
+                ranked, similarities = rows[order], scores[order]
+
+            keep = similarities >= min_similarity
+            ranked, similarities = ranked[keep][offset:], similarities[keep][offset:]
+            return LocalQueryReturn(objects=[
+                self._object(int(row), return_properties, include_vector, float(similarity))
+                for row, similarity in zip(ranked, similarities)
+            ])
+
+    def fetch(self, limit: Optional[int] = None, offset: Optional[int] = None, filters=None,
+              return_properties: Optional[Sequence[str]] = None, include_vector: bool = False) -> LocalQueryReturn:
+        limit = DEFAULT_QUERY_LIMIT if limit is None else limit
+        offset = offset or 0
+        with self._lock:
+            rows = np.flatnonzero(self.filter_mask(filters))[offset:offset + limit]
+            return LocalQueryReturn(objects=[self._object(int(row), return_properties, include_vector)
+                                             for row in rows])
+
+    def iterator(self, include_vector: bool = False, return_properties: Optional[Sequence[str]] = None,
+                 **kwargs) -> Iterator[LocalObject]:
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:len(self._ids)])
+        for row in rows:
+            yield self._object(int(row), return_properties, include_vector)
+
+    # Persistence
+
+    def save(self, directory: str):
+        """Write live rows in the memory-mapped format"""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:len(self._ids)])
+            write_mmap_collection(directory, self.name, (
+                (self._ids[row], self._vectors[row], {name: column[row] for name, column in self._columns.items()})
+                for row in rows
+            ), dtype=self.dtype)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, name: str, directory: str, **kwargs) -> "LocalCollection":
+        """Map a saved collection; nothing is copied until it is written to"""
+        meta, ids, vectors, columns = open_mmap_collection(directory)
+        collection = cls(name, dimensions=meta["dimensions"], dtype=meta["dtype"], **kwargs)
+        collection._ids = ids
+        collection._rows = None
+        collection._columns = dict(columns)
+        collection._vectors = vectors
+        collection._alive = np.ones(meta["count"], dtype=bool)
+        return collection
+
+
+class LocalVectorStore:
+    """Drop-in for WeaviateClientManager that serves collections from a local directory"""
+
+    def __init__(self, path: str = "vector_store", hnsw_min_size: int = 20000, dtype: str = "float32"):
+        self.path = path
+        self.hnsw_min_size = hnsw_min_size
+        # float16 halves the file and page-cache footprint at a small recall cost
+        self.dtype = dtype
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_client(self):
+        return self
+
+    def get_collection(self, name: str) -> LocalCollection:
+        """Open a collection from disk on first use; unknown names start empty"""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                directory = os.path.join(self.path, name)
+                if is_mmap_collection(directory):
+                    collection = LocalCollection.load(name, directory, hnsw_min_size=self.hnsw_min_size)
+                else:
+                    collection = LocalCollection(name, hnsw_min_size=self.hnsw_min_size, dtype=self.dtype)
+                self._collections[name] = collection
+            return collection
+
+    def invalidate(self, client=None):
+        # Nothing to reconnect; kept so callers can treat both backends alike
+        pass
+
+    def save(self):
+        with self._lock:
+            for name, collection in self._collections.items():
+                if collection.dirty:
+                    collection.save(os.path.join(self.path, name))
+
+    def close(self):
+        """Persist collections that were written to"""
+        self.save()
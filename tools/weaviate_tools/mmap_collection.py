@@ -0,0 +1,232 @@
+"""Memory-mapped on-disk format for local vector collections.
+
+One directory per collection:
+    meta.json              count, dimensions, vector dtype and the column table
+    vectors.<dtype>        count x dimensions row-major matrix (float32 or float16), unit-length rows
+    ids.bin                count x 16 bytes of object UUIDs
+    columns/<i>.nulls      one byte per row, 1 where the property is unset
+    columns/<i>.data       text/json columns: concatenated UTF-8 values ...
+    columns/<i>.offsets    ... and count + 1 uint64 offsets into it
+    columns/<i>.values     number/bool columns: one float64 / uint8 per row
+
+Everything is opened with np.memmap, so opening is a handful of mmap calls, nothing is parsed until
+a row is read, and forked workers share the pages through the OS page cache.
+"""
+import json
+import os
+import shutil
+import uuid as uuid_lib
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+
+FORMAT_VERSION = 1
+VECTOR_DTYPES = ("float32", "float16")
+
+
+def _memmap(path: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+    # mmap can't map an empty file
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _kind(value) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "text"
+    return "json"
+
+
+class _ColumnWriter:
+    def __init__(self, directory: str, index: int, kind: str, rows_before: int):
+        self.kind = kind
+        self.base = os.path.join(directory, "columns", str(index))
+        self.nulls = [1] * rows_before
+        if kind in ("text", "json"):
+            self.offsets = [0] * (rows_before + 1)
+            self.data = open(f"{self.base}.data", "wb")
+        else:
+            self.values = [0] * rows_before
+
+    def append(self, value):
+        self.nulls.append(1 if value is None else 0)
+        if self.kind in ("text", "json"):
+            if value is not None:
+                encoded = (value if self.kind == "text" else json.dumps(value)).encode("utf-8")
+                self.data.write(encoded)
+                self.offsets.append(self.offsets[-1] + len(encoded))
+            else:
+                self.offsets.append(self.offsets[-1])
+        else:
+            self.values.append(0 if value is None else value)
+
+    def close(self):
+        np.asarray(self.nulls, dtype=np.uint8).tofile(f"{self.base}.nulls")
+        if self.kind in ("text", "json"):
+            self.data.close()
+            np.asarray(self.offsets, dtype=np.uint64).tofile(f"{self.base}.offsets")
+        else:
+            np.asarray(self.values, dtype=np.float64 if self.kind == "number" else np.uint8).tofile(f"{self.base}.values")
+
+
+class MmapCollectionWriter:
+    """Streams objects into a collection directory; nothing but the offsets is held in memory.
+
+    Writes go to a sibling temp directory that replaces `directory` on close, so readers never see a
+    half-written collection.
+    """
+
+    def __init__(self, directory: str, name: str, dtype: str = "float32"):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.directory = os.path.abspath(directory)
+        self.name = name
+        self.dtype = dtype
+        self.count = 0
+        self.dimensions: Optional[int] = None
+
+        self._tmp = f"{self.directory}.tmp-{os.getpid()}"
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(os.path.join(self._tmp, "columns"))
+        self._vectors = open(os.path.join(self._tmp, f"vectors.{dtype}"), "wb")
+        self._ids = open(os.path.join(self._tmp, "ids.bin"), "wb")
+        self._columns: Dict[str, _ColumnWriter] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, object_id, vector, properties: Dict[str, Any]):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.dimensions is None:
+            self.dimensions = vector.shape[0]
+        elif vector.shape[0] != self.dimensions:
+            raise ValueError(f"{self.name} holds {self.dimensions}-d vectors, got {vector.shape[0]}")
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        self._vectors.write(vector.astype(self.dtype).tobytes())
+        self._ids.write(uuid_lib.UUID(str(object_id)).bytes)
+
+        for name, value in properties.items():
+            # A column's kind is fixed by its first non-null value, like a Weaviate data type
+            if name not in self._columns and value is not None:
+                self._columns[name] = _ColumnWriter(self._tmp, len(self._columns), _kind(value), self.count)
+        for name, column in self._columns.items():
+            column.append(properties.get(name))
+        self.count += 1
+
+    def close(self):
+        self._vectors.close()
+        self._ids.close()
+        for column in self._columns.values():
+            column.close()
+        meta = {
+            "version": FORMAT_VERSION,
+            "name": self.name,
+            "count": self.count,
+            "dimensions": self.dimensions or 0,
+            "dtype": self.dtype,
+            "columns": [{"name": name, "kind": column.kind} for name, column in self._columns.items()],
+        }
+        with open(os.path.join(self._tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        # Swap directories; processes that still map the old files keep them until they close
+        old = f"{self.directory}.old-{os.getpid()}"
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old)
+        os.replace(self._tmp, self.directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self):
+        self._vectors.close()
+        self._ids.close()
+        for column in self._columns.values():
+            if column.kind in ("text", "json"):
+                column.data.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def write_mmap_collection(directory: str, name: str, objects: Iterable[Tuple[Any, Any, Dict[str, Any]]],
+                          dtype: str = "float32") -> int:
+    """Write (uuid, vector, properties) triples; returns the object count"""
+    with MmapCollectionWriter(directory, name, dtype=dtype) as writer:
+        for object_id, vector, properties in objects:
+            writer.add(object_id, vector, properties)
+    return writer.count
+
+
+class MmapColumn(Sequence):
+    """Read-only view of one property; values are decoded only when indexed"""
+
+    def __init__(self, base: str, kind: str, count: int):
+        self.kind = kind
+        self.count = count
+        self.nulls = _memmap(f"{base}.nulls", np.uint8, (count,))
+        if kind in ("text", "json"):
+            self.offsets = _memmap(f"{base}.offsets", np.uint64, (count + 1,))
+            size = int(self.offsets[-1])
+            self.data = _memmap(f"{base}.data", np.uint8, (size,))
+        else:
+            self.values = _memmap(f"{base}.values", np.float64 if kind == "number" else np.uint8, (count,))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.count))]
+        if self.nulls[row]:
+            return None
+        if self.kind == "number":
+            return float(self.values[row])
+        if self.kind == "bool":
+            return bool(self.values[row])
+        raw = self.data[int(self.offsets[row]):int(self.offsets[row + 1])].tobytes().decode("utf-8")
+        return raw if self.kind == "text" else json.loads(raw)
+
+
+class MmapIds(Sequence):
+    """Object UUID strings, decoded on access"""
+
+    def __init__(self, path: str, count: int):
+        self.raw = _memmap(path, np.uint8, (count, 16))
+
+    def __len__(self) -> int:
+        return self.raw.shape[0]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return str(uuid_lib.UUID(bytes=self.raw[row].tobytes()))
+
+
+def is_mmap_collection(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, "meta.json"))
+
+
+def open_mmap_collection(directory: str) -> Tuple[Dict[str, Any], MmapIds, np.ndarray, Dict[str, MmapColumn]]:
+    """Map a collection directory: (meta, ids, vectors, columns), all lazily read"""
+    with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported collection format version in {directory}: {meta.get('version')}")
+
+    count, dimensions = meta["count"], meta["dimensions"]
+    vectors = _memmap(os.path.join(directory, f"vectors.{meta['dtype']}"), meta["dtype"], (count, dimensions))
+    ids = MmapIds(os.path.join(directory, "ids.bin"), count)
+    columns = {
+        column["name"]: MmapColumn(os.path.join(directory, "columns", str(i)), column["kind"], count)
+        for i, column in enumerate(meta["columns"])
+    }
+    return meta, ids, vectors, columns
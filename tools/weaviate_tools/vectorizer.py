@@ -1,2 +1,102 @@
-from sentence_transformers import SentenceTransformer
-model = SentenceTransformer("all-MiniLM-L6-v2")
+import os
+import threading
+from dotenv import load_dotenv
+from tools.weaviate_tools.embedding_batcher import MicroBatcher
+from tools.weaviate_tools.embedding_cache import CachedEncoder
+
+load_dotenv()
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# SentenceTransformer arguments per EMBEDDING_BACKEND. The ONNX files ship with the model on the
+# Hugging Face hub; the int8 one is dynamically quantized (AVX2 kernels, override with EMBEDDING_ONNX_FILE)
+EMBEDDING_BACKENDS = {
+    "torch": {},
+    "onnx": {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model.onnx"}},
+    "onnx-int8": {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_quint8_avx2.onnx"}},
+}
+DEFAULT_BACKEND = "torch"
+
+
+class LazySentenceTransformer:
+    """Defers importing sentence_transformers and loading the weights until the model is first used"""
+
+    def __init__(self, model_name: str, **kwargs):
+        self.model_name = model_name
+        self.kwargs = kwargs
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, **self.kwargs)
+        return self._model
+
+    def __getattr__(self, name):
+        # copy/pickle probe dunders (and _model before __init__ has run); none of that is worth loading the weights for
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def load_encoder(backend: str = DEFAULT_BACKEND, onnx_file: str = None) -> LazySentenceTransformer:
+    """Uncached MiniLM encoder running on the given backend ("torch", "onnx" or "onnx-int8")"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+    kwargs = {key: dict(value) if isinstance(value, dict) else value
+              for key, value in EMBEDDING_BACKENDS[backend].items()}
+    if onnx_file and backend != "torch":
+        kwargs["model_kwargs"]["file_name"] = onnx_file
+    return LazySentenceTransformer(MODEL_NAME, **kwargs)
+
+
+BACKEND = os.getenv("EMBEDDING_BACKEND") or DEFAULT_BACKEND
+# Concurrent cache misses share forward passes; EMBEDDING_BATCH_MAX_SIZE=1 encodes each call on its own
+BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE") or 32)
+BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS") or 2.0)
+
+
+def local_encoder():
+    encoder = load_encoder(BACKEND, os.getenv("EMBEDDING_ONNX_FILE") or None)
+    return MicroBatcher(encoder, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCH_MAX_SIZE > 1 else encoder
+
+
+def server_encoder(socket_path: str):
+    from tools.weaviate_tools.embedding_server import EmbeddingClient
+    return EmbeddingClient(socket_path)
+
+
+# All encode calls go through the cache; set EMBEDDING_CACHE_PATH to persist it across restarts.
+# Non-default backends get their own cache keys since their vectors differ slightly from fp32 torch.
+# With EMBEDDING_SERVER_SOCKET set, cache misses are encoded by the embedding server instead of in-process
+model = CachedEncoder(
+    server_encoder(os.getenv("EMBEDDING_SERVER_SOCKET")) if os.getenv("EMBEDDING_SERVER_SOCKET") else local_encoder(),
+    model_name=MODEL_NAME if BACKEND == DEFAULT_BACKEND else f"{MODEL_NAME}@{BACKEND}",
+    max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_BYTES") or 64 * 1024 * 1024),
+    disk_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+)
+
+
+def use_embedding_server(socket_path: str):
+    """Send cache misses to the embedding server on socket_path from now on; no weights load in this process"""
+    model.model = server_encoder(socket_path)
+
+
+def preload():
+    """Load the weights without running them, e.g. in a server's parent process before it forks workers.
+    
+    The forward pass is left to warm_up() in each worker: torch's thread pools don't survive a fork.
+    """
+    model.model.load()
+
+
+def warm_up():
+    """Load the weights (or reach the embedding server) and run one forward pass, bypassing the cache"""
+    model.model.load().encode(["warm up"])